@@ -0,0 +1,106 @@
+"""
+프로세스 공용 모델/자원 + 서버 시작 시 예열
+CLIP 인코더, 검색 배처, 프롬프트 캐시, 얼굴 모델을 프로세스에 한 번만 올립니다.
+Streamlit 스크립트(v3_claude_gemini.py)의 @st.cache_resource 함수들은 여기를 부르기만 하므로,
+스크립트가 처음 실행되기 전에(serve.py 가 서버를 띄우기 전에) 예열해 둔 자원을 그대로 씁니다.
+예열이 끝나면 준비 완료 파일(CLIP_READY_FILE)을 써서, 브라우저 세션이 하나도 없어도 readiness probe 가 통과합니다.
+"""
+
+import os
+import threading
+
+from clip_model import load_local_encoder
+from face_index import load_face_models
+from lazy_imports import start_background_warmup
+from model_store import offline_if_packaged
+from model_server import default_client
+from photo_store import sweep_orphans
+from query_batcher import QueryBatcher
+from text_search import COMMON_PROMPTS, PromptEmbeddingCache
+from warmup import warm_up_encoder, mark_ready, clear_ready
+
+# 로컬 모델 저장소가 있으면 오프라인 모드 - transformers 가 import 시점에 읽으므로 예열 스레드가 import 하기 전에
+OFFLINE_STORE = offline_if_packaged()
+
+# 0 이면 백그라운드 예열을 하지 않음 (모델은 처음 쓸 때 로드) - 콜드 스타트 벤치마크처럼 첫 화면만 잴 때
+WARMUP_ENABLED = os.environ.get("APP_WARMUP", "1") != "0"
+
+_resources = {}
+_build_locks = {}           # 자원 이름 → 그 자원을 만드는 동안 잡는 락
+_lock = threading.Lock()    # _build_locks / _warmup_status 보호 (만드는 동안에는 잡지 않음)
+_warmup_status = None
+
+
+def _shared(name, factory):
+    """
+    name 자원을 처음 필요할 때 한 번만 만들어 캐시. 락은 자원마다 따로 잡으므로
+    CLIP 로드/예열(수 초)이 도는 동안에도 이미 만든 자원이나 다른 자원(얼굴 모델 등)은 기다리지 않음.
+    자원끼리 서로 부르는 것(배처 → 인코더)은 이름이 다르므로 괜찮음
+    """
+    if name in _resources:
+        return _resources[name]
+    with _lock:
+        build_lock = _build_locks.setdefault(name, threading.Lock())
+    with build_lock:
+        if name not in _resources:
+            _resources[name] = factory()
+        return _resources[name]
+
+
+def clip_encoder():
+    """CLIP 인코더: CLIP_SERVER 가 설정돼 있으면 공유 모델 서버(model_server.py), 아니면 프로세스 내 모델"""
+    return _shared("clip", lambda: default_client() or load_local_encoder())
+
+
+def clip_warmup_report():
+    """CLIP 가중치 로드 + 평소 크기의 더미 배치 추론 (첫 이용자가 콜드 추론을 기다리지 않게)"""
+    return _shared("clip_warmup", lambda: warm_up_encoder(clip_encoder()))
+
+
+def query_batcher():
+    """동시 검색 마이크로 배처 (여러 세션의 검색을 모아 한 번에 인코딩/행렬곱)"""
+    return _shared("query_batcher", lambda: QueryBatcher(clip_encoder()))
+
+
+def prompt_cache():
+    """텍스트 프롬프트 임베딩 캐시 (자주 쓰는 프롬프트는 미리 계산)"""
+    def build():
+        cache = PromptEmbeddingCache(clip_encoder())
+        cache.warm(COMMON_PROMPTS.values())
+        return cache
+
+    return _shared("prompt_cache", build)
+
+
+def face_channel():
+    """얼굴 검출/임베딩 모델 (models/face/ 에 없으면 None → 얼굴 채널 꺼짐)"""
+    return _shared("face", load_face_models)
+
+
+def sweep_photo_store():
+    """이전(끝난) 서버 프로세스의 세션 사진이 잡고 있던 원본 참조 / 미리보기 정리 (재시작하면 세션 사진은 사라짐)"""
+    return _shared("photo_store_sweep", sweep_orphans)
+
+
+def mark_app_ready():
+    """예열이 모두 끝나면 준비 완료 파일(CLIP_READY_FILE)을 씀 → 배포 환경이 이 인스턴스로 트래픽을 보냄"""
+    mark_ready(clip_warmup_report())
+
+
+def start_app_warmup():
+    """
+    프로세스당 한 번: 이전 준비 완료 파일을 지우고, 무거운 import 와 모델 로드/예열을 백그라운드 스레드에서 시작.
+    serve.py 가 서버 시작 전에 부르며, streamlit run 으로 바로 띄웠으면 첫 실행에서 불림. 반환: 진행 상황 dict
+    (APP_WARMUP=0 이면 아무것도 하지 않고 완료로 표시)
+    """
+    global _warmup_status
+    with _lock:
+        if _warmup_status is None and not WARMUP_ENABLED:
+            _warmup_status = {"done": True, "timings": {}, "errors": {}, "disabled": True}
+        elif _warmup_status is None:
+            clear_ready()
+            _warmup_status = start_background_warmup(loaders=(
+                clip_encoder, clip_warmup_report, query_batcher, prompt_cache, face_channel, sweep_photo_store,
+                mark_app_ready,
+            ))
+        return _warmup_status
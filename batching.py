@@ -0,0 +1,73 @@
+"""
+동적 배치 (dynamic batching)
+여러 스레드/세션에서 동시에 들어온 요청을 최대 max_wait_ms 동안 또는 max_batch 개까지 모아
+process_fn 을 한 번만 호출하고, 결과를 각 요청자에게 나눠 돌려줍니다.
+"""
+
+import queue
+import threading
+import time
+from concurrent.futures import Future
+
+from metrics import BATCH_SIZE, BATCH_SECONDS
+
+
+class DynamicBatcher:
+    """
+    process_fn(items) -> results : 입력 목록을 받아 같은 길이의 결과 목록을 반환하는 함수.
+    submit(item) 은 Future 를, 호출(batcher(item)) 은 결과를 바로 돌려줍니다.
+    """
+
+    def __init__(self, process_fn, max_batch=32, max_wait_ms=5.0, name="batcher"):
+        self.process_fn = process_fn
+        self.max_batch = max_batch
+        self.max_wait = max_wait_ms / 1000
+        self.name = name
+        self._queue = queue.Queue()
+        self.batches = 0
+        self.items = 0
+        self._thread = threading.Thread(target=self._run, name=name, daemon=True)
+        self._thread.start()
+
+    def submit(self, item):
+        future = Future()
+        self._queue.put((item, future))
+        return future
+
+    def __call__(self, item, timeout=None):
+        return self.submit(item).result(timeout=timeout)
+
+    @property
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def _collect(self):
+        """첫 요청을 기다린 뒤, 마감 시간까지 들어오는 요청을 max_batch 개까지 모음"""
+        batch = [self._queue.get()]
+        deadline = time.perf_counter() + self.max_wait
+        while len(batch) < self.max_batch:
+            remaining = deadline - time.perf_counter()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect()
+            items = [item for item, _ in batch]
+            BATCH_SIZE.observe(len(items), batcher=self.name)
+            try:
+                with BATCH_SECONDS.time(batcher=self.name):
+                    results = self.process_fn(items)
+            except Exception as e:  # 배치 전체 실패는 모든 요청자에게 전달
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            self.batches += 1
+            self.items += len(batch)
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
@@ -0,0 +1,4 @@
+"""
+헤드리스 벤치마크 모음 (Streamlit 없이 실행)
+저장소 루트에서 `python -m benchmarks.<이름>` 으로 실행합니다.
+"""
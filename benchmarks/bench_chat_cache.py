@@ -0,0 +1,126 @@
+"""
+챗봇 응답 캐시 벤치마크 (스텁 LLM 클라이언트, 오프라인)
+주제 라벨이 붙은 질문(같은 뜻을 다르게 말한 질문 + 숫자/한 단어만 다른 다른 주제 질문)을 섞어 보내고,
+exact(chat_cache) 만 쓸 때와 의미 캐시(semantic_cache)를 앞에 둘 때의
+적중률 / 오적중(다른 주제의 답을 준 수) / 절약한 API 호출 수 / 응답 지연을 비교합니다.
+
+실행:
+    python -m benchmarks.bench_chat_cache                      # 글자 n-gram 해시 인코더
+    python -m benchmarks.bench_chat_cache --encoder sentence   # sentence-transformers 가 있을 때
+    python -m benchmarks.bench_chat_cache --threshold 0.6 0.7 0.8 0.9
+"""
+
+import argparse
+import random
+import time
+
+from benchmarks.common import percentile, write_results
+from chat_cache import ResponseCache
+from semantic_cache import NgramHashEncoder, SemanticCache, cached_completion, load_text_encoder
+
+MODEL = "gpt-3.5-turbo"
+PARAMS = {"temperature": 0.7, "max_tokens": 1000}
+SYSTEM = "당신은 러닝 전문가입니다. 사용자의 러닝 관련 질문에 친절하고 상세하게 답변해주세요."
+
+# 주제 → 같은 뜻의 질문들 (첫 번째가 추천 질문 버튼 문구)
+QUESTIONS = {
+    "shoes": ["러닝화 추천해주세요", "러닝화 추천해줘", "러닝화 추천 부탁드려요", "러닝화 뭐 사야돼?", "달리기용 신발 추천"],
+    "clothes": ["러닝 의류 추천해주세요", "러닝 옷 추천해줘", "달릴 때 뭐 입어야 돼?"],
+    "beginner": ["초보자 러닝 시작 방법", "러닝 처음 시작하는 법", "초보 러너 시작하는 방법 알려줘"],
+    "diet": ["마라톤 식단 알려주세요", "마라톤 전에 뭐 먹어야 해?", "마라톤 식단 추천해줘"],
+    "stretch": ["부상 예방 스트레칭", "부상 예방 스트레칭 알려줘", "부상 안 당하려면 어떤 스트레칭?"],
+    "5k": ["5km 준비 방법", "5km 대회 준비 방법 알려줘"],
+    "10k": ["10km 준비 방법", "10km 대회 준비 방법 알려줘"],
+    "half": ["하프 마라톤 훈련법", "하프 마라톤 훈련 어떻게 해?"],
+    "full": ["풀 마라톤 훈련법", "풀 마라톤 훈련 어떻게 해?"],
+    "pre_meal": ["러닝 전 식사", "달리기 전에 뭐 먹어?"],
+    "post_meal": ["러닝 후 식사", "달리기 끝나고 뭐 먹어?"],
+}
+
+
+class StubClient:
+    """client.chat.completions.create(...) 만 흉내 내는 LLM (지연 latency_ms, 답에 주제 라벨을 넣음)"""
+
+    def __init__(self, topics, latency_ms=800.0):
+        self.topics = topics
+        self.latency = latency_ms / 1000
+        self.calls = 0
+        self.chat = self
+        self.completions = self
+
+    def create(self, model, messages, **params):
+        self.calls += 1
+        time.sleep(self.latency)
+        question = messages[-1]["content"]
+        content = f"[{self.topics[question]}] {question} 에 대한 답변"
+        message = type("Message", (), {"content": content})()
+        return type("Response", (), {"choices": [type("Choice", (), {"message": message})()]})()
+
+
+def first_turn_messages(question):
+    """앱(test.py)의 첫 질문과 같은 모양: 시스템 프롬프트 + 대화 기록에 먼저 넣은 질문 + 질문"""
+    return [{"role": "system", "content": SYSTEM},
+            {"role": "user", "content": question},
+            {"role": "user", "content": question}]
+
+
+def traffic(requests, seed):
+    """추천 질문 문구가 절반, 나머지는 다른 표현을 고르게 섞은 요청 목록 [(질문, 주제)]"""
+    rng = random.Random(seed)
+    topics = list(QUESTIONS)
+    stream = []
+    for _ in range(requests):
+        topic = rng.choice(topics)
+        variants = QUESTIONS[topic]
+        stream.append((variants[0] if rng.random() < 0.5 else rng.choice(variants), topic))
+    return stream
+
+
+def run(stream, topics, semantic, latency_ms):
+    client = StubClient(topics, latency_ms)
+    cache = ResponseCache(":memory:")
+    sources = {"exact": 0, "semantic": 0, "api": 0}
+    false_hits = 0
+    latencies = []
+    for question, topic in stream:
+        start = time.perf_counter()
+        answer, source = cached_completion(client, MODEL, first_turn_messages(question), cache, semantic, **PARAMS)
+        latencies.append(time.perf_counter() - start)
+        sources[source] += 1
+        false_hits += source != "api" and not answer.startswith(f"[{topic}]")
+    hits = sources["exact"] + sources["semantic"]
+    return {
+        **sources,
+        "hit_rate": round(hits / len(stream), 3),
+        "false_hits": false_hits,
+        "api_calls": client.calls,
+        "p50_ms": round(1000 * percentile(latencies, 50), 2),
+        "p99_ms": round(1000 * percentile(latencies, 99), 2),
+        "mean_ms": round(1000 * sum(latencies) / len(latencies), 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--encoder", choices=["hash", "sentence"], default="hash")
+    parser.add_argument("--threshold", type=float, nargs="+", help="비교할 임계값 (기본: 인코더 기본값)")
+    parser.add_argument("--requests", type=int, default=500)
+    parser.add_argument("--latency-ms", type=float, default=20.0, help="스텁 LLM 응답 지연")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    encoder = NgramHashEncoder() if args.encoder == "hash" else load_text_encoder()
+    topics = {q: topic for topic, variants in QUESTIONS.items() for q in variants}
+    stream = traffic(args.requests, args.seed)
+
+    results = [{"cache": "exact", **run(stream, topics, None, args.latency_ms)}]
+    for threshold in args.threshold or [encoder.default_threshold]:
+        semantic = SemanticCache(encoder, threshold=threshold)
+        results.append({"cache": f"semantic({getattr(encoder, 'name', args.encoder)})", "threshold": threshold,
+                        **run(stream, topics, semantic, args.latency_ms)})
+    write_results("chat_cache", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
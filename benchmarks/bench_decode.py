@@ -0,0 +1,93 @@
+"""
+작가 사진 디코딩 벤치마크: 전체 디코딩 vs DCT 축소 디코딩(draft)
+일반적인 DSLR/미러리스 해상도별로 사진 1장 디코딩 시간과 최대 메모리(peak RSS 증가분)를 잽니다.
+메모리는 측정마다 새 프로세스의 VmHWM(/proc) 으로 잽니다 (ru_maxrss 는 exec 후에도 부모 값이 남아서 쓰지 않음).
+    full   : Image.open(...).convert("RGB") (예전 작가 모드)
+    work   : reduced_rgb(..., WORK_SIDE) - 인물/얼굴/배번/미리보기용 작업 해상도
+    clip   : reduced_rgb(..., 224) - CLIP 입력만 필요할 때의 하한
+
+실행:
+    python -m benchmarks.bench_decode --repeat 5
+"""
+
+import argparse
+import io
+import json
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from PIL import Image
+
+from benchmarks.common import synthetic_jpeg, write_results
+from photo_store import WORK_SIDE, reduced_rgb
+
+SENSORS = {  # 이름: (가로, 세로)
+    "12MP": (4240, 2832),
+    "24MP": (6000, 4000),
+    "45MP": (8256, 5504),
+}
+MODES = {
+    "full": lambda image: image.convert("RGB"),
+    "work": lambda image: reduced_rgb(image, WORK_SIDE),
+    "clip": lambda image: reduced_rgb(image, 224),
+}
+
+
+def peak_rss_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1])
+    return 0
+
+
+def child(path, mode, repeat):
+    """새 프로세스 안에서: 디코딩 시간 중앙값과 peak RSS 증가분(MB)"""
+    with open(path, "rb") as f:
+        data = f.read()
+    base_kb = peak_rss_kb()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        image = MODES[mode](Image.open(io.BytesIO(data)))
+        timings.append(time.perf_counter() - start)
+        size = image.size
+        del image
+    peak_kb = peak_rss_kb()
+    timings.sort()
+    print(json.dumps({"ms": round(1000 * timings[len(timings) // 2], 1), "peak_rss_mb": round((peak_kb - base_kb) / 1024, 1),
+                      "decoded": f"{size[0]}x{size[1]}"}))
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--sensors", nargs="+", default=list(SENSORS), choices=list(SENSORS))
+    parser.add_argument("--child", nargs=2, metavar=("PATH", "MODE"), help=argparse.SUPPRESS)
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    if args.child:
+        child(args.child[0], args.child[1], args.repeat)
+        return
+
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for sensor in args.sensors:
+            path = os.path.join(tmp, f"{sensor}.jpg")
+            with open(path, "wb") as f:
+                f.write(synthetic_jpeg(*SENSORS[sensor], quality=95))
+            for mode in MODES:
+                out = subprocess.run(
+                    [sys.executable, "-m", "benchmarks.bench_decode", "--child", path, mode, "--repeat", str(args.repeat)],
+                    capture_output=True, text=True, check=True,
+                )
+                results.append({"sensor": sensor, "mode": mode, **json.loads(out.stdout)})
+    write_results("decode", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,80 @@
+"""
+인덱스 압축 벤치마크: 메모리 / 검색 시간 / 재현율 (float32 기준)
+CLIP 임베딩처럼 군집이 있는 단위 벡터를 합성해서 저장 방식별로 비교합니다.
+재현율은 float32 정확 검색 상위 k 개 중 몇 개를 찾았는지 (recall@k).
+
+실행:
+    python -m benchmarks.bench_index_compression --n 200000 --queries 200
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import percentile, write_results
+from photo_index import TournamentIndex, normalize_rows
+
+
+def synth_vectors(n, dim, clusters, rng):
+    """군집 중심 + 잡음으로 만든 단위 벡터 (n, dim)"""
+    centers = normalize_rows(rng.standard_normal((clusters, dim)))
+    assign = rng.integers(clusters, size=n)
+    return normalize_rows(centers[assign] + 0.6 * normalize_rows(rng.standard_normal((n, dim))))
+
+
+def build(storage, vectors, exact_dir, rerank):
+    exact_path = os.path.join(exact_dir, f"{storage}_{rerank}.f32") if storage != "float32" and rerank else None
+    index = TournamentIndex(dim=vectors.shape[1], storage=storage, exact_path=exact_path, rerank=rerank)
+    start = time.perf_counter()
+    for i, vec in enumerate(vectors):
+        index.add(i, vec)
+    index.merge()  # delta → base 압축/학습까지 포함
+    return index, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--n", type=int, default=100000, help="인덱스 벡터 수")
+    parser.add_argument("--dim", type=int, default=512)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--rerank", type=int, default=200, help="정확 재계산할 상위 후보 수 (0 이면 끔)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    vectors = synth_vectors(args.n, args.dim, clusters=max(16, args.n // 500), rng=rng)
+    # 쿼리: 인덱스 벡터에 잡음을 더한 것 (같은 주자의 다른 사진)
+    picks = rng.integers(args.n, size=args.queries)
+    queries = normalize_rows(vectors[picks] + 0.3 * normalize_rows(rng.standard_normal((args.queries, args.dim))))
+    truth = [set(np.argsort(-(vectors @ q))[:args.k].tolist()) for q in queries]
+
+    results = []
+    with tempfile.TemporaryDirectory() as exact_dir:
+        for storage in ("float32", "float16", "int8", "pq"):
+            for rerank in ((0,) if storage == "float32" else (0, args.rerank)):
+                index, build_sec = build(storage, vectors, exact_dir, rerank)
+                latencies, recalls = [], []
+                for q, relevant in zip(queries, truth):
+                    start = time.perf_counter()
+                    found = index.search(q, top_k=args.k)
+                    latencies.append(time.perf_counter() - start)
+                    recalls.append(len({pid for pid, _ in found} & relevant) / args.k)
+                results.append({
+                    "storage": storage,
+                    "rerank": rerank,
+                    "index_mb": round(index.nbytes / 2 ** 20, 2),
+                    "bytes_per_vector": round(index.nbytes / args.n, 1),
+                    "build_sec": round(build_sec, 2),
+                    "search_ms_p50": round(1000 * percentile(latencies, 50), 2),
+                    "search_ms_p99": round(1000 * percentile(latencies, 99), 2),
+                    f"recall@{args.k}": round(float(np.mean(recalls)), 4),
+                })
+    write_results("index_compression", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+인덱스 신선도 점검: 작가 업로드가 검색에 보이기까지 걸리는 시간
+base 인덱스를 만든 뒤, 업로드 스레드가 사진을 계속 추가하는 동안 검색 스레드가 방금 올라온 사진을
+자기 임베딩으로 검색해서 처음 1위로 나올 때까지의 시간을 잽니다. 백그라운드 병합이 도는 중에도
+추가/검색 지연이 튀지 않는지 함께 봅니다. 수치만 보고하며, 추가 즉시 검색에 보이는지는
+tests/test_photo_index.py 가 시간과 무관하게 확인합니다.
+
+실행:
+    python -m benchmarks.bench_index_freshness --photos 50000 --uploads 2000 --storage pq
+"""
+
+import argparse
+import queue
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.common import percentile, write_results
+from photo_index import TournamentIndex, normalize_rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=20000, help="미리 들어 있는 사진 수 (base)")
+    parser.add_argument("--uploads", type=int, default=500, help="벤치 중 추가할 사진 수")
+    parser.add_argument("--upload-rate", type=float, default=50.0, help="초당 업로드 수 (검색 스레드가 따라잡을 수 있는 속도)")
+    parser.add_argument("--storage", default="float16")
+    parser.add_argument("--merge-rows", type=int, default=256)
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dim = 512
+    index = TournamentIndex(dim=dim, storage=args.storage, merge_rows=args.merge_rows)
+    for i, vec in enumerate(rng.standard_normal((args.photos, dim))):
+        index.add(i, vec)
+    index.merge()
+
+    uploads = normalize_rows(rng.standard_normal((args.uploads, dim)))
+    added = queue.Queue()
+    add_ms, query_ms, visibility_ms = [], [], []
+
+    def uploader():
+        for k, vec in enumerate(uploads):
+            photo_id = args.photos + k
+            start = time.perf_counter()
+            index.add(photo_id, vec)
+            add_ms.append(1000 * (time.perf_counter() - start))
+            added.put((photo_id, vec, start))
+            time.sleep(1 / args.upload_rate)
+        added.put(None)
+
+    def searcher():
+        while (item := added.get()) is not None:
+            photo_id, vec, added_at = item
+            while True:
+                start = time.perf_counter()
+                top = index.search(vec, top_k=1)
+                query_ms.append(1000 * (time.perf_counter() - start))
+                if top and top[0][0] == photo_id:
+                    visibility_ms.append(1000 * (time.perf_counter() - added_at))
+                    break
+                if time.perf_counter() - added_at > 10:
+                    visibility_ms.append(float("inf"))
+                    break
+
+    threads = [threading.Thread(target=uploader), threading.Thread(target=searcher)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    results = {
+        "storage": args.storage,
+        "base_photos": args.photos,
+        "uploads": args.uploads,
+        "visibility_p50_ms": round(percentile(visibility_ms, 50), 2),
+        "visibility_max_ms": round(max(visibility_ms), 2),
+        "add_p99_ms": round(percentile(add_ms, 99), 3),
+        "query_p50_ms": round(percentile(query_ms, 50), 2),
+        "query_p99_ms": round(percentile(query_ms, 99), 2),
+        "delta_rows_at_end": index.delta_rows,
+    }
+    write_results("index_freshness", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
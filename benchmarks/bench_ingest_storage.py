@@ -0,0 +1,82 @@
+"""
+작가 업로드 저장 방식 비교: 원본 재인코딩 vs 원본 바이트 그대로 저장(pass-through)
+사진 1,000장 기준 CPU 시간과 보관 용량을 비교합니다 (썸네일/미리보기 생성 포함, CLIP 추론은 제외).
+    reencode_jpeg : 예전 v3 - 디코딩 → 전체 해상도 JPEG q90 재인코딩(판매/표시 겸용) + 썸네일
+    reencode_png  : 예전 true_similar_v2 - 디코딩 → PNG 재저장
+    passthrough   : photo_store.save_original + 축소 디코딩(reduced_rgb)한 이미지로 썸네일/미리보기 생성
+original_gb 는 판매용 원본으로 보관하는 바이트, display_gb 는 목록/상세 보기용으로 메모리에 두는 바이트입니다.
+
+실행:
+    python -m benchmarks.bench_ingest_storage --photos 50 --width 6000 --height 4000
+"""
+
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from PIL import Image
+
+from benchmarks.common import synthetic_jpeg, write_results
+from photo_store import save_original, reduced_rgb, make_derivatives
+
+
+def ingest_reencode(data, name, store_dir, fmt):
+    img = Image.open(io.BytesIO(data)).convert("RGB")
+    thumb = img.copy()
+    thumb.thumbnail((150, 150))
+    thumb.save(io.BytesIO(), format="JPEG", quality=70)
+    buf = io.BytesIO()
+    if fmt == "PNG":
+        img.save(buf, format="PNG")
+    else:
+        img.save(buf, format="JPEG", quality=90)
+    path = os.path.join(store_dir, f"{name}.{fmt.lower()}")
+    with open(path, "wb") as f:
+        f.write(buf.getvalue())
+    return len(buf.getvalue()), len(buf.getvalue())
+
+
+def ingest_passthrough(data, name, store_dir):
+    save_original(data, name + ".jpg", store_dir)
+    _, preview = make_derivatives(reduced_rgb(Image.open(io.BytesIO(data))))
+    return len(data), len(preview)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=30)
+    parser.add_argument("--width", type=int, default=6000)
+    parser.add_argument("--height", type=int, default=4000)
+    parser.add_argument("--quality", type=int, default=95, help="업로드 JPEG 품질 (카메라 기본값 수준)")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    uploads = [synthetic_jpeg(args.width, args.height, seed=i, quality=args.quality) for i in range(args.photos)]
+    modes = {
+        "reencode_jpeg": lambda data, name, d: ingest_reencode(data, name, d, "JPEG"),
+        "reencode_png": lambda data, name, d: ingest_reencode(data, name, d, "PNG"),
+        "passthrough": ingest_passthrough,
+    }
+
+    results = []
+    for mode, fn in modes.items():
+        with tempfile.TemporaryDirectory() as store_dir:
+            cpu_start, wall_start = time.process_time(), time.perf_counter()
+            sizes = [fn(data, f"photo{i}", store_dir) for i, data in enumerate(uploads)]
+            cpu, wall = time.process_time() - cpu_start, time.perf_counter() - wall_start
+        scale = 1000 / len(uploads)
+        results.append({
+            "mode": mode,
+            "cpu_sec_per_1000": round(cpu * scale, 1),
+            "wall_sec_per_1000": round(wall * scale, 1),
+            "original_gb_per_1000": round(sum(s[0] for s in sizes) * scale / 1e9, 3),
+            "display_gb_per_1000": round(sum(s[1] for s in sizes) * scale / 1e9, 3),
+            "upload_gb_per_1000": round(sum(map(len, uploads)) * scale / 1e9, 3),
+        })
+    write_results("ingest_storage", {"resolution": f"{args.width}x{args.height}", "modes": results}, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+인물 크롭 임베딩 벤치마크: 수집 비용 vs 재현율
+라벨이 달린 로컬 샘플셋으로 '전체 프레임 1벡터' 와 '전체 + 인물 크롭 다중 벡터' 를 비교합니다.
+
+샘플셋 구조:
+    DIR/photos/*.jpg      작가 사진
+    DIR/queries/*.jpg     주자 셀카(쿼리)
+    DIR/labels.json       {"쿼리 파일명": ["정답 사진 파일명", ...]}
+
+실행:
+    python -m benchmarks.bench_person_crops --data samples/crowd --k 10
+"""
+
+import argparse
+import json
+import os
+import time
+
+from PIL import Image
+
+from benchmarks.common import load_clip, write_results
+from person_crops import get_multi_crop_embeddings
+from photo_index import TournamentIndex
+
+
+def run_mode(mode, photo_paths, query_embs, labels, k, encoder):
+    index = TournamentIndex()
+    vectors = 0
+    start = time.perf_counter()
+    for path in photo_paths:
+        image = Image.open(path).convert("RGB")
+        if mode == "whole":
+            emb = encoder.encode_images([image])
+        else:
+            emb, _ = get_multi_crop_embeddings(image, encoder)
+        index.add(os.path.basename(path), emb)
+        vectors += len(emb)
+    ingest_sec = time.perf_counter() - start
+
+    recalls = []
+    for query_name, relevant in labels.items():
+        found = {photo_id for photo_id, _ in index.search(query_embs[query_name], top_k=k)}
+        recalls.append(len(found & set(relevant)) / len(relevant) if relevant else 1.0)
+
+    return {
+        "mode": mode,
+        "photos": len(photo_paths),
+        "vectors": vectors,
+        "ingest_sec_total": round(ingest_sec, 3),
+        "ingest_ms_per_photo": round(1000 * ingest_sec / max(1, len(photo_paths)), 2),
+        f"recall@{k}": round(sum(recalls) / max(1, len(recalls)), 4),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data", required=True, help="라벨 샘플셋 디렉터리")
+    parser.add_argument("--k", type=int, default=10, help="recall@k 의 k")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    with open(os.path.join(args.data, "labels.json"), encoding="utf-8") as f:
+        labels = json.load(f)
+    photo_dir = os.path.join(args.data, "photos")
+    photo_paths = sorted(
+        os.path.join(photo_dir, name) for name in os.listdir(photo_dir)
+        if name.lower().endswith((".jpg", ".jpeg", ".png"))
+    )
+
+    encoder = load_clip()
+    query_embs = {
+        name: encoder.encode_images([Image.open(os.path.join(args.data, "queries", name))])
+        for name in labels
+    }
+
+    results = [
+        run_mode(mode, photo_paths, query_embs, labels, args.k, encoder)
+        for mode in ("whole", "multi_crop")
+    ]
+    write_results("person_crops", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
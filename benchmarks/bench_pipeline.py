@@ -0,0 +1,152 @@
+"""
+사진 검색 파이프라인 전체 벤치마크 (Streamlit 없이)
+로컬에서 만든 합성 데이터로 photo_pipeline / photo_index 의 UI 없는 함수들을 단계별로 돌리고 JSON 으로 보고합니다.
+    gpx_load   : load_gpx_coords
+    exif_parse : extract_exif_data + safe_parse_time
+    ingest     : prepare_upload (원본 저장 → 축소 디코딩 → 임베딩/인물 크롭 → 해시 → 썸네일/미리보기)
+    thumbnail  : make_derivatives 만 따로
+    embedding  : encoder.encode_images (작업 해상도 이미지 1장)
+    search     : TournamentIndex.search (업로드 사진 + --index-photos 개의 임의 벡터)
+    map_html   : create_course_map_with_photos → HTML 렌더링
+    zip_export : create_zip_of_photos (상위 --zip-photos 장 원본)
+--baseline 으로 이전 실행 결과(JSON)를 주면 단계별 p50 이 --tolerance 이상 느려졌을 때 실패로 종료합니다.
+
+실행:
+    python -m benchmarks.bench_pipeline --photos 200 --index-photos 100000 --out results/pipeline.json
+    python -m benchmarks.bench_pipeline --photos 200 --baseline results/pipeline.json
+"""
+
+import argparse
+import io
+import json
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.common import SyntheticEncoder, load_clip, percentile, synthetic_jpeg, write_results
+from photo_index import TournamentIndex
+from photo_pipeline import (load_gpx_coords, extract_exif_data, safe_parse_time, prepare_upload,
+                            create_course_map_with_photos, create_zip_of_photos)
+from photo_store import make_derivatives
+
+GPX_PATH = "data/2025_JTBC.gpx"
+TOURNAMENT = "JTBC 마라톤"
+
+
+class StageTimer:
+    """단계별 호출 시간 기록"""
+
+    def __init__(self):
+        self.samples = {}
+
+    def run(self, stage, fn, *args, **kwargs):
+        start = time.perf_counter()
+        result = fn(*args, **kwargs)
+        self.samples.setdefault(stage, []).append(time.perf_counter() - start)
+        return result
+
+    def summary(self):
+        return {
+            stage: {
+                "count": len(times),
+                "total_s": round(sum(times), 3),
+                "p50_ms": round(1000 * percentile(times, 50), 3),
+                "p95_ms": round(1000 * percentile(times, 95), 3),
+            }
+            for stage, times in self.samples.items()
+        }
+
+
+def compare(stages, baseline_path, tolerance):
+    """기준 결과보다 p50 이 tolerance 비율 이상 느려진 단계 목록"""
+    with open(baseline_path, encoding="utf-8") as f:
+        baseline = json.load(f)["results"]["stages"]
+    regressions = []
+    for stage, row in stages.items():
+        old = baseline.get(stage)
+        if old and old["p50_ms"] > 0 and row["p50_ms"] > old["p50_ms"] * (1 + tolerance):
+            regressions.append({"stage": stage, "baseline_p50_ms": old["p50_ms"], "p50_ms": row["p50_ms"],
+                                "ratio": round(row["p50_ms"] / old["p50_ms"], 2)})
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--photos", type=int, default=100, help="작가 업로드 사진 수")
+    parser.add_argument("--width", type=int, default=3000)
+    parser.add_argument("--height", type=int, default=2000)
+    parser.add_argument("--index-photos", type=int, default=20000, help="검색 인덱스에 더 넣을 임의 벡터 수")
+    parser.add_argument("--queries", type=int, default=50)
+    parser.add_argument("--zip-photos", type=int, default=20)
+    parser.add_argument("--encoder", choices=["synthetic", "clip"], default="synthetic")
+    parser.add_argument("--gpx", default=GPX_PATH)
+    parser.add_argument("--baseline", help="비교할 이전 결과 JSON")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="허용 p50 증가 비율")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    encoder = SyntheticEncoder() if args.encoder == "synthetic" else load_clip()
+    timer = StageTimer()
+    rng = np.random.default_rng(0)
+
+    for _ in range(5):
+        coords = timer.run("gpx_load", load_gpx_coords, args.gpx)
+    start_time = datetime(2025, 11, 2, 8, 0, 0)
+    uploads = [
+        synthetic_jpeg(args.width, args.height, seed=i, quality=95, taken_at=start_time + timedelta(seconds=7 * i))
+        for i in range(args.photos)
+    ]
+
+    index = TournamentIndex(storage="float16")
+    photos = []
+    with tempfile.TemporaryDirectory() as store_dir:
+        for i, data in enumerate(uploads):
+            timer.run("exif_parse", lambda: safe_parse_time(extract_exif_data(Image.open(io.BytesIO(data)))))
+            latlon = coords[rng.integers(len(coords))]
+            photo, crop_embs, img = timer.run("ingest", prepare_upload, data, f"photo{i}.jpg", TOURNAMENT, latlon,
+                                              encoder, store_dir)
+            timer.run("thumbnail", make_derivatives, img)
+            timer.run("embedding", encoder.encode_images, [img])
+            del photo["embedding"]
+            index.add(photo["id"], crop_embs)
+            photos.append(photo)
+
+        for i, vec in enumerate(rng.standard_normal((args.index_photos, index.dim)).astype(np.float32)):
+            index.add(f"extra{i}", vec)
+        index.merge()
+
+        for _ in range(args.queries):
+            timer.run("search", index.search, rng.standard_normal(index.dim), top_k=50)
+        # 지도/ZIP 은 업로드 사진 중 상위 결과를 사용 (임의 벡터는 사진 정보가 없음)
+        for p in photos:
+            p["similarity"] = float(rng.uniform(70, 99))
+        shown = photos[:50]
+        for _ in range(5):
+            timer.run("map_html", lambda: create_course_map_with_photos(coords, shown).get_root().render())
+        for _ in range(5):
+            archive = timer.run("zip_export", create_zip_of_photos, photos[:args.zip_photos])
+
+    stages = timer.summary()
+    results = {
+        "photos": args.photos,
+        "resolution": f"{args.width}x{args.height}",
+        "index_photos": len(index),
+        "encoder": args.encoder,
+        "zip_mb": round(len(archive) / 1e6, 1),
+        "stages": stages,
+    }
+    regressions = compare(stages, args.baseline, args.tolerance) if args.baseline else []
+    if args.baseline:
+        results["baseline"] = args.baseline
+        results["regressions"] = regressions
+    write_results("pipeline", results, args.out)
+    if regressions:
+        sys.exit(f"성능 저하: {', '.join(r['stage'] for r in regressions)}")
+
+
+if __name__ == "__main__":
+    main()
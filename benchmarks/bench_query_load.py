@@ -0,0 +1,92 @@
+"""
+동시 검색 부하 테스트: QueryBatcher(마이크로 배치) vs 요청별 개별 처리
+동시 사용자 수별로 p50/p99 지연과 처리량(QPS)을 보고합니다.
+
+기본 인코더는 합성 인코더입니다 (배치당 고정 비용 + 장당 비용을 sleep 으로 흉내 내고,
+장치 하나를 여러 요청이 나눠 쓰는 상황을 락으로 재현). --encoder clip 이면 실제 CLIP 을 씁니다.
+
+실행:
+    python -m benchmarks.bench_query_load --photos 50000 --concurrency 1 8 32 128
+    python -m benchmarks.bench_query_load --encoder clip --concurrency 1 4 16
+"""
+
+import argparse
+import threading
+import time
+
+import numpy as np
+from PIL import Image
+
+from benchmarks.common import SyntheticEncoder, load_clip, percentile, write_results
+from photo_index import TournamentIndex
+from query_batcher import QueryBatcher
+
+
+def run_level(concurrency, requests_per_client, search_fn, images):
+    latencies = []
+    lock = threading.Lock()
+
+    def client():
+        local = []
+        for _ in range(requests_per_client):
+            start = time.perf_counter()
+            search_fn(images)
+            local.append(time.perf_counter() - start)
+        with lock:
+            latencies.extend(local)
+
+    threads = [threading.Thread(target=client) for _ in range(concurrency)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - start
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "p50_ms": round(1000 * percentile(latencies, 50), 1),
+        "p99_ms": round(1000 * percentile(latencies, 99), 1),
+        "throughput_qps": round(len(latencies) / wall, 1),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--encoder", choices=["synthetic", "clip"], default="synthetic")
+    parser.add_argument("--photos", type=int, default=20000, help="대회 인덱스의 사진 수")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64])
+    parser.add_argument("--requests-per-client", type=int, default=10)
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    encoder = SyntheticEncoder() if args.encoder == "synthetic" else load_clip()
+    rng = np.random.default_rng(1)
+    index = TournamentIndex()
+    for i in range(args.photos):
+        index.add(i, rng.standard_normal(512))
+    index.merge()  # 대기 목록/delta 를 base 행렬로 합쳐 둠
+    images = [Image.fromarray(rng.integers(0, 255, (224, 224, 3), dtype=np.uint8))]
+
+    batcher = QueryBatcher(encoder, max_batch=args.max_batch, max_wait_ms=args.max_wait_ms)
+
+    def unbatched(query_images):
+        return index.search(encoder.encode_images(query_images), threshold=0.7)
+
+    def batched(query_images):
+        return batcher.search(index, query_images, threshold=0.7)
+
+    results = []
+    for mode, fn in (("unbatched", unbatched), ("batched", batched)):
+        for level in args.concurrency:
+            row = run_level(level, args.requests_per_client, fn, images)
+            row["mode"] = mode
+            results.append(row)
+    results.append({"mode": "batched", "mean_batch_size": round(batcher.mean_batch_size, 2)})
+    write_results("query_load", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
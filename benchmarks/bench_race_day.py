@@ -0,0 +1,77 @@
+"""
+대회 당일 규모 벤치마크 (race_dataset.py 로 만든 합성 데이터셋 사용, 오프라인)
+저장 방식별로 전체 사진을 TournamentIndex 에 대량 적재하고
+적재 시간 / 인덱스 메모리 / 셀카 쿼리 지연 / 재현율(정답 사진 중 상위 k 안에 든 비율)을 보고합니다.
+
+실행:
+    python -m benchmarks.race_dataset --photos 1000000 --out datasets/jtbc_1m
+    python -m benchmarks.bench_race_day --dataset datasets/jtbc_1m --storage float16 int8 pq
+"""
+
+import argparse
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from benchmarks.common import percentile, write_results
+from benchmarks.race_dataset import RaceDataset
+from photo_index import TournamentIndex
+
+
+def recall_at_k(found, truth):
+    if len(truth) == 0:
+        return 1.0
+    return len(set(found) & set(truth.tolist())) / len(truth)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--dataset", required=True, help="race_dataset.py 출력 디렉터리")
+    parser.add_argument("--storage", nargs="+", default=["float16", "int8"])
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--top-k", type=int, default=100)
+    parser.add_argument("--chunk", type=int, default=200000, help="대량 적재 청크 크기")
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    ds = RaceDataset(args.dataset)
+    n_queries = min(args.queries, len(ds.queries))
+    queries = np.asarray(ds.queries[:n_queries])
+    print(f"사진 {len(ds):,}장, 주자 {ds.manifest['runners']:,}명, 작가 {ds.manifest['photographers']}명, 쿼리 {n_queries}개")
+
+    results = []
+    with tempfile.TemporaryDirectory() as exact_dir:
+        for storage in args.storage:
+            exact_path = os.path.join(exact_dir, f"{storage}.f32") if storage != "float32" else None
+            index = TournamentIndex(dim=ds.manifest["dim"], storage=storage, exact_path=exact_path,
+                                    background_merge=False)
+            start = time.perf_counter()
+            ds.load_into(index, chunk=args.chunk)
+            load_s = time.perf_counter() - start
+
+            latencies, recalls = [], []
+            for q in range(n_queries):
+                start = time.perf_counter()
+                found = index.search(queries[q:q + 1], top_k=args.top_k)
+                latencies.append(time.perf_counter() - start)
+                truth = ds.truth_for(q)
+                recalls.append(recall_at_k([pid for pid, _ in found], truth[:args.top_k]))
+
+            results.append({
+                "storage": storage,
+                "photos": len(index),
+                "load_s": round(load_s, 2),
+                "load_photos_per_s": round(len(index) / load_s),
+                "index_mb": round(index.nbytes / 2 ** 20, 1),
+                "p50_ms": round(1000 * percentile(latencies, 50), 2),
+                "p99_ms": round(1000 * percentile(latencies, 99), 2),
+                f"recall@{args.top_k}": round(float(np.mean(recalls)), 4),
+            })
+            del index
+    write_results("race_day", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,62 @@
+"""
+콜드 스타트 벤치마크: 새 파이썬 프로세스에서 앱 첫 화면(이용자 모드 대회 선택)이 그려질 때까지의 시간
+무거운 모듈(torch/transformers/folium/cv2)을 첫 화면 전에 import 하지 않는지도 함께 확인합니다.
+자식 프로세스는 APP_WARMUP=0 으로 띄웁니다 (예열 스레드가 같은 프로세스에서 import 하면 확인 결과가 타이밍에 따라 달라짐).
+
+실행:
+    python -m benchmarks.bench_startup --runs 5
+"""
+
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+from benchmarks.common import percentile, write_results
+
+# 자식 프로세스에서 실행: AppTest 로 스크립트를 한 번 돌리고 걸린 시간과 로드된 무거운 모듈을 출력
+CHILD = r"""
+import json, sys, time
+start = time.perf_counter()
+from streamlit.testing.v1 import AppTest
+import_s = time.perf_counter() - start
+at = AppTest.from_file({app!r}, default_timeout=60)
+at.session_state["mode"] = "🔍 이용자 모드"
+at.run()
+first_paint_s = time.perf_counter() - start
+heavy = [m for m in {heavy!r} if m in sys.modules]
+print(json.dumps({{"streamlit_import_s": import_s, "first_paint_s": first_paint_s,
+                  "exceptions": len(at.exception), "heavy_loaded_before_paint": heavy}}))
+"""
+
+
+def run_once(app):
+    from lazy_imports import HEAVY_MODULES
+
+    code = CHILD.format(app=app, heavy=list(HEAVY_MODULES))
+    env = {**os.environ, "APP_WARMUP": "0"}
+    out = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True, env=env)
+    return json.loads(out.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--app", default="v3_claude_gemini.py")
+    parser.add_argument("--runs", type=int, default=3)
+    parser.add_argument("--out", help="결과 JSON 저장 경로")
+    args = parser.parse_args()
+
+    runs = [run_once(args.app) for _ in range(args.runs)]
+    paint = [r["first_paint_s"] for r in runs]
+    results = {
+        "app": args.app,
+        "runs": runs,
+        "first_paint_p50_s": round(percentile(paint, 50), 3),
+        "first_paint_max_s": round(max(paint), 3),
+    }
+    write_results("startup", results, args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+벤치마크 공용 도우미
+"""
+
+import io
+import json
+import platform
+import sys
+import threading
+import time
+from datetime import datetime
+
+import numpy as np
+from PIL import Image
+
+EXIF_DATETIME = 0x0132
+
+
+def load_clip():
+    """Streamlit 캐시 없이 CLIP 인코더 로드 (CLIP_SERVER 가 있으면 공유 모델 서버 사용)"""
+    from clip_model import load_local_encoder
+    from model_server import default_client
+
+    return default_client() or load_local_encoder()
+
+
+class SyntheticEncoder:
+    """배치 크기에 따른 추론 비용을 흉내 내는 인코더 (장치 1개 → 한 번에 한 배치만)"""
+
+    def __init__(self, dim=512, base_ms=20.0, per_item_ms=1.0):
+        self.dim = dim
+        self.base = base_ms / 1000
+        self.per_item = per_item_ms / 1000
+        self._device = threading.Lock()
+        self._rng = np.random.default_rng(0)
+
+    def encode_images(self, images):
+        with self._device:
+            time.sleep(self.base + self.per_item * len(images))
+            return self._rng.standard_normal((len(images), self.dim)).astype(np.float32)
+
+    def encode_texts(self, texts):
+        return self.encode_images(texts)
+
+
+def percentile(values, q):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    idx = min(len(ordered) - 1, int(round(q / 100 * (len(ordered) - 1))))
+    return ordered[idx]
+
+
+def synthetic_jpeg(width, height, seed=0, quality=92, taken_at=None):
+    """
+    카메라 JPEG 비슷한 바이트 (완만한 색 변화 + 잔 노이즈 - 순수 노이즈보다 실제 사진에 가까운 압축률).
+    taken_at (datetime) 을 주면 EXIF DateTime 으로 넣습니다.
+    """
+    rng = np.random.default_rng(seed)
+    coarse = Image.fromarray(rng.integers(0, 255, (12, 18, 3), dtype=np.uint8)).resize((width, height), Image.BICUBIC)
+    pixels = np.asarray(coarse, dtype=np.int16) + rng.integers(-12, 12, (height, width, 1), dtype=np.int16)
+    exif = Image.Exif()
+    if taken_at is not None:
+        exif[EXIF_DATETIME] = taken_at.strftime("%Y:%m:%d %H:%M:%S")
+    buf = io.BytesIO()
+    Image.fromarray(np.clip(pixels, 0, 255).astype(np.uint8)).save(buf, format="JPEG", quality=quality, exif=exif)
+    return buf.getvalue()
+
+
+def write_results(name, results, out_path=None):
+    """결과를 실행 환경 정보와 함께 JSON 으로 출력 (out_path 가 있으면 파일로 저장)"""
+    payload = {
+        "benchmark": name,
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "results": results,
+    }
+    text = json.dumps(payload, ensure_ascii=False, indent=2)
+    if out_path:
+        with open(out_path, "w", encoding="utf-8") as f:
+            f.write(text)
+    print(text)
+    return payload
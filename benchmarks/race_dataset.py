@@ -0,0 +1,311 @@
+"""
+대회 당일 합성 데이터셋 생성기 (부하/규모 테스트용)
+data/*.gpx 코스를 따라 고정 위치의 작가 N명을 세우고, 페이스가 제각각인 주자들이 지나갈 때
+작가가 찍은 사진(시각, 위치, 연사, 한 컷에 찍힌 주자들)과 사진 임베딩을 만듭니다.
+주자 셀카 쿼리와 정답(그 주자가 찍힌 사진 목록)도 함께 만들어서 재현율을 잴 수 있습니다.
+
+임베딩은 실제 CLIP 대신 "주자 정체성 벡터 + 작가 위치(배경) 벡터 + 잡음" 으로 만듭니다.
+같은 주자가 찍힌 사진끼리 가깝고, 같은 작가의 사진끼리 배경이 비슷한 구조만 흉내 냅니다.
+--images K 를 주면 앞 K 장은 EXIF 촬영 시각이 들어간 절차적 JPEG 도 씁니다 (파이프라인 벤치용).
+
+디스크 형식 (디렉터리, 모두 numpy 로 바로 memmap/적재 가능):
+    manifest.json          개수, 차원, 코스, 시드, 파일 목록
+    photos.npy             구조체 배열 (photo_id, photographer, time, lat, lon, burst)
+    embeddings.f16         (photos, dim) float16 원시 배열 - np.memmap 으로 읽음
+    photo_runners.npy      사진별 찍힌 주자 (CSR: photo_runner_offsets.npy 와 함께)
+    runners.npy            구조체 배열 (runner_id, bib, pace, start, fatigue)
+    photographers.npy      구조체 배열 (photographer, km, lat, lon)
+    queries.npy            (queries, dim) float32 셀카 임베딩, query_runners.npy 는 각 쿼리의 주자
+    truth.npy              쿼리별 정답 photo_id (CSR: truth_offsets.npy 와 함께)
+
+실행:
+    python -m benchmarks.race_dataset --gpx data/2025_JTBC.gpx --photos 1000000 --out datasets/jtbc_1m
+    python -m benchmarks.race_dataset --photos 2000 --images 200 --out datasets/small
+"""
+
+import argparse
+import json
+import os
+from datetime import datetime, timedelta
+
+import numpy as np
+
+from photo_pipeline import load_gpx_coords
+
+DIM = 512
+RACE_START = datetime(2025, 11, 2, 8, 0, 0)
+EARTH_RADIUS_M = 6371000.0
+
+MEAN_PACE_SEC = 330.0      # 평균 5분 30초/km
+PACE_SIGMA = 0.18          # 로그정규 분산 (대략 3:50 ~ 8:00/km)
+WAVES = 4                  # 출발 그룹 수 (그룹 간 10분)
+MEAN_BURST = 2.0           # 한 번 찍을 때 평균 연사 장수
+BURST_GAP_SEC = 0.3
+GROUP_WINDOW_SEC = 1.0     # 이 시간 안에 지나간 주자는 같은 컷에 함께 찍힘
+MAX_IN_FRAME = 4
+
+# 임베딩 구성 비중
+PRIMARY_WEIGHT = 1.0
+COMPANION_WEIGHT = 0.6
+BACKGROUND_WEIGHT = 0.5
+SHOT_NOISE = 0.35
+SELFIE_NOISE = 0.6
+
+PHOTO_DTYPE = np.dtype([("photo_id", "i8"), ("photographer", "i4"), ("time", "f8"),
+                        ("lat", "f8"), ("lon", "f8"), ("burst", "i8")])
+RUNNER_DTYPE = np.dtype([("runner_id", "i4"), ("bib", "i4"), ("pace", "f4"), ("start", "f4"), ("fatigue", "f4")])
+PHOTOGRAPHER_DTYPE = np.dtype([("photographer", "i4"), ("km", "f4"), ("lat", "f8"), ("lon", "f8")])
+
+
+def _unit_rows(x):
+    return x / np.linalg.norm(x, axis=1, keepdims=True)
+
+
+# ==================================================
+# 코스 / 주자 / 작가
+# ==================================================
+def course_distances(coords):
+    """GPX 점마다 출발점부터의 누적 거리 (m)"""
+    lat, lon = np.radians(np.asarray(coords, dtype=np.float64)).T
+    a = np.sin(np.diff(lat) / 2) ** 2 + np.cos(lat[:-1]) * np.cos(lat[1:]) * np.sin(np.diff(lon) / 2) ** 2
+    return np.concatenate([[0.0], np.cumsum(2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a)))])
+
+
+def point_at(coords, cumdist, meters):
+    coords = np.asarray(coords, dtype=np.float64)
+    return np.interp(meters, cumdist, coords[:, 0]), np.interp(meters, cumdist, coords[:, 1])
+
+
+def make_runners(n, rng):
+    """주자별 기본 페이스(초/km), 출발 시각(초), 후반 지침 정도"""
+    runners = np.zeros(n, dtype=RUNNER_DTYPE)
+    runners["runner_id"] = np.arange(n)
+    runners["bib"] = rng.choice(np.arange(1000, 1000 + 10 * n), size=n, replace=False)
+    runners["pace"] = np.clip(MEAN_PACE_SEC * np.exp(rng.normal(0, PACE_SIGMA, n)), 180, 540)
+    runners["start"] = rng.integers(0, WAVES, n) * 600 + rng.uniform(0, 300, n)
+    runners["fatigue"] = rng.uniform(0, 0.15, n)
+    return runners
+
+
+def pass_times(runners, meters, total):
+    """
+    주자들이 거리 meters 지점을 지나는 시각 (출발 기준 초).
+    페이스는 뒤로 갈수록 (1 + fatigue * (d / total)^2) 배로 느려짐 → 적분하면 아래 식.
+    """
+    km = meters / 1000
+    total_km = total / 1000
+    return runners["start"] + runners["pace"] * (km + runners["fatigue"] * km ** 3 / (3 * total_km ** 2))
+
+
+def make_photographers(n, coords, cumdist, rng):
+    photographers = np.zeros(n, dtype=PHOTOGRAPHER_DTYPE)
+    meters = np.sort(rng.uniform(500, cumdist[-1] - 100, n))
+    photographers["photographer"] = np.arange(n)
+    photographers["km"] = meters / 1000
+    photographers["lat"], photographers["lon"] = point_at(coords, cumdist, meters)
+    return photographers
+
+
+# ==================================================
+# 사진
+# ==================================================
+def make_shots(photographers, runners, total, target_photos, rng):
+    """
+    작가별로 지나가는 주자를 확률적으로 찍음. 반환: (shots 리스트, 촬영 확률)
+    shot = (작가, 시각, 같은 컷의 주자 배열 - 첫 번째가 주인공)
+    """
+    capture = min(1.0, target_photos / (len(photographers) * len(runners) * MEAN_BURST))
+    photographer_col, time_col, frames = [], [], []
+    for ph in photographers:
+        t = pass_times(runners, ph["km"] * 1000, total)
+        order = np.argsort(t)
+        t_sorted = t[order]
+        picked = np.flatnonzero(rng.random(len(runners)) < capture)
+        # 같은 컷: 주인공 바로 뒤에 GROUP_WINDOW_SEC 안으로 지나간 주자 최대 MAX_IN_FRAME-1 명
+        members = [order[picked]]
+        for k in range(1, MAX_IN_FRAME):
+            nxt = np.minimum(picked + k, len(order) - 1)
+            ok = (picked + k < len(order)) & (t_sorted[nxt] - t_sorted[picked] < GROUP_WINDOW_SEC)
+            members.append(np.where(ok, order[nxt], -1))
+        photographer_col.append(np.full(len(picked), ph["photographer"], dtype=np.int32))
+        time_col.append(t_sorted[picked])
+        frames.append(np.stack(members, axis=1))
+    return np.concatenate(photographer_col), np.concatenate(time_col), np.concatenate(frames), capture
+
+
+def expand_bursts(shot_photographer, shot_time, shot_frames, rng):
+    """연사 장수(1 + 포아송)만큼 사진을 늘림. 반환: (photo 배열, 사진별 frame 행 번호)"""
+    burst_len = 1 + np.minimum(rng.poisson(MEAN_BURST - 1, len(shot_time)), 4)
+    shot_of_photo = np.repeat(np.arange(len(shot_time)), burst_len)
+    within = np.arange(len(shot_of_photo)) - np.repeat(np.cumsum(burst_len) - burst_len, burst_len)
+
+    photos = np.zeros(len(shot_of_photo), dtype=PHOTO_DTYPE)
+    photos["photo_id"] = np.arange(len(photos))
+    photos["photographer"] = shot_photographer[shot_of_photo]
+    photos["time"] = shot_time[shot_of_photo] + within * BURST_GAP_SEC
+    photos["burst"] = shot_of_photo
+    order = np.argsort(photos["time"], kind="stable")  # 업로드는 대략 촬영 순서
+    photos, shot_of_photo = photos[order], shot_of_photo[order]
+    photos["photo_id"] = np.arange(len(photos))
+    return photos, shot_of_photo
+
+
+def frames_to_csr(frames):
+    """(사진, MAX_IN_FRAME) 주자 배열 (-1 은 빈칸) → (offsets, runner_ids)"""
+    valid = frames >= 0
+    offsets = np.concatenate([[0], np.cumsum(valid.sum(axis=1))]).astype(np.int64)
+    return offsets, frames[valid].astype(np.int32)
+
+
+def write_embeddings(path, photos, photo_frames, identities, backgrounds, rng, chunk=100000):
+    """사진 임베딩 = 주인공 + 함께 찍힌 주자 + 작가 위치 배경 + 컷별 잡음 (float16 으로 저장)"""
+    mm = np.memmap(path, mode="w+", dtype=np.float16, shape=(len(photos), DIM))
+    weights = np.array([PRIMARY_WEIGHT] + [COMPANION_WEIGHT] * (MAX_IN_FRAME - 1), dtype=np.float32)
+    for start in range(0, len(photos), chunk):
+        frames = photo_frames[start:start + chunk]
+        vecs = np.einsum("nk,nkd->nd", (frames >= 0) * weights, identities[np.maximum(frames, 0)])
+        vecs += BACKGROUND_WEIGHT * backgrounds[photos["photographer"][start:start + chunk]]
+        vecs += SHOT_NOISE * _unit_rows(rng.standard_normal((len(frames), DIM)).astype(np.float32))
+        mm[start:start + chunk] = _unit_rows(vecs).astype(np.float16)
+    mm.flush()
+
+
+def runner_photo_truth(offsets, runner_ids, query_runners):
+    """쿼리 주자별 찍힌 photo_id 목록 (CSR)"""
+    photo_of_entry = np.repeat(np.arange(len(offsets) - 1), np.diff(offsets))
+    order = np.argsort(runner_ids, kind="stable")
+    sorted_runners = runner_ids[order]
+    lo = np.searchsorted(sorted_runners, query_runners, side="left")
+    hi = np.searchsorted(sorted_runners, query_runners, side="right")
+    truth = [np.unique(photo_of_entry[order[a:b]]) for a, b in zip(lo, hi)]
+    truth_offsets = np.concatenate([[0], np.cumsum([len(t) for t in truth])]).astype(np.int64)
+    truth_ids = np.concatenate(truth) if truth else np.empty(0, dtype=np.int64)
+    return truth_offsets, truth_ids.astype(np.int64)
+
+
+def write_images(out_dir, photos, count, width, height):
+    from benchmarks.common import synthetic_jpeg
+
+    image_dir = os.path.join(out_dir, "images")
+    os.makedirs(image_dir, exist_ok=True)
+    for photo in photos[:count]:
+        taken_at = RACE_START + timedelta(seconds=float(photo["time"]))
+        with open(os.path.join(image_dir, f"{photo['photo_id']}.jpg"), "wb") as f:
+            f.write(synthetic_jpeg(width, height, seed=int(photo["photo_id"]), quality=95, taken_at=taken_at))
+
+
+# ==================================================
+# 생성 / 읽기
+# ==================================================
+def generate(out_dir, gpx, photos_target, photographers_n, runners_n, queries_n, seed=0,
+             images=0, image_size=(3000, 2000)):
+    rng = np.random.default_rng(seed)
+    coords = load_gpx_coords(gpx)
+    if not coords:
+        raise ValueError(f"GPX 를 읽을 수 없습니다: {gpx}")
+    cumdist = course_distances(coords)
+    os.makedirs(out_dir, exist_ok=True)
+
+    runners = make_runners(runners_n, rng)
+    photographers = make_photographers(photographers_n, coords, cumdist, rng)
+    shot_ph, shot_time, shot_frames, capture = make_shots(photographers, runners, cumdist[-1], photos_target, rng)
+    photos, shot_of_photo = expand_bursts(shot_ph, shot_time, shot_frames, rng)
+    photos["lat"] = photographers["lat"][photos["photographer"]]
+    photos["lon"] = photographers["lon"][photos["photographer"]]
+    photo_frames = shot_frames[shot_of_photo]
+    offsets, runner_ids = frames_to_csr(photo_frames)
+
+    identities = _unit_rows(rng.standard_normal((runners_n, DIM)).astype(np.float32))
+    backgrounds = _unit_rows(rng.standard_normal((photographers_n, DIM)).astype(np.float32))
+    write_embeddings(os.path.join(out_dir, "embeddings.f16"), photos, photo_frames, identities, backgrounds, rng)
+
+    # 쿼리: 한 장 이상 찍힌 주자 중에서 뽑은 셀카 (정체성 + 큰 잡음, 배경 없음)
+    photographed = np.unique(runner_ids)
+    query_runners = rng.choice(photographed, size=min(queries_n, len(photographed)), replace=False).astype(np.int32)
+    queries = _unit_rows(identities[query_runners]
+                         + SELFIE_NOISE * _unit_rows(rng.standard_normal((len(query_runners), DIM)).astype(np.float32)))
+    truth_offsets, truth_ids = runner_photo_truth(offsets, runner_ids, query_runners)
+
+    arrays = {
+        "photos": photos, "photo_runner_offsets": offsets, "photo_runners": runner_ids,
+        "runners": runners, "photographers": photographers,
+        "queries": queries.astype(np.float32), "query_runners": query_runners,
+        "truth_offsets": truth_offsets, "truth": truth_ids,
+    }
+    for name, array in arrays.items():
+        np.save(os.path.join(out_dir, f"{name}.npy"), array)
+    if images:
+        write_images(out_dir, photos, images, *image_size)
+
+    manifest = {
+        "gpx": gpx,
+        "course_km": round(cumdist[-1] / 1000, 3),
+        "race_start": RACE_START.isoformat(),
+        "seed": seed,
+        "dim": DIM,
+        "photos": len(photos),
+        "photographers": photographers_n,
+        "runners": runners_n,
+        "queries": len(query_runners),
+        "capture_probability": round(capture, 6),
+        "images": min(images, len(photos)),
+        "files": sorted([f"{name}.npy" for name in arrays] + ["embeddings.f16"]),
+    }
+    with open(os.path.join(out_dir, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+class RaceDataset:
+    """생성된 데이터셋 읽기 (큰 배열은 memmap 이라 10^6 장 이상도 바로 열림)"""
+
+    def __init__(self, path, mmap=True):
+        self.path = path
+        with open(os.path.join(path, "manifest.json"), encoding="utf-8") as f:
+            self.manifest = json.load(f)
+        mode = "r" if mmap else None
+        for name in ("photos", "photo_runner_offsets", "photo_runners", "runners", "photographers",
+                     "queries", "query_runners", "truth_offsets", "truth"):
+            setattr(self, name, np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mode))
+        self.embeddings = np.memmap(os.path.join(path, "embeddings.f16"), dtype=np.float16, mode="r",
+                                    shape=(self.manifest["photos"], self.manifest["dim"]))
+
+    def __len__(self):
+        return self.manifest["photos"]
+
+    def truth_for(self, query):
+        """쿼리 번호의 정답 photo_id 배열"""
+        return self.truth[self.truth_offsets[query]:self.truth_offsets[query + 1]]
+
+    def image_path(self, photo_id):
+        return os.path.join(self.path, "images", f"{photo_id}.jpg")
+
+    def load_into(self, index, chunk=200000):
+        """TournamentIndex 에 전체 사진 임베딩을 청크 단위로 대량 적재 (photo_id = 정수)"""
+        ids = self.photos["photo_id"]
+        for start in range(0, len(self), chunk):
+            index.add_many(ids[start:start + chunk].tolist(), self.embeddings[start:start + chunk])
+        index.merge()
+        return index
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--gpx", default="data/2025_JTBC.gpx")
+    parser.add_argument("--photos", type=int, default=100000, help="목표 사진 수 (연사 때문에 대략적)")
+    parser.add_argument("--photographers", type=int, default=60)
+    parser.add_argument("--runners", type=int, default=30000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--images", type=int, default=0, help="JPEG 로도 쓸 앞쪽 사진 수")
+    parser.add_argument("--image-size", type=int, nargs=2, default=[3000, 2000], metavar=("W", "H"))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", required=True, help="출력 디렉터리")
+    args = parser.parse_args()
+
+    manifest = generate(args.out, args.gpx, args.photos, args.photographers, args.runners, args.queries,
+                        seed=args.seed, images=args.images, image_size=tuple(args.image_size))
+    print(json.dumps(manifest, ensure_ascii=False, indent=2))
+
+
+if __name__ == "__main__":
+    main()
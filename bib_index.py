@@ -0,0 +1,106 @@
+"""
+배번(번호표) OCR 역색인
+작가 사진에서 배번 영역을 찾아 로컬 OCR(Tesseract)로 숫자를 읽고,
+배번 → 사진 ID 역색인에 저장해서 배번을 아는 주자는 임베딩 검색 없이 O(1) 로 사진을 찾습니다.
+pytesseract / tesseract 가 없으면 배번 인식은 건너뜁니다.
+"""
+
+import re
+
+from lazy_imports import optional_import
+
+MIN_BIB_DIGITS = 2
+MAX_BIB_DIGITS = 6
+MIN_OCR_CONFIDENCE = 0.6     # 0~1
+OCR_CONFIG = "--psm 11 -c tessedit_char_whitelist=0123456789"
+OCR_MIN_HEIGHT = 300         # 배번 영역이 너무 작으면 확대 후 인식
+
+# 사람 박스 안에서 배번이 붙는 몸통 영역 (박스 대비 비율)
+TORSO_X = (0.15, 0.85)
+TORSO_Y = (0.20, 0.65)
+
+
+def normalize_bib(text):
+    """입력/인식된 배번 정규화: 숫자만 남기고 앞의 0 제거"""
+    digits = re.sub(r"\D", "", text or "")
+    return digits.lstrip("0") or ("0" if digits else "")
+
+
+def bib_regions(image, person_boxes):
+    """배번이 있을 만한 영역 목록 (사람이 검출되지 않았으면 전체 이미지)"""
+    if not person_boxes:
+        return [image]
+    regions = []
+    for x1, y1, x2, y2 in person_boxes:
+        w, h = x2 - x1, y2 - y1
+        regions.append(image.crop((
+            int(x1 + w * TORSO_X[0]), int(y1 + h * TORSO_Y[0]),
+            int(x1 + w * TORSO_X[1]), int(y1 + h * TORSO_Y[1]),
+        )))
+    return regions
+
+
+def recognize_bibs(image, person_boxes=None):
+    """이미지에서 읽은 배번 {bib: confidence} (같은 번호는 최고 신뢰도만)"""
+    pytesseract = optional_import("pytesseract")
+    if pytesseract is None:
+        return {}
+
+    bibs = {}
+    for region in bib_regions(image.convert("RGB"), person_boxes):
+        gray = region.convert("L")
+        if gray.height < OCR_MIN_HEIGHT:
+            ratio = OCR_MIN_HEIGHT / max(1, gray.height)
+            gray = gray.resize((int(gray.width * ratio), OCR_MIN_HEIGHT))
+        try:
+            data = pytesseract.image_to_data(gray, config=OCR_CONFIG, output_type=pytesseract.Output.DICT)
+        except pytesseract.TesseractNotFoundError:
+            return {}
+
+        for text, conf in zip(data["text"], data["conf"]):
+            bib = normalize_bib(text)
+            confidence = float(conf) / 100
+            if not (MIN_BIB_DIGITS <= len(bib) <= MAX_BIB_DIGITS) or confidence < MIN_OCR_CONFIDENCE:
+                continue
+            bibs[bib] = max(confidence, bibs.get(bib, 0.0))
+    return bibs
+
+
+class BibIndex:
+    """
+    대회별 배번 역색인 {bib: {photo_id: (confidence, group)}}.
+    group 은 연사 ID 처럼 결과에서 하나만 보여 줄 묶음 (lookup 이 사진 목록을 훑지 않고 묶을 수 있게 함께 저장)
+    """
+
+    def __init__(self):
+        self._postings = {}
+
+    def __len__(self):
+        return len(self._postings)
+
+    def add(self, photo_id, bibs, group=None):
+        for bib, confidence in bibs.items():
+            self._postings.setdefault(bib, {})[photo_id] = (confidence, group)
+
+    def remove(self, photo_id, bibs=None):
+        """사진의 배번 항목 삭제 (bibs 를 모르면 전체 역색인을 훑음)"""
+        for bib in list(bibs if bibs is not None else self._postings):
+            postings = self._postings.get(bib)
+            if postings and postings.pop(photo_id, None) is not None and not postings:
+                del self._postings[bib]
+
+    def lookup(self, bib, one_per_group=False):
+        """
+        배번으로 [(photo_id, confidence)] 를 신뢰도 순으로 반환.
+        one_per_group 이면 같은 group(연사) 에서는 가장 잘 읽힌 1장만 (그 배번의 항목 수에만 비례)
+        """
+        postings = self._postings.get(normalize_bib(bib), {})
+        ranked = sorted(postings.items(), key=lambda kv: kv[1][0], reverse=True)
+        results, seen = [], set()
+        for photo_id, (confidence, group) in ranked:
+            if one_per_group and group is not None:
+                if group in seen:
+                    continue
+                seen.add(group)
+            results.append((photo_id, confidence))
+        return results
@@ -0,0 +1,162 @@
+"""
+연사(버스트) 사진 중복 제거
+초당 10장씩 찍힌 거의 같은 사진들을 지각 해시(pHash/dHash) + 임베딩 유사도 + 촬영 시간으로 묶어서
+대표 사진 1장만 검색 인덱스에 넣고, 나머지는 필요할 때 펼쳐 보도록 합니다.
+새 사진은 같은 (대회, 촬영 위치) 의 최근 연사 몇 개와만 비교하므로 업로드 수가 늘어도 사진당 비용이 일정합니다.
+"""
+
+import uuid
+from collections import deque
+
+import numpy as np
+from PIL import Image
+
+# 같은 연사로 볼 조건 (직전 사진 기준)
+BURST_WINDOW_SEC = 3.0       # 촬영 시간 간격
+MAX_PHASH_DISTANCE = 12      # pHash 해밍 거리 (64비트 중)
+MAX_DHASH_DISTANCE = 14      # dHash 해밍 거리 (64비트 중)
+MIN_EMBEDDING_COS = 0.92     # CLIP 임베딩 코사인 유사도
+RECENT_BURSTS = 32           # (대회, 위치) 별로 비교 후보로 기억해 둘 최근 연사 수
+LOCATION_DIGITS = 6          # 위치 키의 위도/경도 반올림 자릿수
+
+
+# ==================================================
+# 지각 해시
+# ==================================================
+def _dct_matrix(n):
+    k = np.arange(n)
+    m = np.cos(np.pi * (2 * k[None, :] + 1) * k[:, None] / (2 * n))
+    m[0] *= 1 / np.sqrt(2)
+    return m * np.sqrt(2 / n)
+
+
+_DCT_32 = _dct_matrix(32)
+
+
+def _bits_to_int(bits):
+    value = 0
+    for b in bits.flatten():
+        value = (value << 1) | int(b)
+    return value
+
+
+def compute_phash(image):
+    """pHash: 32x32 흑백 축소 → 2D DCT → 저주파 8x8 계수를 중앙값 기준 64비트로"""
+    gray = image.convert("L").resize((32, 32), Image.LANCZOS)
+    pixels = np.asarray(gray, dtype=np.float64)
+    dct = _DCT_32 @ pixels @ _DCT_32.T
+    low = dct[:8, :8]
+    median = np.median(low.flatten()[1:])  # DC 성분 제외
+    return _bits_to_int(low > median)
+
+
+def compute_dhash(image):
+    """dHash: 9x8 흑백 축소 → 가로 방향 밝기 차이 64비트"""
+    gray = image.convert("L").resize((9, 8), Image.LANCZOS)
+    pixels = np.asarray(gray, dtype=np.int16)
+    return _bits_to_int(pixels[:, 1:] > pixels[:, :-1])
+
+
+def hamming_distance(a, b):
+    return bin(a ^ b).count("1")
+
+
+# ==================================================
+# 연사 묶기
+# ==================================================
+def _unit(vec):
+    vec = np.asarray(vec, dtype=np.float32).flatten()
+    norm = np.linalg.norm(vec)
+    return vec / norm if norm else vec
+
+
+def is_same_burst(burst, photo,
+                  window_sec=BURST_WINDOW_SEC,
+                  max_phash=MAX_PHASH_DISTANCE,
+                  max_dhash=MAX_DHASH_DISTANCE,
+                  min_cos=MIN_EMBEDDING_COS):
+    """photo 가 burst 의 마지막 사진과 같은 연사인지 판단"""
+    if burst["tournament"] != photo["tournament"]:
+        return False
+    if (burst["lat"], burst["lon"]) != (photo["lat"], photo["lon"]):
+        return False
+    if abs((photo["time"] - burst["last_time"]).total_seconds()) > window_sec:
+        return False
+    if hamming_distance(burst["last_phash"], photo["phash"]) > max_phash:
+        return False
+    if hamming_distance(burst["last_dhash"], photo["dhash"]) > max_dhash:
+        return False
+    return float(burst["last_emb"] @ _unit(photo["embedding"])) >= min_cos
+
+
+def location_key(photo):
+    """최근 연사를 모아 둘 키 (대회, 반올림한 위도, 경도)"""
+    rounded = [round(v, LOCATION_DIGITS) if isinstance(v, float) else v for v in (photo["lat"], photo["lon"])]
+    return (photo["tournament"], *rounded)
+
+
+def assign_burst(bursts, photo, recent=None, **kwargs):
+    """
+    photo 를 기존 연사에 넣거나 새 연사를 만듭니다. bursts 는 {burst_id: burst} 딕셔너리.
+    recent 는 {location_key: deque(burst_id)} 로, 주면 같은 위치의 최근 연사들만 후보로 봅니다
+    (없으면 전체 연사를 훑음 - 사진 n 장이면 O(n²)).
+    photo 에는 id, tournament, lat, lon, time, phash, dhash, embedding 이 있어야 합니다.
+    반환: (burst_id, 새 연사 여부) - 새 연사면 photo 가 대표 사진입니다.
+    """
+    window_sec = kwargs.get("window_sec", BURST_WINDOW_SEC)
+    if recent is not None:
+        recent_ids = recent.setdefault(location_key(photo), deque(maxlen=RECENT_BURSTS))
+        pool = [(burst_id, bursts[burst_id]) for burst_id in recent_ids if burst_id in bursts]  # 삭제된 연사는 건너뜀
+    else:
+        pool = bursts.items()
+    candidates = [
+        (burst_id, burst) for burst_id, burst in pool
+        if abs((photo["time"] - burst["last_time"]).total_seconds()) <= window_sec
+    ]
+    # 최근에 갱신된 연사부터 확인
+    for burst_id, burst in sorted(candidates, key=lambda kv: kv[1]["last_time"], reverse=True):
+        if is_same_burst(burst, photo, **kwargs):
+            burst["members"].append(photo["id"])
+            burst["last_time"] = photo["time"]
+            burst["last_phash"] = photo["phash"]
+            burst["last_dhash"] = photo["dhash"]
+            burst["last_emb"] = _unit(photo["embedding"])
+            return burst_id, False
+
+    burst_id = uuid.uuid4().hex
+    bursts[burst_id] = {
+        "rep": photo["id"],
+        "members": [photo["id"]],
+        "tournament": photo["tournament"],
+        "lat": photo["lat"],
+        "lon": photo["lon"],
+        "last_time": photo["time"],
+        "last_phash": photo["phash"],
+        "last_dhash": photo["dhash"],
+        "last_emb": _unit(photo["embedding"]),
+    }
+    if recent is not None:
+        recent_ids.append(burst_id)
+    return burst_id, True
+
+
+def move_burst(bursts, burst_id, lat, lon, recent=None):
+    """
+    연사의 촬영 위치 수정 (작가가 사진 위치를 고쳤을 때). recent 를 주면 연사 ID 를 새 위치의 최근 연사로 옮겨서,
+    이후 고친 위치에서 올린 사진은 이 연사와 묶이고 예전 위치에서 올린 사진은 묶이지 않게 합니다.
+    반환: 연사가 있었는지
+    """
+    burst = bursts.get(burst_id)
+    if burst is None:
+        return False
+    if recent is not None:
+        old_key = location_key(burst)
+        old_ids = recent.get(old_key)
+        if old_ids is not None and burst_id in old_ids:
+            old_ids.remove(burst_id)
+            if not old_ids:
+                del recent[old_key]
+    burst["lat"], burst["lon"] = lat, lon
+    if recent is not None:
+        recent.setdefault(location_key(burst), deque(maxlen=RECENT_BURSTS)).append(burst_id)
+    return True
@@ -0,0 +1,260 @@
+"""
+러닝 가이드 챗봇 응답 캐시 (test.py / test_category.py)
+추천 질문 버튼·카테고리 질문처럼 수많은 이용자가 똑같이 누르는 질문은 매번 OpenAI API 를 부르지 않고
+저장된 답을 바로 돌려줍니다. 키는 모델 + 생성 옵션 + 실제로 보내는 메시지(시스템 프롬프트의 주제,
+대화 기록, 정규화한 질문)의 해시라서 같은 대화 맥락일 때만 적중합니다.
+sqlite 파일 하나에 저장하므로 서버를 재시작해도, 여러 프로세스가 함께 써도 유지됩니다.
+오래된 답은 TTL 이 지나면 버리고, 항목 수가 max_entries 를 넘으면 가장 오래 안 쓴 것부터 지웁니다 (LRU).
+
+자주 나오는 질문은 미리 채워 둘 수 있습니다:
+    - 녹화된 fixture(JSON): 운영 캐시를 export 한 파일을 시작할 때 import
+    - 로컬 대체 모델: OpenAI 호환 로컬 서버(CHAT_PREWARM_BASE_URL, 예: Ollama/vLLM)로 답을 만들어 채움
+
+    python chat_cache.py export --out data/chat_fixture.json
+    python chat_cache.py import data/chat_fixture.json
+    python chat_cache.py stats
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+
+from metrics import CACHE_REQUESTS
+
+CHAT_CACHE_PATH = os.environ.get("CHAT_CACHE_PATH", "chat_cache.sqlite3")
+CHAT_CACHE_TTL = float(os.environ.get("CHAT_CACHE_TTL", 7 * 24 * 3600))   # 초
+CHAT_CACHE_MAX_ENTRIES = int(os.environ.get("CHAT_CACHE_MAX_ENTRIES", 5000))
+CHAT_FIXTURE = os.environ.get("CHAT_FIXTURE", os.path.join("data", "chat_fixture.json"))
+CHAT_PREWARM_BASE_URL = os.environ.get("CHAT_PREWARM_BASE_URL", "")
+CHAT_PREWARM_MODEL = os.environ.get("CHAT_PREWARM_MODEL", "")
+
+log = logging.getLogger(__name__)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key TEXT PRIMARY KEY,
+    request TEXT NOT NULL,
+    response TEXT NOT NULL,
+    source TEXT NOT NULL,
+    created REAL NOT NULL,
+    last_used REAL NOT NULL,
+    hits INTEGER NOT NULL DEFAULT 0
+)
+"""
+
+
+def normalize_prompt(text):
+    """공백 정리 + 소문자 + 끝의 물음표/마침표 제거 ("러닝화 추천?" == "러닝화  추천")"""
+    return re.sub(r"[\s?？!.。]+$", "", " ".join((text or "").split()).lower())
+
+
+def normalize_request(model, messages, **params):
+    """캐시 키를 만들 요청 (이용자 메시지만 정규화 - 시스템 프롬프트/봇 답변은 그대로)"""
+    normalized = [
+        {"role": m["role"], "content": normalize_prompt(m["content"]) if m["role"] == "user" else m["content"].strip()}
+        for m in messages
+    ]
+    return {"model": model, "params": params, "messages": normalized}
+
+
+def request_key(request):
+    return hashlib.sha256(json.dumps(request, ensure_ascii=False, sort_keys=True).encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """sqlite 영속 응답 캐시 (TTL + LRU). 세션/스레드가 공유하므로 연결 하나를 락으로 보호"""
+
+    def __init__(self, path=CHAT_CACHE_PATH, ttl=CHAT_CACHE_TTL, max_entries=CHAT_CACHE_MAX_ENTRIES):
+        self.path = path
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        if path != ":memory:":
+            self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute(_SCHEMA)
+
+    def __len__(self):
+        with self._lock:
+            return self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0]
+
+    def get(self, model, messages, **params):
+        """저장된 답 (없거나 TTL 이 지났으면 None)"""
+        key = request_key(normalize_request(model, messages, **params))
+        now = time.time()
+        with self._lock:
+            row = self._db.execute("SELECT response, created FROM responses WHERE key = ?", (key,)).fetchone()
+            if row is not None and now - row[1] > self.ttl:
+                self._db.execute("DELETE FROM responses WHERE key = ?", (key,))
+                row = None
+            if row is None:
+                self.misses += 1
+                CACHE_REQUESTS.inc(cache="chat", result="miss")
+                return None
+            self._db.execute("UPDATE responses SET last_used = ?, hits = hits + 1 WHERE key = ?", (now, key))
+            self.hits += 1
+        CACHE_REQUESTS.inc(cache="chat", result="hit")
+        return row[0]
+
+    def put(self, model, messages, response, source="api", **params):
+        request = normalize_request(model, messages, **params)
+        now = time.time()
+        with self._lock:
+            self._db.execute(
+                "INSERT OR REPLACE INTO responses (key, request, response, source, created, last_used) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (request_key(request), json.dumps(request, ensure_ascii=False), response, source, now, now),
+            )
+            self._evict(now)
+
+    def contains(self, model, messages, **params):
+        key = request_key(normalize_request(model, messages, **params))
+        with self._lock:
+            row = self._db.execute("SELECT created FROM responses WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row[0] <= self.ttl
+
+    def _evict(self, now):
+        """TTL 지난 항목 삭제 후, 그래도 많으면 last_used 가 오래된 것부터 삭제 (락 안에서 호출)"""
+        self._db.execute("DELETE FROM responses WHERE created < ?", (now - self.ttl,))
+        excess = self._db.execute("SELECT COUNT(*) FROM responses").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self._db.execute(
+                "DELETE FROM responses WHERE key IN (SELECT key FROM responses ORDER BY last_used LIMIT ?)", (excess,)
+            )
+
+    # ==================================================
+    # fixture (녹화된 답) / 미리 채우기
+    # ==================================================
+    def entries(self):
+        """TTL 안의 항목 [{"request", "response", "source"}] (자주 쓰인 순)"""
+        with self._lock:
+            rows = self._db.execute(
+                "SELECT request, response, source FROM responses WHERE created >= ? ORDER BY hits DESC",
+                (time.time() - self.ttl,),
+            ).fetchall()
+        return [{"request": json.loads(r), "response": text, "source": source} for r, text, source in rows]
+
+    def export(self, path):
+        """유효한 항목을 fixture JSON 으로 저장"""
+        entries = self.entries()
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(entries, f, ensure_ascii=False, indent=2)
+        return len(entries)
+
+    def load_fixture(self, path=CHAT_FIXTURE):
+        """export 한 JSON 을 캐시에 채움 (이미 있는 항목은 건너뜀). 파일이 없으면 0"""
+        if not os.path.exists(path):
+            return 0
+        with open(path, encoding="utf-8") as f:
+            entries = json.load(f)
+        loaded = 0
+        for entry in entries:
+            request = entry["request"]
+            if not self.contains(request["model"], request["messages"], **request["params"]):
+                self.put(request["model"], request["messages"], entry["response"], source="fixture", **request["params"])
+                loaded += 1
+        return loaded
+
+    def prewarm(self, requests, answer_fn, source="prewarm"):
+        """
+        requests: [(model, messages, params)] 중 캐시에 없는 것만 answer_fn(messages) 로 답을 만들어 저장.
+        answer_fn 은 로컬 대체 모델 등 (실패한 질문은 건너뜀). 반환: 채운 개수
+        """
+        filled = 0
+        for model, messages, params in requests:
+            if self.contains(model, messages, **params):
+                continue
+            try:
+                answer = answer_fn(messages)
+            except Exception:
+                continue
+            if answer:
+                self.put(model, messages, answer, source=source, **params)
+                filled += 1
+        return filled
+
+
+def local_answer_fn(base_url=CHAT_PREWARM_BASE_URL, model=CHAT_PREWARM_MODEL):
+    """OpenAI 호환 로컬 서버로 답을 만드는 함수 (base_url 이 없으면 None)"""
+    if not base_url:
+        return None
+    from openai import OpenAI
+
+    client = OpenAI(base_url=base_url, api_key=os.environ.get("CHAT_PREWARM_API_KEY", "local"))
+
+    def answer(messages):
+        response = client.chat.completions.create(model=model, messages=messages, temperature=0.7, max_tokens=1000)
+        return response.choices[0].message.content
+
+    return answer
+
+
+def start_background_prewarm(cache, requests, fixture=CHAT_FIXTURE, answer_fn=None, semantic=None):
+    """
+    fixture 를 읽고, 로컬 대체 모델이 있으면 나머지 자주 나오는 질문을 데몬 스레드에서 채움.
+    semantic(semantic_cache.SemanticCache) 을 주면 끝난 뒤 캐시 항목으로 의미 캐시 인덱스도 채움.
+    단계마다 실패해도 로그만 남기고 다음 단계로 넘어감 (fixture 가 깨져도 의미 캐시는 켜지도록).
+    반환: 진행 상황 dict {"done", "fixture", "prewarmed", "semantic", "errors": {단계: 메시지}}
+    """
+    status = {"done": False, "fixture": 0, "prewarmed": 0, "semantic": 0, "errors": {}}
+
+    def step(name, fn):
+        try:
+            status[name] = fn()
+        except Exception as e:
+            status["errors"][name] = str(e)
+            log.warning("챗봇 캐시 예열 실패 (%s): %s", name, e, exc_info=True)
+
+    def prewarm():
+        fn = answer_fn or local_answer_fn()
+        return cache.prewarm(requests, fn) if fn is not None else 0
+
+    def run():
+        step("fixture", lambda: cache.load_fixture(fixture))
+        step("prewarmed", prewarm)
+        if semantic is not None:
+            step("semantic", lambda: semantic.rebuild_from(cache))
+        status["done"] = True
+
+    threading.Thread(target=run, name="chat-prewarm", daemon=True).start()
+    return status
+
+
+def main():
+    parser = argparse.ArgumentParser(description="챗봇 응답 캐시 관리")
+    parser.add_argument("--db", default=CHAT_CACHE_PATH)
+    sub = parser.add_subparsers(dest="command", required=True)
+    export = sub.add_parser("export", help="캐시를 fixture JSON 으로 저장")
+    export.add_argument("--out", default=CHAT_FIXTURE)
+    load = sub.add_parser("import", help="fixture JSON 을 캐시에 채움")
+    load.add_argument("path", nargs="?", default=CHAT_FIXTURE)
+    sub.add_parser("stats", help="항목 수 / 출처별 개수 / 많이 쓰인 질문")
+    args = parser.parse_args()
+
+    cache = ResponseCache(args.db)
+    if args.command == "export":
+        print(f"{cache.export(args.out)}개 저장: {args.out}")
+    elif args.command == "import":
+        print(f"{cache.load_fixture(args.path)}개 추가: {args.path}")
+    else:
+        with cache._lock:
+            by_source = cache._db.execute("SELECT source, COUNT(*), SUM(hits) FROM responses GROUP BY source").fetchall()
+            top = cache._db.execute("SELECT request, hits FROM responses ORDER BY hits DESC LIMIT 10").fetchall()
+        print(f"항목 {len(cache)}개 ({cache.path})")
+        for source, count, hits in by_source:
+            print(f"  {source}: {count}개, 적중 {hits}회")
+        for request, hits in top:
+            question = json.loads(request)["messages"][-1]["content"]
+            print(f"  {hits:6d}  {question[:60]}")
+
+
+if __name__ == "__main__":
+    main()
@@ -9,15 +9,13 @@ from PIL import Image
 import gpxpy
 import folium
 from streamlit_folium import folium_static
-import torch
-from transformers import CLIPProcessor, CLIPModel
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
-import io
 from datetime import datetime, timedelta
 import random
 import base64
 
+from model_server import default_client
+
 # ==========================================
 # ImageSimilarityFinder 클래스
 # ==========================================
@@ -25,27 +23,37 @@ class ImageSimilarityFinder:
     def __init__(self):
         self.model = None
         self.processor = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
         
     @st.cache_resource
     def load_model(_self):
-        """모델 로드 (캐싱)"""
+        """모델 로드 (캐싱) - torch / transformers 는 몇 초씩 걸리므로 첫 화면이 아니라 여기서 import"""
+        import torch
+        from transformers import CLIPProcessor, CLIPModel
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
         model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
         processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-        model.to(_self.device)
+        model.to(device)
         return model, processor
     
     def get_image_embedding(self, image):
         """이미지의 임베딩 벡터 생성"""
-        if self.model is None or self.processor is None:
-            self.model, self.processor = self.load_model()
-        
         if isinstance(image, str):
             image = Image.open(image).convert('RGB')
         else:
             image = image.convert('RGB')
-            
-        inputs = self.processor(images=image, return_tensors="pt").to(self.device)
+
+        # CLIP_SERVER 가 설정돼 있으면 공유 모델 서버에 요청 (세션/프로세스마다 모델을 올리지 않음)
+        client = default_client()
+        if client is not None:
+            return client.encode_images([image])
+
+        if self.model is None or self.processor is None:
+            self.model, self.processor = self.load_model()
+
+        import torch
+
+        inputs = self.processor(images=image, return_tensors="pt").to(self.model.device)
         
         with torch.no_grad():
             embedding = self.model.get_image_features(**inputs)
@@ -192,7 +200,7 @@ def create_course_map_with_photos(coordinates, photo_markers=None):
             # 팝업 HTML
             popup_html = f"""
             <div style='width: 250px; font-family: Arial;'>
-                <img src='data:image/png;base64,{img_base64}' 
+                <img src='data:{photo.get("image_mime", "image/png")};base64,{img_base64}' 
                      style='width: 100%; border-radius: 8px; margin-bottom: 10px;'>
                 <div style='background: #f0f7ff; padding: 10px; border-radius: 8px;'>
                     <b style='color: #2c3e50; font-size: 16px;'>📸 {photo['name']}</b><br>
@@ -368,10 +376,8 @@ if mode == "📸 작가 모드":
                             # 임베딩 생성
                             embedding = st.session_state.image_finder.get_image_embedding(image)
                             
-                            # 이미지를 바이트로 변환
-                            img_byte_arr = io.BytesIO()
-                            image.save(img_byte_arr, format='PNG')
-                            image_bytes = img_byte_arr.getvalue()
+                            # 업로드된 원본 바이트 그대로 (PNG 재저장 없음)
+                            image_bytes = file.getvalue()
                             
                             # base64 인코딩 (지도 마커용)
                             img_base64 = base64.b64encode(image_bytes).decode()
@@ -381,6 +387,7 @@ if mode == "📸 작가 모드":
                                 'name': file.name,
                                 'image_bytes': image_bytes,
                                 'image_base64': img_base64,
+                                'image_mime': file.type or 'image/jpeg',
                                 'embedding': embedding,
                                 'lat': location['lat'],
                                 'lon': location['lon'],
@@ -489,7 +496,9 @@ else:
                                 st.session_state.uploaded_image
                             )
                             
-                            # 유사도 계산
+                            # 유사도 계산 (sklearn 은 검색할 때 처음 import)
+                            from sklearn.metrics.pairwise import cosine_similarity
+
                             photo_markers = []
                             for saved_photo in st.session_state.saved_photos:
                                 if saved_photo['tournament'] != tournament_name:
@@ -510,7 +519,8 @@ else:
                                         'similarity': similarity_percent,
                                         'name': saved_photo['name'],
                                         'photographer': saved_photo['photographer'],
-                                        'image_base64': saved_photo['image_base64']
+                                        'image_base64': saved_photo['image_base64'],
+                                        'image_mime': saved_photo['image_mime']
                                     })
                             
                             # 지도 생성
@@ -0,0 +1,63 @@
+"""
+CLIP 인코더
+앱/벤치마크/모델 서버가 같은 방식으로 이미지·텍스트를 임베딩하도록 모아 둔 모듈.
+인코더는 encode_images(images) / encode_texts(texts) 두 메서드만 가지며,
+프로세스 안에서 모델을 직접 돌리는 LocalClipEncoder 와
+공유 모델 서버에 요청하는 model_server.ModelClient 가 같은 인터페이스를 씁니다.
+torch / transformers 는 몇 초씩 걸리므로 실제로 모델을 쓸 때 import 합니다.
+"""
+
+from metrics import EMBED_SECONDS, EMBED_ITEMS
+
+CLIP_MODEL_NAME = "openai/clip-vit-base-patch32"
+
+
+class LocalClipEncoder:
+    """프로세스 안에 CLIP 모델을 올려서 임베딩"""
+
+    def __init__(self, model, processor, device):
+        self.model = model
+        self.processor = processor
+        self.device = device
+
+    def encode_images(self, images):
+        """PIL 이미지 목록 → (n, d) numpy (한 번의 배치)"""
+        import torch
+
+        with EMBED_SECONDS.time(kind="image", backend="local"):
+            inputs = self.processor(images=[img.convert("RGB") for img in images], return_tensors="pt").to(self.device)
+            with torch.no_grad():
+                emb = self.model.get_image_features(**inputs)
+            emb = emb.cpu().numpy()
+        EMBED_ITEMS.inc(len(emb), kind="image", backend="local")
+        return emb
+
+    def encode_texts(self, texts):
+        """문장 목록 → (n, d) numpy (한 번의 배치)"""
+        import torch
+
+        with EMBED_SECONDS.time(kind="text", backend="local"):
+            inputs = self.processor(text=list(texts), return_tensors="pt", padding=True, truncation=True).to(self.device)
+            with torch.no_grad():
+                emb = self.model.get_text_features(**inputs)
+            emb = emb.cpu().numpy()
+        EMBED_ITEMS.inc(len(emb), kind="text", backend="local")
+        return emb
+
+
+def load_local_encoder(model_name=CLIP_MODEL_NAME):
+    """로컬 모델 저장소(model_store.py, models/clip/)가 있으면 오프라인으로 거기서, 없으면 허브에서 로드"""
+    import torch
+    from model_store import has_store, load_from_store
+
+    device = "cuda" if torch.cuda.is_available() else "cpu"
+    if model_name == CLIP_MODEL_NAME and has_store():
+        model, processor = load_from_store()
+    else:
+        from transformers import CLIPModel, CLIPProcessor
+
+        model = CLIPModel.from_pretrained(model_name)
+        processor = CLIPProcessor.from_pretrained(model_name)
+    model.to(device)
+    model.eval()
+    return LocalClipEncoder(model, processor, device)
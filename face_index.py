@@ -0,0 +1,99 @@
+"""
+얼굴 임베딩 검색 채널 (선택 기능)
+CLIP 유사도는 옷/배경 위주라 같은 클럽 유니폼을 입은 주자들이 섞입니다.
+OpenCV 의 YuNet(얼굴 검출) + SFace(얼굴 임베딩) ONNX 모델로 CPU 에서 얼굴 벡터를 만들고,
+대회별 float16 인덱스에 저장한 뒤 CLIP 점수와 합칩니다.
+
+모델 파일 (OpenCV Zoo 에서 받아 models/face/ 에 둡니다):
+    face_detection_yunet_2023mar.onnx
+    face_recognition_sface_2021dec.onnx
+모델이나 OpenCV 가 없으면 얼굴 채널은 꺼집니다.
+"""
+
+import os
+
+import numpy as np
+
+from lazy_imports import optional_import
+from photo_index import TournamentIndex
+
+FACE_MODEL_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "models", "face")
+DETECTOR_FILE = "face_detection_yunet_2023mar.onnx"
+RECOGNIZER_FILE = "face_recognition_sface_2021dec.onnx"
+
+FACE_DIM = 128
+FACE_SCORE_THRESHOLD = 0.8   # 얼굴 검출 신뢰도
+FACE_MATCH_COS = 0.363       # SFace 권장 동일인 코사인 기준
+MAX_FACES = 8
+FACE_WEIGHT = 0.5            # 점수 융합 시 얼굴 점수 비중
+
+
+def face_models_available(model_dir=FACE_MODEL_DIR):
+    """모델 파일이 있는지만 확인 (OpenCV 를 import 하지 않음)"""
+    return all(os.path.exists(os.path.join(model_dir, f)) for f in (DETECTOR_FILE, RECOGNIZER_FILE))
+
+
+def load_face_models(model_dir=FACE_MODEL_DIR):
+    """(detector, recognizer) 반환. 사용할 수 없으면 None"""
+    if not face_models_available(model_dir):
+        return None
+    cv2 = optional_import("cv2")
+    if cv2 is None:
+        return None
+    detector_path = os.path.join(model_dir, DETECTOR_FILE)
+    recognizer_path = os.path.join(model_dir, RECOGNIZER_FILE)
+    detector = cv2.FaceDetectorYN.create(detector_path, "", (320, 320), FACE_SCORE_THRESHOLD)
+    recognizer = cv2.FaceRecognizerSF.create(recognizer_path, "")
+    return detector, recognizer
+
+
+def new_face_index():
+    """대회별 얼굴 인덱스 (float16 으로 압축 저장)"""
+    return TournamentIndex(dim=FACE_DIM, storage="float16")
+
+
+def get_face_embeddings(image, face_models, max_faces=MAX_FACES):
+    """PIL 이미지의 얼굴 임베딩 (k, 128). 얼굴이 없으면 (0, 128)"""
+    empty = np.empty((0, FACE_DIM), dtype=np.float32)
+    if face_models is None:
+        return empty
+    detector, recognizer = face_models
+    cv2 = optional_import("cv2")
+
+    bgr = cv2.cvtColor(np.asarray(image.convert("RGB")), cv2.COLOR_RGB2BGR)
+    height, width = bgr.shape[:2]
+    detector.setInputSize((width, height))
+    _, faces = detector.detect(bgr)
+    if faces is None:
+        return empty
+
+    faces = sorted(faces, key=lambda f: -f[-1])[:max_faces]
+    embeddings = [recognizer.feature(recognizer.alignCrop(bgr, face)).flatten() for face in faces]
+    return np.asarray(embeddings, dtype=np.float32)
+
+
+def scale_face_score(face_cos):
+    """얼굴 코사인을 CLIP 점수 척도로 변환 (동일인 기준 → 0.70, 1.0 → 1.0)"""
+    return 0.70 + 0.30 * (face_cos - FACE_MATCH_COS) / (1 - FACE_MATCH_COS)
+
+
+def fuse_scores(clip_results, face_results, face_weight=FACE_WEIGHT):
+    """
+    CLIP 결과와 얼굴 결과 [(photo_id, score)] 를 합쳐 {photo_id: score} 반환.
+    얼굴 점수가 있는 사진만 가중 평균하고, 얼굴이 없는 사진은 CLIP 점수를 그대로 씁니다.
+    """
+    fused = dict(clip_results)
+    for photo_id, face_cos in face_results:
+        face_score = scale_face_score(face_cos)
+        clip_score = fused.get(photo_id)
+        fused[photo_id] = face_score if clip_score is None else (1 - face_weight) * clip_score + face_weight * face_score
+    return fused
+
+
+def face_only_scores(face_results):
+    """얼굴만으로 찾을 때: 동일인 기준을 넘는 사진만 {photo_id: score}"""
+    return {
+        photo_id: scale_face_score(face_cos)
+        for photo_id, face_cos in face_results
+        if face_cos >= FACE_MATCH_COS
+    }
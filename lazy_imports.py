@@ -0,0 +1,56 @@
+"""
+무거운 모듈 지연 import + 백그라운드 예열
+torch / transformers / folium / cv2 를 스크립트 맨 위에서 import 하면 첫 화면(대회 선택)이 뜨기 전에
+수 초를 기다려야 합니다. 이 모듈을 쓰면 필요한 함수 안에서만 import 하고,
+서버가 뜰 때 백그라운드 스레드가 미리 import / 모델 로드를 해 둡니다.
+"""
+
+import importlib
+import threading
+import time
+
+# 백그라운드에서 미리 올려 둘 모듈 (없으면 건너뜀)
+HEAVY_MODULES = ("torch", "transformers", "folium", "streamlit_folium", "cv2")
+
+_missing = object()
+_modules = {}
+_lock = threading.Lock()
+
+
+def optional_import(name):
+    """모듈을 처음 필요할 때 import 해서 캐시. 설치되지 않았으면 None"""
+    module = _modules.get(name, _missing)
+    if module is not _missing:
+        return module
+    with _lock:
+        if name not in _modules:
+            try:
+                _modules[name] = importlib.import_module(name)
+            except ImportError:
+                _modules[name] = None
+        return _modules[name]
+
+
+def start_background_warmup(modules=HEAVY_MODULES, loaders=()):
+    """
+    데몬 스레드에서 modules 를 import 하고 loaders(인자 없는 함수)를 차례로 호출.
+    반환: 진행 상황 dict {"done", "timings": {이름: 초}, "errors": {이름: 메시지}}
+    """
+    status = {"done": False, "timings": {}, "errors": {}}
+
+    def run():
+        for name in modules:
+            start = time.perf_counter()
+            optional_import(name)
+            status["timings"][f"import {name}"] = round(time.perf_counter() - start, 3)
+        for loader in loaders:
+            start = time.perf_counter()
+            try:
+                loader()
+            except Exception as e:  # 예열 실패는 실제 요청 시 다시 시도됨
+                status["errors"][loader.__name__] = str(e)
+            status["timings"][loader.__name__] = round(time.perf_counter() - start, 3)
+        status["done"] = True
+
+    threading.Thread(target=run, name="warmup", daemon=True).start()
+    return status
@@ -0,0 +1,221 @@
+"""
+메모리 점검 / 세션별 메모리 예산
+세션 상태(사진 미리보기·썸네일, 검색 인덱스, 검색 캐시, 검색용 사진 ...)와 프로세스 공용 자원(CLIP 가중치,
+프롬프트 캐시 등)이 각각 몇 바이트를 쥐고 있는지 보고하고, 필요할 때 tracemalloc 스냅샷으로
+어느 코드 줄이 메모리를 할당했는지 봅니다.
+SESSION_MEMORY_BUDGET_MB 를 설정하면 세션이 예산을 넘을 때 오래된 사진의 미리보기부터 디스크(photo_store)로 내립니다.
+
+크기는 객체를 따라가며 더한 근사치입니다 (numpy / 인덱스는 nbytes, PIL 이미지는 픽셀 버퍼 크기).
+"""
+
+import os
+import sys
+import time
+import tracemalloc
+
+import numpy as np
+from PIL import Image
+
+from photo_store import evict_preview, PHOTO_STORE_DIR
+
+SESSION_BUDGET_MB = float(os.environ.get("SESSION_MEMORY_BUDGET_MB", "0") or 0)   # 0 이면 제한 없음
+TRACEMALLOC_FRAMES = 1
+TOP_ALLOCATIONS = 15
+SESSION_REPORT_TTL = 3600    # 이 시간(초) 동안 갱신되지 않은 세션은 전체 집계에서 뺌
+
+# 세션 상태를 나눠 보는 순서 (앞 항목이 먼저 객체를 차지 - 같은 객체를 두 번 세지 않음)
+SESSION_CATEGORIES = (
+    ("검색 인덱스", ("indexes",)),
+    ("얼굴 인덱스", ("face_indexes",)),
+    ("배번 역색인", ("bib_indexes",)),
+    ("검색 캐시", ("search_cache", "feedback")),
+    ("검색용 사진", ("uploaded_images",)),
+    ("연사 묶음", ("bursts", "recent_bursts")),
+    ("구간 시간 기록", ("trace_stats", "trace")),
+)
+
+_sessions = {}          # session_tag → (갱신 시각, 보고서)
+_last_snapshot = None
+
+
+def deep_size(obj, seen=None):
+    """obj 가 (따라가서) 쥐고 있는 대략적인 바이트 수. seen 을 넘기면 이미 센 객체는 건너뜀"""
+    seen = set() if seen is None else seen
+    if id(obj) in seen:
+        return 0
+    seen.add(id(obj))
+
+    if isinstance(obj, np.ndarray):
+        return obj.nbytes if obj.base is None else 0   # 뷰는 원본 배열 쪽에서 셈
+    if isinstance(obj, Image.Image):
+        return obj.width * obj.height * len(obj.getbands())
+    nbytes = getattr(type(obj), "nbytes", None)
+    if isinstance(nbytes, property):   # TournamentIndex 등 자체 계산 (행렬/버퍼)
+        return int(obj.nbytes)
+    size = sys.getsizeof(obj)
+    if isinstance(obj, (str, bytes, bytearray, int, float, bool, type(None))):
+        return size
+    if isinstance(obj, dict):
+        return size + sum(deep_size(k, seen) + deep_size(v, seen) for k, v in obj.items())
+    if isinstance(obj, (list, tuple, set, frozenset)):
+        return size + sum(deep_size(v, seen) for v in obj)
+    if hasattr(obj, "__dict__"):
+        return size + deep_size(vars(obj), seen)
+    return size
+
+
+def photo_breakdown(photos):
+    """사진 dict 목록의 필드별 바이트 {"미리보기", "썸네일", "기타"} + 디스크로 내린 미리보기 수"""
+    preview = thumb = other = evicted = 0
+    seen = set()
+    for photo in photos:
+        seen.add(id(photo))
+        for key, value in photo.items():
+            if key == "preview":
+                preview += len(value) if value is not None else 0
+                evicted += value is None
+            elif key == "thumb":
+                thumb += sys.getsizeof(value)
+            else:
+                other += deep_size(value, seen)
+        other += sys.getsizeof(photo)
+    return {"미리보기": preview, "썸네일": thumb, "기타": other}, evicted
+
+
+def session_report(state):
+    """세션 상태의 항목별 바이트 {"total", "categories", "photos", "evicted_previews"}"""
+    seen = {id(state)}
+    photos = state.get("photos", [])
+    photo_parts, evicted = photo_breakdown(photos)
+    seen.update(id(p) for p in photos)
+    seen.add(id(photos))
+    categories = {f"사진 {name}": size for name, size in photo_parts.items()}
+    counted = {"photos", "photo_markers"}   # photo_markers 는 photos 의 일부를 가리킴
+    for name, keys in SESSION_CATEGORIES:
+        categories[name] = sum(deep_size(state[k], seen) for k in keys if k in state)
+        counted.update(keys)
+    categories["기타"] = sum(deep_size(v, seen) for k, v in state.items() if k not in counted)
+    return {
+        "total": sum(categories.values()),
+        "categories": categories,
+        "photos": len(photos),
+        "evicted_previews": evicted,
+    }
+
+
+def record_session(session_tag, report):
+    """세션 보고서를 프로세스 전체 집계에 반영 (오래된 세션은 정리)"""
+    now = time.time()
+    _sessions[session_tag] = (now, report)
+    for tag, (updated, _) in list(_sessions.items()):
+        if now - updated > SESSION_REPORT_TTL:
+            _sessions.pop(tag, None)
+
+
+def all_sessions():
+    """{session_tag: total 바이트} - 최근 보고된 세션들"""
+    return {tag: report["total"] for tag, (_, report) in list(_sessions.items())}
+
+
+def process_memory():
+    """현재/최대 RSS 바이트 (/proc 이 없으면 최대 RSS 만)"""
+    try:
+        with open("/proc/self/status") as f:
+            fields = dict(line.split(":", 1) for line in f if line.startswith(("VmRSS", "VmHWM")))
+        return {"rss": int(fields["VmRSS"].split()[0]) * 1024, "peak_rss": int(fields["VmHWM"].split()[0]) * 1024}
+    except (OSError, KeyError):
+        import resource
+
+        return {"rss": None, "peak_rss": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024}
+
+
+def model_bytes(encoder):
+    """프로세스 안에 올린 모델 가중치 바이트 (모델 서버 클라이언트면 0)"""
+    model = getattr(encoder, "model", None)
+    if model is None or not hasattr(model, "parameters"):
+        return 0
+    tensors = list(model.parameters()) + list(model.buffers())
+    return sum(t.numel() * t.element_size() for t in tensors)
+
+
+def global_report(encoder=None, caches=None):
+    """프로세스 공용: RSS, 모델 가중치, 공유 캐시({이름: 객체}), 세션 합계, tracemalloc 추적량"""
+    report = dict(process_memory())
+    report["모델 가중치"] = model_bytes(encoder)
+    for name, cache in (caches or {}).items():
+        report[name] = deep_size(cache)
+    sessions = all_sessions()
+    report["세션 수"] = len(sessions)
+    report["세션 합계"] = sum(sessions.values())
+    if tracemalloc.is_tracing():
+        report["tracemalloc 현재"], report["tracemalloc 최대"] = tracemalloc.get_traced_memory()
+    return report
+
+
+# ==================================================
+# tracemalloc 스냅샷 (요청 시에만 켬 - 켜 두면 할당마다 비용이 붙음)
+# ==================================================
+def start_tracing(frames=TRACEMALLOC_FRAMES):
+    if not tracemalloc.is_tracing():
+        tracemalloc.start(frames)
+
+
+def stop_tracing():
+    global _last_snapshot
+    _last_snapshot = None
+    tracemalloc.stop()
+
+
+def allocation_snapshot(limit=TOP_ALLOCATIONS):
+    """
+    코드 줄별 할당 상위 [{"위치", "KB", "개수", "증감 KB"}] (tracemalloc 을 켠 뒤의 할당만 보임).
+    직전 스냅샷이 있으면 그 사이 증감도 함께 보여 줌
+    """
+    global _last_snapshot
+    start_tracing()
+    snapshot = tracemalloc.take_snapshot().filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, "<frozen importlib._bootstrap*>"),
+    ))
+    if _last_snapshot is not None:
+        stats = snapshot.compare_to(_last_snapshot, "lineno")
+    else:
+        stats = snapshot.statistics("lineno")
+    _last_snapshot = snapshot
+
+    rows = []
+    for stat in stats[:limit]:
+        frame = stat.traceback[0]
+        rows.append({
+            "위치": f"{os.path.basename(frame.filename)}:{frame.lineno}",
+            "KB": round(stat.size / 1024, 1),
+            "개수": stat.count,
+            "증감 KB": round(getattr(stat, "size_diff", 0) / 1024, 1),
+        })
+    return rows
+
+
+# ==================================================
+# 세션 메모리 예산
+# ==================================================
+def enforce_budget(state, budget_mb=SESSION_BUDGET_MB, store_dir=PHOTO_STORE_DIR):
+    """
+    세션이 budget_mb 를 넘으면 오래된 사진(먼저 올린 순)의 미리보기부터 디스크로 내림.
+    반환: (보고서, 내린 사진 수, 줄인 바이트)
+    """
+    report = session_report(state)
+    if not budget_mb:
+        return report, 0, 0
+    excess = report["total"] - budget_mb * 2 ** 20
+    evicted = freed = 0
+    for photo in state.get("photos", []):
+        if excess <= 0:
+            break
+        released = evict_preview(photo, store_dir)
+        if released:
+            evicted += 1
+            freed += released
+            excess -= released
+    if evicted:
+        report = session_report(state)
+    return report, evicted, freed
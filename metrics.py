@@ -0,0 +1,252 @@
+"""
+Prometheus 형식 메트릭 (검색/업로드 처리량, 임베딩 지연, 대회별 인덱스 크기, 캐시 적중률)
+대회 전에 워커 수를 정할 수 있도록 앱/모델 서버가 counter / gauge / histogram 을 갱신하고,
+start_http_server() 를 부르면 http://host:port/metrics 에 텍스트 exposition 형식으로 노출합니다.
+
+서버를 켜지 않으면(METRICS_PORT 미설정) 모든 갱신이 플래그 하나만 보고 바로 돌아가서 비용이 거의 없습니다.
+메트릭 정의는 한눈에 보이도록 아래 "메트릭 목록" 에 모아 둡니다.
+
+    METRICS_PORT=9108 streamlit run v3_claude_gemini.py
+    python model_server.py --listen unix:/tmp/clip.sock --metrics-port 9109
+    curl -s 127.0.0.1:9108/metrics
+"""
+
+import bisect
+import logging
+import math
+import os
+import threading
+import time
+from contextlib import contextmanager, nullcontext
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+METRICS_PORT = os.environ.get("METRICS_PORT", "")
+METRICS_HOST = os.environ.get("METRICS_HOST", "127.0.0.1")
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+# 지연 히스토그램 기본 버킷 (초)
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (1, 2, 4, 8, 16, 32, 64, 128)
+
+log = logging.getLogger(__name__)
+
+_enabled = False
+_registry = []
+_server = None
+_NULL = nullcontext()
+
+
+def enabled():
+    return _enabled
+
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_value(value):
+    if value == math.inf:
+        return "+Inf"
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class _Metric:
+    """이름 + 설명 + 레이블 이름. 값은 레이블 값 튜플별로 보관"""
+
+    kind = None
+
+    def __init__(self, name, documentation, labelnames=()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def _key(self, labels):
+        return tuple(str(labels.get(n, "")) for n in self.labelnames)
+
+    def _labels(self, key, extra=()):
+        pairs = list(zip(self.labelnames, key)) + list(extra)
+        if not pairs:
+            return ""
+        return "{" + ",".join(f'{n}="{_escape(v)}"' for n, v in pairs) + "}"
+
+    def _samples(self):
+        with self._lock:
+            return [(self.name, self._labels(key), value) for key, value in sorted(self._values.items())]
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines += [f"{name}{labels} {_format_value(value)}" for name, labels, value in self._samples()]
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def inc(self, amount=1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+
+class Gauge(_Metric):
+    kind = "gauge"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._function = None
+
+    def set_function(self, fn):
+        """
+        값을 저장하지 않고 스크레이프할 때마다 fn() → [(레이블 dict, 값)] 으로 계산 (같은 레이블은 합침).
+        세션별 객체처럼 사라지는 것들의 합을 보고할 때 - inc/dec 를 짝 맞추지 않아도 어긋나지 않음
+        """
+        self._function = fn
+
+    def _samples(self):
+        if self._function is None:
+            return super()._samples()
+        totals = {}
+        for labels, value in self._function():
+            key = self._key(labels)
+            totals[key] = totals.get(key, 0) + value
+        return [(self.name, self._labels(key), value) for key, value in sorted(totals.items())]
+
+    def set(self, value, **labels):
+        if not _enabled:
+            return
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    def inc(self, amount=1, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def dec(self, amount=1, **labels):
+        self.inc(-amount, **labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=LATENCY_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+
+    def observe(self, value, **labels):
+        if not _enabled:
+            return
+        key = self._key(labels)
+        with self._lock:
+            state = self._values.get(key)
+            if state is None:
+                state = self._values[key] = [[0] * (len(self.buckets) + 1), 0.0, 0]  # 버킷별 개수, 합, 개수
+            state[0][bisect.bisect_left(self.buckets, value)] += 1
+            state[1] += value
+            state[2] += 1
+
+    def time(self, **labels):
+        """with HIST.time(kind="image"): ... - 블록 실행 시간(초)을 기록"""
+        if not _enabled:
+            return _NULL
+        return self._timer(labels)
+
+    @contextmanager
+    def _timer(self, labels):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def _samples(self):
+        samples = []
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._values.items())
+        for key, (counts, total, count) in items:
+            cumulative = 0
+            for upper, n in zip(self.buckets + (math.inf,), counts):
+                cumulative += n
+                samples.append((f"{self.name}_bucket", self._labels(key, [("le", _format_value(float(upper)))]), cumulative))
+            samples.append((f"{self.name}_sum", self._labels(key), total))
+            samples.append((f"{self.name}_count", self._labels(key), count))
+        return samples
+
+
+def render():
+    """등록된 모든 메트릭을 텍스트 exposition 형식으로"""
+    return "\n".join(metric.render() for metric in _registry) + "\n"
+
+
+# ==================================================
+# HTTP 노출
+# ==================================================
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?", 1)[0] not in ("/metrics", "/"):
+            self.send_error(404)
+            return
+        body = render().encode("utf-8")
+        self.send_response(200)
+        self.send_header("Content-Type", CONTENT_TYPE)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):  # 스크레이프마다 stderr 에 찍지 않음
+        pass
+
+
+def start_http_server(port=METRICS_PORT, host=METRICS_HOST):
+    """
+    메트릭 수집을 켜고 데몬 스레드에서 /metrics 를 서비스. port 가 비어 있으면 아무것도 하지 않음.
+    한 프로세스에서 한 번만 서버를 띄움 (반환: 서버 또는 None).
+    포트를 이미 다른 프로세스(두 번째 Streamlit 서버 등)가 쓰고 있으면 경고만 남기고 메트릭 없이 None
+    """
+    global _enabled, _server
+    if not port:
+        return None
+    if _server is None:
+        try:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+        except OSError as e:
+            log.warning("메트릭 서버를 띄우지 못해 메트릭을 끕니다 (%s:%s): %s", host, port, e)
+            return None
+        _server.daemon_threads = True
+        threading.Thread(target=_server.serve_forever, name="metrics", daemon=True).start()
+        _enabled = True
+    return _server
+
+
+# ==================================================
+# 메트릭 목록
+# ==================================================
+EMBED_SECONDS = Histogram("clip_embed_seconds", "CLIP 배치 임베딩 지연 (초)", ("kind", "backend"))
+EMBED_ITEMS = Counter("clip_embed_items_total", "CLIP 으로 임베딩한 이미지/문장 수", ("kind", "backend"))
+
+BATCH_SIZE = Histogram("batcher_batch_size", "동적 배치 1회의 요청 수", ("batcher",), buckets=SIZE_BUCKETS)
+BATCH_SECONDS = Histogram("batcher_process_seconds", "동적 배치 1회 처리 시간 (초)", ("batcher",))
+
+SEARCHES = Counter("photo_searches_total", "이용자 검색 수", ("kind",))
+SEARCH_SECONDS = Histogram("photo_search_seconds", "새 검색 1회의 지연 (초)", ("kind",))
+SEARCH_RESULTS = Histogram("photo_search_results", "검색 1회의 결과 사진 수", ("kind",),
+                           buckets=(0, 1, 5, 10, 25, 50, 100, 250))
+
+INGEST_PHOTOS = Counter("photo_ingest_total", "업로드 처리한 사진 수", ("tournament",))
+INGEST_BYTES = Counter("photo_ingest_bytes_total", "업로드된 원본 바이트 수", ("tournament",))
+INGEST_SECONDS = Histogram("photo_ingest_seconds", "사진 1장 업로드 처리 시간 (초)", ("tournament",))
+
+# 살아 있는 세션들의 합 (앱이 set_function 으로 스크레이프 때 계산)
+INDEX_PHOTOS = Gauge("index_photos", "대회별 검색 인덱스의 사진(연사 대표) 수", ("tournament",))
+STORED_PHOTOS = Gauge("stored_photos", "대회별 등록 사진 수 (연사 포함)", ("tournament",))
+
+CACHE_REQUESTS = Counter("cache_requests_total", "캐시 조회 수 (result=hit|miss)", ("cache", "result"))
+SEMANTIC_SIMILARITY = Histogram("semantic_cache_similarity", "의미 캐시 조회 시 가장 가까운 질문과의 코사인 유사도", (),
+                                buckets=(0.3, 0.5, 0.6, 0.7, 0.75, 0.8, 0.85, 0.9, 0.95, 1.0))
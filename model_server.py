@@ -0,0 +1,260 @@
+"""
+공유 CLIP 모델 서버
+Streamlit 프로세스마다 ~600MB CLIP 사본을 올리지 않도록, 모델은 이 서버 프로세스 하나만 갖고
+앱들은 Unix 소켓 또는 localhost TCP 로 임베딩을 요청합니다.
+동시에 들어온 요청은 DynamicBatcher 로 모아 한 번의 배치로 추론합니다.
+
+서버 실행:
+    python model_server.py --listen unix:/tmp/clip.sock
+    python model_server.py --listen 127.0.0.1:8765 --max-batch 32 --max-wait-ms 5
+    python model_server.py --listen unix:/tmp/clip.sock --ready-file /tmp/clip.ready
+    python model_server.py --listen unix:/tmp/clip.sock --metrics-port 9109   # Prometheus /metrics
+앱 쪽 설정:
+    CLIP_SERVER=unix:/tmp/clip.sock streamlit run v3_claude_gemini.py
+
+프로토콜 (요청/응답 동일): [헤더 길이 4B][본문 길이 4B][JSON 헤더][바이너리 본문]
+    embed_images : 헤더 {"op", "sizes": [각 이미지 바이트 수]}, 본문 = 이미지 파일 바이트 이어붙임
+    embed_texts  : 헤더 {"op", "texts": [...]}
+    ping         : 헤더 {"op"}
+    ready        : 헤더 {"op"} → 응답 헤더 {"ok", "ready", "warmup"} (예열이 끝났는지)
+    응답         : 헤더 {"ok", "shape"} + float32 본문, 실패 시 {"ok": false, "error"}
+"""
+
+import argparse
+import io
+import json
+import os
+import socket
+import socketserver
+import struct
+import threading
+
+import numpy as np
+from PIL import Image
+
+from batching import DynamicBatcher
+from metrics import EMBED_SECONDS, EMBED_ITEMS, start_http_server
+from warmup import READY_FILE, warm_up_encoder, mark_ready, clear_ready
+
+_FRAME = struct.Struct(">II")
+
+
+# ==================================================
+# 메시지 송수신
+# ==================================================
+def _recv_exact(sock, size):
+    chunks = []
+    while size:
+        chunk = sock.recv(min(size, 1 << 20))
+        if not chunk:
+            raise ConnectionError("연결이 끊겼습니다")
+        chunks.append(chunk)
+        size -= len(chunk)
+    return b"".join(chunks)
+
+
+def send_message(sock, header, payload=b""):
+    body = json.dumps(header).encode("utf-8")
+    sock.sendall(_FRAME.pack(len(body), len(payload)) + body + payload)
+
+
+def recv_message(sock):
+    header_len, payload_len = _FRAME.unpack(_recv_exact(sock, _FRAME.size))
+    header = json.loads(_recv_exact(sock, header_len))
+    return header, _recv_exact(sock, payload_len)
+
+
+def _parse_address(address):
+    """'unix:/path' → (AF_UNIX, path), 'host:port' → (AF_INET, (host, port))"""
+    if address.startswith("unix:"):
+        return socket.AF_UNIX, address[len("unix:"):]
+    host, port = address.rsplit(":", 1)
+    return socket.AF_INET, (host, int(port))
+
+
+# ==================================================
+# 클라이언트
+# ==================================================
+class ModelClient:
+    """
+    모델 서버 클라이언트. LocalClipEncoder 와 같은 encode_images / encode_texts 인터페이스.
+    스레드마다 연결을 하나씩 유지합니다.
+    """
+
+    def __init__(self, address, timeout=30.0):
+        self.address = address
+        self.timeout = timeout
+        self._local = threading.local()
+
+    def _connect(self):
+        family, addr = _parse_address(self.address)
+        sock = socket.socket(family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(addr)
+        return sock
+
+    def _request(self, header, payload=b""):
+        for attempt in range(2):  # 끊긴 연결은 한 번 다시 연결
+            sock = getattr(self._local, "sock", None)
+            try:
+                if sock is None:
+                    sock = self._local.sock = self._connect()
+                send_message(sock, header, payload)
+                response, body = recv_message(sock)
+                break
+            except (ConnectionError, OSError):
+                self._local.sock = None
+                if attempt:
+                    raise
+        if not response.get("ok"):
+            raise RuntimeError(f"모델 서버 오류: {response.get('error')}")
+        return response, body
+
+    def ping(self):
+        return self._request({"op": "ping"})[0]
+
+    def ready(self):
+        """서버 예열이 끝났으면 True"""
+        return bool(self._request({"op": "ready"})[0].get("ready"))
+
+    def encode_images(self, images):
+        """PIL 이미지 또는 이미지 파일 바이트 목록 → (n, d)"""
+        blobs = []
+        for image in images:
+            if isinstance(image, (bytes, bytearray)):
+                blobs.append(bytes(image))
+            else:
+                buf = io.BytesIO()
+                image.convert("RGB").save(buf, format="JPEG", quality=95)
+                blobs.append(buf.getvalue())
+        with EMBED_SECONDS.time(kind="image", backend="server"):
+            response, body = self._request({"op": "embed_images", "sizes": [len(b) for b in blobs]}, b"".join(blobs))
+        EMBED_ITEMS.inc(len(blobs), kind="image", backend="server")
+        return np.frombuffer(body, dtype=np.float32).reshape(response["shape"])
+
+    def encode_texts(self, texts):
+        texts = list(texts)
+        with EMBED_SECONDS.time(kind="text", backend="server"):
+            response, body = self._request({"op": "embed_texts", "texts": texts})
+        EMBED_ITEMS.inc(len(texts), kind="text", backend="server")
+        return np.frombuffer(body, dtype=np.float32).reshape(response["shape"])
+
+
+_default_client = None
+
+
+def default_client():
+    """CLIP_SERVER 환경변수가 있으면 공유 ModelClient, 없으면 None"""
+    global _default_client
+    address = os.environ.get("CLIP_SERVER")
+    if not address:
+        return None
+    if _default_client is None or _default_client.address != address:
+        _default_client = ModelClient(address)
+    return _default_client
+
+
+# ==================================================
+# 서버
+# ==================================================
+class _Handler(socketserver.BaseRequestHandler):
+    def handle(self):
+        while True:
+            try:
+                header, payload = recv_message(self.request)
+            except (ConnectionError, OSError):
+                return
+            try:
+                result = self.server.dispatch(header, payload)
+                if result is None:
+                    send_message(self.request, {"ok": True})
+                elif isinstance(result, dict):
+                    send_message(self.request, {"ok": True, **result})
+                else:
+                    result = np.ascontiguousarray(result, dtype=np.float32)
+                    send_message(self.request, {"ok": True, "shape": list(result.shape)}, result.tobytes())
+            except Exception as e:
+                send_message(self.request, {"ok": False, "error": str(e)})
+
+
+class _ServerMixin:
+    def setup_batchers(self, encoder, max_batch, max_wait_ms):
+        # 이미지/텍스트 배치를 따로 모음 (모든 연결이 같은 배처를 공유)
+        self.image_batcher = DynamicBatcher(encoder.encode_images, max_batch, max_wait_ms, name="image-batcher")
+        self.text_batcher = DynamicBatcher(encoder.encode_texts, max_batch, max_wait_ms, name="text-batcher")
+        self.ready = False
+        self.warmup_report = None
+
+    def warm_up(self, encoder, ready_file=READY_FILE):
+        """더미 배치로 예열한 뒤 ready 로 표시 (그 전에 들어온 요청도 처리는 됨, 느릴 뿐)"""
+        self.warmup_report = warm_up_encoder(encoder)
+        self.ready = True
+        mark_ready(self.warmup_report, ready_file)
+
+    def dispatch(self, header, payload):
+        op = header.get("op")
+        if op == "ping":
+            return None
+        if op == "ready":
+            return {"ready": self.ready, "warmup": self.warmup_report}
+        if op == "embed_images":
+            images, offset = [], 0
+            for size in header["sizes"]:
+                images.append(Image.open(io.BytesIO(payload[offset:offset + size])).convert("RGB"))
+                offset += size
+            futures = [self.image_batcher.submit(img) for img in images]
+        elif op == "embed_texts":
+            futures = [self.text_batcher.submit(text) for text in header["texts"]]
+        else:
+            raise ValueError(f"알 수 없는 요청: {op}")
+        return np.stack([f.result() for f in futures]) if futures else np.empty((0, 0), dtype=np.float32)
+
+
+class ThreadingTCPModelServer(_ServerMixin, socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class ThreadingUnixModelServer(_ServerMixin, socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def make_server(address, encoder, max_batch=32, max_wait_ms=5.0):
+    family, addr = _parse_address(address)
+    if family == socket.AF_UNIX:
+        if os.path.exists(addr):
+            os.remove(addr)
+        server = ThreadingUnixModelServer(addr, _Handler)
+    else:
+        server = ThreadingTCPModelServer(addr, _Handler)
+    server.setup_batchers(encoder, max_batch, max_wait_ms)
+    return server
+
+
+def main():
+    parser = argparse.ArgumentParser(description="공유 CLIP 모델 서버")
+    parser.add_argument("--listen", default=os.environ.get("CLIP_SERVER", "127.0.0.1:8765"),
+                        help="unix:/경로 또는 host:port (기본: CLIP_SERVER 또는 127.0.0.1:8765)")
+    parser.add_argument("--max-batch", type=int, default=32)
+    parser.add_argument("--max-wait-ms", type=float, default=5.0)
+    parser.add_argument("--ready-file", default=READY_FILE,
+                        help="예열이 끝나면 쓸 준비 완료 파일 (기본: CLIP_READY_FILE)")
+    parser.add_argument("--metrics-port", default="", help="Prometheus /metrics 포트 (비우면 메트릭 끔)")
+    args = parser.parse_args()
+
+    from clip_model import load_local_encoder  # 서버 프로세스만 torch/transformers 를 올림
+
+    clear_ready(args.ready_file)
+    start_http_server(args.metrics_port)
+    encoder = load_local_encoder()
+    server = make_server(args.listen, encoder, args.max_batch, args.max_wait_ms)
+    threading.Thread(target=server.warm_up, args=(encoder, args.ready_file), name="warmup", daemon=True).start()
+    print(f"CLIP 모델 서버 대기 중: {args.listen} (max_batch={args.max_batch}, max_wait={args.max_wait_ms}ms)")
+    try:
+        server.serve_forever()
+    finally:
+        clear_ready(args.ready_file)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,125 @@
+"""
+로컬 CLIP 모델 저장소 (오프라인 배포용)
+운영 서버는 외부 네트워크가 막혀 있어서 from_pretrained("openai/...") 가 허브 조회/타임아웃으로 멈춥니다.
+빌드 단계에서 고정 리비전의 가중치를 safetensors 로 models/clip/ 에 패키징하고 파일별 sha256 을 manifest 에 남겨 두면,
+실행 시에는 체크섬만 확인한 뒤 오프라인 모드로 safetensors 를 mmap 해서 네트워크 호출 없이 로드합니다.
+transformers / huggingface_hub 는 오프라인 설정(HF_HUB_OFFLINE)을 import 할 때 읽으므로, 앱은 transformers 를
+import 하기 전에(app_resources 를 import 할 때, 예열 스레드보다 먼저) offline_if_packaged() 를 부릅니다.
+
+패키징 (네트워크 되는 빌드 머신에서):
+    python model_store.py package --revision <커밋 해시>
+검증:
+    python model_store.py verify
+"""
+
+import argparse
+import hashlib
+import json
+import os
+
+from clip_model import CLIP_MODEL_NAME
+
+MODEL_STORE_DIR = os.environ.get("CLIP_MODEL_DIR", os.path.join("models", "clip"))
+MANIFEST_NAME = "manifest.json"
+HASH_CHUNK = 1 << 20
+
+
+def _sha256(path):
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def has_store(store_dir=MODEL_STORE_DIR):
+    return os.path.exists(os.path.join(store_dir, MANIFEST_NAME))
+
+
+def force_offline():
+    """허브 접근을 끔. transformers / huggingface_hub 가 import 될 때 읽으므로 그 전에 불러야 효과가 있음"""
+    os.environ["HF_HUB_OFFLINE"] = "1"
+    os.environ["TRANSFORMERS_OFFLINE"] = "1"
+
+
+def offline_if_packaged(store_dir=MODEL_STORE_DIR):
+    """로컬 저장소가 있으면 오프라인 모드를 켜고 True (transformers 를 import 하기 전에 부를 것)"""
+    if has_store(store_dir):
+        force_offline()
+        return True
+    return False
+
+
+def package_model(model_name=CLIP_MODEL_NAME, revision="main", store_dir=MODEL_STORE_DIR):
+    """허브에서 받은 모델/프로세서를 safetensors 로 저장하고 manifest(모델명, 리비전, 파일별 sha256) 작성"""
+    from transformers import CLIPModel, CLIPProcessor
+
+    model = CLIPModel.from_pretrained(model_name, revision=revision)
+    processor = CLIPProcessor.from_pretrained(model_name, revision=revision)
+    os.makedirs(store_dir, exist_ok=True)
+    model.save_pretrained(store_dir, safe_serialization=True)
+    processor.save_pretrained(store_dir)
+
+    files = sorted(name for name in os.listdir(store_dir) if name != MANIFEST_NAME)
+    manifest = {
+        "model_name": model_name,
+        "revision": revision,
+        "files": {name: _sha256(os.path.join(store_dir, name)) for name in files},
+    }
+    with open(os.path.join(store_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, ensure_ascii=False, indent=2)
+    return manifest
+
+
+def verify_store(store_dir=MODEL_STORE_DIR):
+    """manifest 의 체크섬과 실제 파일 비교. 빠졌거나 손상된 파일이 있으면 RuntimeError"""
+    with open(os.path.join(store_dir, MANIFEST_NAME), encoding="utf-8") as f:
+        manifest = json.load(f)
+    if not any(name.endswith(".safetensors") for name in manifest["files"]):
+        raise RuntimeError(f"{store_dir} 에 safetensors 가중치가 없습니다")
+    for name, expected in manifest["files"].items():
+        path = os.path.join(store_dir, name)
+        if not os.path.exists(path):
+            raise RuntimeError(f"모델 파일이 없습니다: {path}")
+        if _sha256(path) != expected:
+            raise RuntimeError(f"모델 파일 체크섬이 맞지 않습니다: {path}")
+    return manifest
+
+
+def load_from_store(store_dir=MODEL_STORE_DIR, verify=True):
+    """
+    로컬 저장소에서 (model, processor) 로드. 허브 접근을 끄고(HF_HUB_OFFLINE, 이미 transformers 가 import 됐으면
+    import 시점의 설정이 남으므로 local_files_only 로도 막음) safetensors 가중치를 mmap 으로 읽습니다.
+    """
+    force_offline()
+    if verify:
+        verify_store(store_dir)
+
+    from transformers import CLIPModel, CLIPProcessor
+
+    model = CLIPModel.from_pretrained(store_dir, local_files_only=True, use_safetensors=True)
+    processor = CLIPProcessor.from_pretrained(store_dir, local_files_only=True)
+    return model, processor
+
+
+def main():
+    parser = argparse.ArgumentParser(description="로컬 CLIP 모델 저장소")
+    sub = parser.add_subparsers(dest="command", required=True)
+    pkg = sub.add_parser("package", help="허브에서 받아 safetensors + manifest 로 저장 (네트워크 필요)")
+    pkg.add_argument("--model", default=CLIP_MODEL_NAME)
+    pkg.add_argument("--revision", default="main", help="고정할 허브 리비전 (커밋 해시 권장)")
+    pkg.add_argument("--out", default=MODEL_STORE_DIR)
+    ver = sub.add_parser("verify", help="체크섬 검증")
+    ver.add_argument("--dir", default=MODEL_STORE_DIR)
+    args = parser.parse_args()
+
+    if args.command == "package":
+        manifest = package_model(args.model, args.revision, args.out)
+        print(f"{args.out} 에 저장: {', '.join(manifest['files'])}")
+    else:
+        manifest = verify_store(args.dir)
+        print(f"검증 완료: {manifest['model_name']}@{manifest['revision']} ({len(manifest['files'])}개 파일)")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,89 @@
+"""
+인물 영역(크롭)별 임베딩
+단체 출발 사진처럼 주자가 화면의 일부만 차지하는 경우 전체 프레임 임베딩에 묻히지 않도록,
+CPU 인물 검출기(OpenCV HOG)로 사람 영역을 찾아 크롭마다 임베딩을 따로 만듭니다.
+OpenCV 가 없으면 전체 프레임 임베딩만 사용합니다.
+"""
+
+import numpy as np
+
+from lazy_imports import optional_import
+
+MAX_PERSONS = 6           # 사진 1장당 최대 크롭 수
+DETECT_MAX_SIDE = 800     # 검출용 축소 이미지의 긴 변 (속도용)
+MIN_BOX_AREA = 0.01       # 프레임 대비 최소 박스 면적 비율
+BOX_PADDING = 0.15        # 크롭 시 박스 주변 여백 비율
+NMS_IOU = 0.4
+
+_hog = None
+
+
+def _get_hog():
+    global _hog
+    cv2 = optional_import("cv2")
+    if _hog is None:
+        _hog = cv2.HOGDescriptor()
+        _hog.setSVMDetector(cv2.HOGDescriptor_getDefaultPeopleDetector())
+    return _hog
+
+
+def _iou(a, b):
+    ax1, ay1, ax2, ay2 = a
+    bx1, by1, bx2, by2 = b
+    iw = max(0, min(ax2, bx2) - max(ax1, bx1))
+    ih = max(0, min(ay2, by2) - max(ay1, by1))
+    inter = iw * ih
+    union = (ax2 - ax1) * (ay2 - ay1) + (bx2 - bx1) * (by2 - by1) - inter
+    return inter / union if union else 0.0
+
+
+def detect_person_boxes(image, max_persons=MAX_PERSONS):
+    """PIL 이미지에서 사람 박스 [(x1, y1, x2, y2)] 를 신뢰도 순으로 반환 (원본 좌표)"""
+    if optional_import("cv2") is None:
+        return []
+
+    width, height = image.size
+    scale = min(1.0, DETECT_MAX_SIDE / max(width, height))
+    small = image.convert("L")
+    if scale < 1.0:
+        small = small.resize((int(width * scale), int(height * scale)))
+
+    rects, weights = _get_hog().detectMultiScale(
+        np.asarray(small), winStride=(8, 8), padding=(8, 8), scale=1.05
+    )
+    if len(rects) == 0:
+        return []
+
+    candidates = sorted(zip(np.asarray(weights).flatten(), rects), key=lambda c: -c[0])
+    boxes = []
+    for _, (x, y, w, h) in candidates:
+        box = (int(x / scale), int(y / scale), int((x + w) / scale), int((y + h) / scale))
+        if (box[2] - box[0]) * (box[3] - box[1]) < MIN_BOX_AREA * width * height:
+            continue
+        if any(_iou(box, kept) > NMS_IOU for kept in boxes):
+            continue
+        boxes.append(box)
+        if len(boxes) >= max_persons:
+            break
+    return boxes
+
+
+def expand_box(box, image_size, pad=BOX_PADDING):
+    """박스에 여백을 주고 이미지 범위로 자르기"""
+    x1, y1, x2, y2 = box
+    width, height = image_size
+    dx, dy = (x2 - x1) * pad, (y2 - y1) * pad
+    return (max(0, int(x1 - dx)), max(0, int(y1 - dy)),
+            min(width, int(x2 + dx)), min(height, int(y2 + dy)))
+
+
+def get_multi_crop_embeddings(image, encoder, max_persons=MAX_PERSONS):
+    """
+    전체 프레임 + 인물 크롭을 한 번의 배치로 임베딩 (encoder: clip_model.LocalClipEncoder 또는 ModelClient).
+    반환: (embeddings (1 + 인물 수, d), boxes) - 0번 행은 항상 전체 프레임
+    """
+    image = image.convert("RGB")
+    boxes = detect_person_boxes(image, max_persons=max_persons)
+    crops = [image] + [image.crop(expand_box(b, image.size)) for b in boxes]
+
+    return encoder.encode_images(crops), boxes
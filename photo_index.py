@@ -0,0 +1,438 @@
+"""
+대회별 임베딩 검색 인덱스
+사진마다 cosine_similarity 를 반복 호출하는 대신, 정규화된 임베딩을 하나의 행렬로 모아
+쿼리 1건당 행렬-벡터 곱 한 번으로 전체 유사도를 계산합니다.
+작가 업로드는 작은 delta 버퍼에 바로 들어가 검색되고, 큰 base 행렬은 백그라운드에서만 다시 만듭니다.
+삭제/게시 중단은 tombstone 비트맵으로 즉시 검색에서 빠지고, 주기적인 compaction 이 벡터 공간을 회수합니다.
+벡터는 float16 / int8 / PQ 로 압축 저장할 수 있고(vector_codecs.py), 압축 시에는
+상위 후보만 디스크의 float32 원본으로 다시 계산(re-rank)합니다.
+"""
+
+import os
+import threading
+import time
+import weakref
+from collections import namedtuple
+
+import numpy as np
+
+from vector_codecs import make_codec
+
+RERANK_TOP = 200
+MERGE_ROWS = 4096      # delta 가 이만큼 쌓이면 base 로 병합
+MERGE_SECONDS = 30.0   # 또는 가장 오래된 delta 행이 이만큼 지나면 병합
+COMPACT_RATIO = 0.2    # 삭제된 사진이 전체의 이 비율 이상이면 compaction
+COMPACT_MIN = 64       # (단, 최소 이만큼은 삭제돼야 함)
+
+# 검색 한 번 동안 쓰는 인덱스 상태 (병합/compaction 으로 교체돼도 일관됨)
+Snapshot = namedtuple("Snapshot", "base base_encoded base_slots delta delta_slots n_photos dead exact")
+
+
+def normalize_rows(vectors):
+    """(n, d) 또는 (d,) 벡터를 L2 정규화해서 (n, d) float32 로 반환"""
+    vectors = np.asarray(vectors, dtype=np.float32)
+    if vectors.ndim == 1:
+        vectors = vectors[None, :]
+    norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+    norms[norms == 0] = 1.0
+    return vectors / norms
+
+
+class ExactVectorStore:
+    """
+    압축 인덱스의 재계산용 float32 원본 (디스크에 추가만 하고 memmap 으로 읽음).
+    파일은 첫 append 때 만들고, 저장소 객체가 사라지면 (인덱스/세션 종료, compaction 으로 교체된 뒤
+    진행 중인 검색이 다 놓으면) 함께 지웁니다.
+    """
+
+    def __init__(self, path, dim):
+        self.path = path
+        self.dim = dim
+        self.rows = 0
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        _remove_file(path)
+        weakref.finalize(self, _remove_file, path)
+
+    def append(self, vectors):
+        with open(self.path, "ab") as f:
+            f.write(np.ascontiguousarray(vectors, dtype=np.float32).tobytes())
+        self.rows += len(vectors)
+
+    def get(self, row_indices):
+        if self.rows == 0:
+            return np.empty((0, self.dim), dtype=np.float32)
+        mm = np.memmap(self.path, dtype=np.float32, mode="r", shape=(self.rows, self.dim))
+        return np.asarray(mm[np.asarray(row_indices)])
+
+    def compacted(self, keep, path, chunk=65536):
+        """
+        keep (앞쪽 len(keep) 행에 대한 bool) 인 행만 path 의 새 저장소로 복사.
+        compaction 중에도 행이 계속 추가되므로 앞쪽 len(keep) 행만 매핑. 실패하면 새 파일을 지움
+        """
+        store = ExactVectorStore(path, self.dim)
+        try:
+            if len(keep):
+                mm = np.memmap(self.path, dtype=np.float32, mode="r", shape=(len(keep), self.dim))
+                for start in range(0, len(keep), chunk):
+                    store.append(mm[start:start + chunk][keep[start:start + chunk]])
+        except BaseException:
+            _remove_file(path)
+            raise
+        return store
+
+
+def _remove_file(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+class TournamentIndex:
+    """
+    한 대회의 검색 인덱스.
+    - 한 사진이 여러 벡터(행)를 가질 수 있으며, 검색 결과는 사진별 최고 점수로 합쳐집니다.
+    - storage: "float32" | "float16" | "int8" | "pq". int8/pq 는 벡터가 충분히 쌓이면 학습 후 압축.
+    - exact_path 를 주면 float32 원본을 디스크에 두고 상위 rerank 개 사진을 정확히 다시 계산합니다.
+
+    행은 두 구간으로 나뉩니다.
+    - base: 압축된 큰 행렬. 업로드마다 다시 만들지 않습니다.
+    - delta: 새 업로드를 float32 그대로 받는 작은 버퍼. 추가 즉시 검색에 보이고(base + delta 를 함께 검색),
+      merge_rows 행 이상 쌓이거나 merge_seconds 가 지나면 백그라운드 스레드가 base 로 합칩니다.
+
+    삭제(remove)는 slot 의 tombstone 비트만 켜고 검색 때 그 사진을 제외합니다. 삭제가 쌓이면
+    백그라운드 compaction 이 base/delta/원본 파일에서 해당 행을 지웁니다. slot 번호는 바뀌지 않으므로
+    진행 중인 검색의 점수 배열과 photo_ids 가 어긋나지 않습니다.
+    """
+
+    def __init__(self, dim=512, storage="float32", exact_path=None, rerank=RERANK_TOP,
+                 merge_rows=MERGE_ROWS, merge_seconds=MERGE_SECONDS, background_merge=True):
+        self.dim = dim
+        self.codec = make_codec(storage)
+        self.rerank = rerank
+        self.exact = ExactVectorStore(exact_path, dim) if exact_path else None
+        self._exact_path = exact_path
+        self._generation = 0           # compaction 횟수 (새 원본 파일 이름에 사용)
+        self.merge_rows = merge_rows
+        self.merge_seconds = merge_seconds
+        self.background_merge = background_merge
+        self.photo_ids = []            # slot -> photo_id (삭제된 slot 은 None)
+        self._slot_of = {}             # photo_id -> slot (살아 있는 사진만)
+        self._dead = np.zeros(0, dtype=bool)   # slot tombstone 비트맵
+        self._removed = 0              # 마지막 compaction 이후 삭제된 사진 수
+        self.version = 0               # 추가/삭제/변경마다 증가 (검색 결과 캐시 키용)
+        # base: 학습 전(int8/pq)에는 float32 로 두었다가 학습 후 한꺼번에 압축 (_base_encoded)
+        self._matrix = self.codec.empty(dim) if self.codec.trained else np.empty((0, dim), dtype=np.float32)
+        self._base_encoded = self.codec.trained
+        self._row_slots = np.empty(0, dtype=np.int64)   # base row -> slot
+        # delta: 정규화된 float32 그대로
+        self._delta = np.empty((0, dim), dtype=np.float32)
+        self._delta_slots = np.empty(0, dtype=np.int64)
+        self._delta_since = None       # delta 에 가장 오래 머문 행이 들어온 시각
+        self._pending = []             # [(행별 slot (k,), (k, d) 벡터)] - 다음 검색/병합 때 delta 로 옮김
+        self._lock = threading.RLock()
+        self._merge_lock = threading.Lock()   # 병합과 compaction 은 한 번에 하나만
+        self._maintaining = False             # 백그라운드 병합/compaction 스레드가 도는 중
+
+    def __len__(self):
+        return len(self._slot_of)
+
+    @property
+    def storage(self):
+        return self.codec.name
+
+    @property
+    def nbytes(self):
+        """인덱스가 메모리에 들고 있는 벡터/행 매핑 바이트 수"""
+        with self._lock:
+            self._absorb()
+            return self._matrix.nbytes + self._row_slots.nbytes + self._delta.nbytes + self._delta_slots.nbytes
+
+    @property
+    def delta_rows(self):
+        with self._lock:
+            return len(self._delta) + sum(len(s) for s, _ in self._pending)
+
+    def __contains__(self, photo_id):
+        return photo_id in self._slot_of
+
+    def add(self, photo_id, embedding):
+        """사진 임베딩 추가. embedding 은 (d,), (1, d) 또는 여러 벡터 (k, d)"""
+        vectors = normalize_rows(embedding)
+        if vectors.shape[1] != self.dim:
+            raise ValueError(f"임베딩 차원이 맞지 않습니다: {vectors.shape[1]} != {self.dim}")
+
+        with self._lock:
+            slot = self._slot_for(photo_id)
+            self._push((np.full(len(vectors), slot, dtype=np.int64), vectors))
+        self._maybe_merge()
+
+    def add_many(self, photo_ids, embeddings):
+        """사진마다 벡터 1개씩 한꺼번에 추가 (대량 적재용). embeddings: (n, d)"""
+        vectors = normalize_rows(embeddings)
+        if vectors.shape[1] != self.dim or len(vectors) != len(photo_ids):
+            raise ValueError(f"임베딩 모양이 맞지 않습니다: {vectors.shape} (사진 {len(photo_ids)}장, 차원 {self.dim})")
+
+        with self._lock:
+            slots = np.fromiter((self._slot_for(pid) for pid in photo_ids), dtype=np.int64, count=len(vectors))
+            self._push((slots, vectors))
+        self._maybe_merge()
+
+    def _slot_for(self, photo_id):
+        """photo_id 의 slot (없으면 새로 만듦, lock 안에서 호출)"""
+        slot = self._slot_of.get(photo_id)
+        if slot is None:
+            slot = len(self.photo_ids)
+            if slot >= len(self._dead):
+                self._dead = np.concatenate([self._dead, np.zeros(max(64, len(self._dead)), dtype=bool)])
+            self.photo_ids.append(photo_id)
+            self._slot_of[photo_id] = slot
+        return slot
+
+    def _push(self, entry):
+        self._pending.append(entry)
+        if self._delta_since is None:
+            self._delta_since = time.monotonic()
+        self.version += 1
+
+    def remove(self, photo_id):
+        """사진 삭제 (tombstone - 바로 다음 검색부터 제외). 없던 사진이면 False"""
+        with self._lock:
+            slot = self._slot_of.pop(photo_id, None)
+            if slot is None:
+                return False
+            self._dead[slot] = True
+            self.photo_ids[slot] = None
+            self._removed += 1
+            self.version += 1
+        self._maybe_compact()
+        return True
+
+    def update(self, photo_id, embedding):
+        """사진 임베딩 교체 (기존 벡터는 tombstone, 새 벡터는 delta 로)"""
+        with self._lock:
+            self.remove(photo_id)
+            self.add(photo_id, embedding)
+
+    def rename(self, old_id, new_id):
+        """벡터는 그대로 두고 검색 결과에 나올 photo_id 만 바꿈 (예: 연사 대표 사진 교체)"""
+        with self._lock:
+            slot = self._slot_of.pop(old_id, None)
+            if slot is None:
+                return False
+            self._slot_of[new_id] = slot
+            self.photo_ids[slot] = new_id
+            self.version += 1
+            return True
+
+    # ==================================================
+    # delta → base 병합
+    # ==================================================
+    def _absorb(self):
+        """대기 목록을 delta 로 옮김 (lock 안에서 호출). delta 는 작으므로 복사 비용도 작음"""
+        if not self._pending:
+            return
+        new_rows = np.concatenate([v for _, v in self._pending])
+        new_slots = np.concatenate([s for s, _ in self._pending])
+        self._pending = []
+        if self.exact is not None:
+            self.exact.append(new_rows)  # 원본 파일 행 순서 = base 행 + delta 행
+        self._delta = np.concatenate([self._delta, new_rows])
+        self._delta_slots = np.concatenate([self._delta_slots, new_slots])
+
+    def _merge_due(self):
+        since = self._delta_since   # 병합이 끝나며 None 으로 바꿀 수 있으므로 한 번만 읽음
+        if since is None:
+            return False
+        return self.delta_rows >= self.merge_rows or time.monotonic() - since >= self.merge_seconds
+
+    def _maybe_merge(self):
+        """병합 조건이 되면 백그라운드 병합 시작 (이미 병합/compaction 중이면 건너뜀)"""
+        if not self._maintaining and self._merge_due():
+            self._run_maintenance(self.merge, "index-merge")
+
+    def _maybe_compact(self):
+        """삭제분이 저장된 행(살아 있는 사진 + 아직 회수 안 된 삭제분)의 COMPACT_RATIO 이상이면 compaction.
+        photo_ids 는 회수한 slot 도 계속 남아 있으므로 기준으로 쓰면 갈수록 compaction 이 늦어짐"""
+        stored = len(self._slot_of) + self._removed
+        if not self._maintaining and self._removed >= max(COMPACT_MIN, COMPACT_RATIO * stored):
+            self._run_maintenance(self.compact, "index-compact")
+
+    def _run_maintenance(self, job, name):
+        if not self.background_merge:
+            job()
+            return
+        with self._lock:
+            if self._maintaining:
+                return
+            self._maintaining = True
+
+        def run():
+            try:
+                job()
+            finally:
+                self._maintaining = False
+
+        threading.Thread(target=run, name=name, daemon=True).start()
+
+    def merge(self):
+        """
+        delta 를 base 로 합침. 새 base 는 lock 밖에서 만들고 교체만 lock 안에서 하므로
+        병합 중에도 검색/추가가 막히지 않습니다 (그동안 들어온 행은 delta 에 남음).
+        """
+        with self._merge_lock:
+            with self._lock:
+                self._absorb()
+                delta, delta_slots = self._delta, self._delta_slots
+                base, base_encoded = self._matrix, self._base_encoded
+            if not len(delta):
+                return
+
+            if base_encoded:
+                new_base = np.concatenate([base, self.codec.encode(delta)])
+            else:
+                new_base = np.concatenate([base, delta])
+                if len(new_base) >= self.codec.min_train:
+                    self.codec.train(new_base)
+                    new_base, base_encoded = self.codec.encode(new_base), True
+
+            with self._lock:
+                n = len(delta)
+                self._matrix, self._base_encoded = new_base, base_encoded
+                self._row_slots = np.concatenate([self._row_slots, delta_slots])
+                self._delta, self._delta_slots = self._delta[n:], self._delta_slots[n:]
+                self._delta_since = time.monotonic() if len(self._delta) or self._pending else None
+
+    def compact(self):
+        """
+        삭제된 사진의 행을 base/delta/원본 파일에서 제거해 공간 회수.
+        새 배열/파일은 lock 밖에서 만들고, 그동안 추가된 delta 행과 원본 행만 lock 안에서 덧붙입니다.
+        """
+        with self._merge_lock:
+            with self._lock:
+                snap = self._snapshot()
+                dead = snap.dead
+                removed = self._removed
+            base_keep = ~dead[snap.base_slots]
+            delta_keep = ~dead[snap.delta_slots]
+
+            exact = None
+            if snap.exact is not None:
+                self._generation += 1
+                exact = snap.exact.compacted(np.concatenate([base_keep, delta_keep]),
+                                             f"{self._exact_path}.{self._generation}")
+
+            with self._lock:
+                n = len(snap.delta)
+                self._matrix, self._row_slots = snap.base[base_keep], snap.base_slots[base_keep]
+                self._delta = np.concatenate([snap.delta[delta_keep], self._delta[n:]])
+                self._delta_slots = np.concatenate([snap.delta_slots[delta_keep], self._delta_slots[n:]])
+                if exact is not None:
+                    old = self.exact
+                    exact.append(old.get(np.arange(len(snap.base_slots) + n, old.rows)))
+                    self.exact = exact  # 옛 파일은 진행 중인 검색이 다 놓으면 삭제됨 (ExactVectorStore)
+                self._removed -= removed
+
+    # ==================================================
+    # 점수 계산
+    # ==================================================
+    def _snapshot(self):
+        """tombstone 비트맵은 복사 (remove() 가 제자리에서 바꾸므로 검색 중인 배열과 공유하면 안 됨)"""
+        with self._lock:
+            self._absorb()
+            n_photos = len(self.photo_ids)
+            return Snapshot(self._matrix, self._base_encoded, self._row_slots, self._delta, self._delta_slots,
+                            n_photos, self._dead[:n_photos].copy(), self.exact)
+
+    def _row_scores(self, matrix, encoded, queries):
+        """(n 행, m 쿼리) 점수 행렬 (압축 저장이면 근사값)"""
+        if encoded:
+            return self.codec.scores(matrix, queries)
+        return matrix @ queries.T
+
+    def _decode_rows(self, snap, mask):
+        """mask (base 행 + delta 행) 에 해당하는 벡터를 float32 로"""
+        if snap.exact is not None:
+            return snap.exact.get(np.flatnonzero(mask))
+        base_mask, delta_mask = mask[:len(snap.base_slots)], mask[len(snap.base_slots):]
+        base_rows = self.codec.decode(snap.base[base_mask]) if snap.base_encoded else snap.base[base_mask]
+        return np.concatenate([base_rows, snap.delta[delta_mask]])
+
+    def _rerank(self, best, queries, snap):
+        """쿼리별 근사 점수 상위 사진들의 base 행을 float32 원본으로 다시 계산해서 best (사진, 쿼리) 를 갱신"""
+        in_top = np.zeros(len(best), dtype=bool)
+        for j in range(best.shape[1]):
+            in_top[np.argsort(-best[:, j])[:self.rerank]] = True
+        mask = in_top[snap.base_slots]
+
+        exact_scores = snap.exact.get(np.flatnonzero(mask)) @ queries.T
+        best[in_top] = -np.inf
+        np.maximum.at(best, snap.base_slots[mask], exact_scores)
+
+    def score_matrix(self, query_embs):
+        """
+        (사진 수, 쿼리 수) 사진별 최고 코사인 유사도 행렬 (slot 순서).
+        쿼리가 여러 개여도 저장된 벡터와의 행렬곱은 base/delta 각각 한 번만 합니다.
+        """
+        self._maybe_merge()
+        self._maybe_compact()
+        snap = self._snapshot()
+        queries = normalize_rows(query_embs)
+        best = np.full((snap.n_photos, len(queries)), -np.inf, dtype=np.float32)
+        dead = snap.dead
+        if len(snap.base):
+            np.maximum.at(best, snap.base_slots, self._row_scores(snap.base, snap.base_encoded, queries))
+            best[dead] = -np.inf  # 삭제된 사진이 재계산 후보 자리를 차지하지 않게
+            if snap.exact is not None and self.rerank and self.codec.name != "float32" and snap.base_encoded:
+                self._rerank(best, queries, snap)
+        if len(snap.delta):
+            np.maximum.at(best, snap.delta_slots, snap.delta @ queries.T)
+        best[dead] = -np.inf
+        return best
+
+    def scores(self, query_emb, fuse="max"):
+        """
+        사진별 유사도 배열 (slot 순서).
+        query_emb 가 여러 쿼리 (m, d) 이면 쿼리 축을 합칩니다.
+        fuse: "max" (쿼리 중 하나만 맞아도 됨) 또는 "mean" (쿼리별 점수 평균)
+        """
+        best = self.score_matrix(query_emb)
+        return best.max(axis=1) if fuse == "max" else best.mean(axis=1)
+
+    def candidate_rows(self, query_emb, top_n, fuse="max"):
+        """
+        상위 top_n 사진의 벡터만 잘라서 반환 (재질의용 후보 집합).
+        반환: (photo_ids, rows (r, d) float32, row_owner (r,) - 각 행이 photo_ids 의 몇 번째인지)
+        """
+        best = self.scores(query_emb, fuse=fuse)
+        top_slots = np.argsort(-best)[:top_n]
+        top_slots = top_slots[best[top_slots] > -np.inf]
+
+        snap = self._snapshot()
+        row_slots = np.concatenate([snap.base_slots, snap.delta_slots])
+        position = np.full(max(snap.n_photos, len(best)), -1, dtype=np.int64)
+        position[top_slots] = np.arange(len(top_slots))
+        mask = position[row_slots] >= 0
+        rows = self._decode_rows(snap, mask)
+        return [self.photo_ids[s] for s in top_slots], rows, position[row_slots[mask]]
+
+    def search(self, query_emb, threshold=None, top_k=None, fuse="max"):
+        """
+        유사도 내림차순 [(photo_id, score)] 반환.
+        threshold: 코사인 유사도 하한 (0~1), top_k: 최대 결과 수
+        """
+        return self.rank(self.scores(query_emb, fuse=fuse), threshold, top_k)
+
+    def rank(self, best, threshold=None, top_k=None):
+        """사진별 점수 배열을 [(photo_id, score)] 내림차순 목록으로"""
+        order = np.argsort(-best)
+        if top_k is not None:
+            order = order[:top_k]
+
+        results = []
+        for slot in order:
+            score = float(best[slot])
+            if score == -np.inf or (threshold is not None and score < threshold):
+                break
+            results.append((self.photo_ids[slot], score))
+        return results
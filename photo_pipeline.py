@@ -0,0 +1,194 @@
+"""
+사진 검색 파이프라인의 UI 없는 부분
+GPX 로드, EXIF 파싱, 업로드 1장 처리(원본 저장 → 축소 디코딩 → 임베딩/해시/썸네일), 지도 HTML, ZIP 내보내기.
+Streamlit 앱(v3_claude_gemini.py)과 벤치마크(benchmarks/bench_pipeline.py)가 같은 코드를 씁니다.
+"""
+
+import base64
+import io
+import uuid
+import zipfile
+from datetime import datetime
+
+import gpxpy
+from PIL import Image, ExifTags
+
+from burst_dedup import compute_phash, compute_dhash
+from person_crops import get_multi_crop_embeddings
+from photo_store import save_original, read_original, get_orientation, reduced_rgb, make_derivatives, PHOTO_STORE_DIR
+from tracing import span
+
+# ==================================================
+# EXIF 안전 파싱
+# ==================================================
+def extract_exif_data(image):
+    try:
+        exif_data = {}
+        raw_exif = image._getexif()
+        if raw_exif:
+            for tag, value in raw_exif.items():
+                decoded = ExifTags.TAGS.get(tag, tag)
+                exif_data[decoded] = value
+        return exif_data
+    except Exception:
+        return {}
+
+def safe_parse_time(exif_data):
+    try:
+        time_str = exif_data.get("DateTime", None)
+        if time_str:
+            return datetime.strptime(time_str, "%Y:%m:%d %H:%M:%S")
+    except Exception:
+        pass
+    return datetime.now()
+
+# ==================================================
+# GPX 로드
+# ==================================================
+def load_gpx_coords(file_path):
+    try:
+        with span("gpx_load"), open(file_path, "r", encoding="utf-8") as f:
+            gpx = gpxpy.parse(f)
+        coords = []
+        for track in gpx.tracks:
+            for seg in track.segments:
+                for point in seg.points:
+                    coords.append((point.latitude, point.longitude))
+        return coords
+    except Exception:
+        return None
+
+# ==================================================
+# 업로드 1장 처리 (작가 모드)
+# ==================================================
+def prepare_upload(data, filename, tournament, latlon, encoder, store_dir=PHOTO_STORE_DIR):
+    """
+    업로드 파일 바이트 → (photo, crop_embs, img). 세션/인덱스에는 아직 넣지 않습니다.
+    photo["embedding"] 은 연사 묶기(assign_burst)용이며, 묶은 뒤에는 지워도 됩니다.
+    img 는 작업 해상도 이미지 (배번/얼굴 인식에 사용).
+    """
+    # 원본 바이트는 그대로 저장 (재인코딩 없음), 디코딩은 작은 파생물/모델 입력용으로만
+    with span("store_original"):
+        path = save_original(data, filename, store_dir)
+    raw = Image.open(io.BytesIO(data))
+    with span("exif"):
+        exif = extract_exif_data(raw)
+        orientation = get_orientation(raw)
+    with span("decode"):
+        img = reduced_rgb(raw) # 작업 해상도(긴 변 2048)로 축소 디코딩 - 24MP 전체 디코딩 없음
+
+    # 임베딩 - 전체 프레임 + 인물 크롭별
+    with span("embedding"):
+        crop_embs, person_boxes = get_multi_crop_embeddings(img, encoder)
+
+    # 썸네일(지도 마커용, Base64) / 미리보기(목록·상세 보기용) - 원본 다운로드는 path 에서
+    with span("derivatives"):
+        thumb, preview = make_derivatives(img)
+    with span("hash"):
+        phash, dhash = compute_phash(img), compute_dhash(img)
+
+    photo = {
+        "id": uuid.uuid4().hex,
+        "name": filename,
+        "lat": latlon[0],
+        "lon": latlon[1],
+        "tournament": tournament,
+        "time": safe_parse_time(exif),
+        "embedding": crop_embs[:1], # 전체 프레임 임베딩
+        "person_boxes": person_boxes, # 인물 크롭 영역 (work_size 기준 좌표)
+        "work_size": img.size,
+        "phash": phash,
+        "dhash": dhash,
+        "thumb": base64.b64encode(thumb).decode(), # 썸네일 Base64
+        "preview": preview, # 미리보기 JPEG 바이트
+        "path": path, # 원본 파일 (업로드 바이트 그대로)
+        "orientation": orientation, # 원본 EXIF 방향 (원본은 회전하지 않음)
+        "size": len(data),
+    }
+    return photo, crop_embs, img
+
+# ==================================================
+# 지도 생성 (사진 마커 포함) - 이용자 모드 디테일 복구
+# ==================================================
+def create_course_map_with_photos(coords, photos):
+    if not coords:
+        return None
+    with span("map_build"):
+        return _build_course_map(coords, photos)
+
+def _build_course_map(coords, photos):
+    import folium
+        
+    center = [sum(c[0] for c in coords) / len(coords), sum(c[1] for c in coords) / len(coords)]
+
+    m = folium.Map(location=center, zoom_start=12, tiles="CartoDB positron")
+    folium.PolyLine(coords, color="#FF4444", weight=4).add_to(m)
+    
+    for p in photos:
+        similarity_percent = p["similarity"]
+        
+        # 유사도에 따른 테두리 색상 설정
+        if similarity_percent >= 90:
+            border_style = '4px solid #FF0000'
+            marker_color = 'red'
+        elif similarity_percent >= 80:
+            border_style = '2px solid #FFA500'
+            marker_color = 'orange'
+        else:
+            border_style = '1px solid #4a90e2'
+            marker_color = 'blue'
+
+        # 팝업 HTML (상세 보기 JS 트리거 포함)
+        popup_html = f"""
+        <div style='width: 250px; font-family: Arial;'>
+            <img src='data:image/jpeg;base64,{p['thumb']}'  
+                  style='width: 100%; border-radius: 8px; margin-bottom: 10px; border: {border_style};'>
+            <div style='background: #f0f7ff; padding: 10px; border-radius: 8px;'>
+                <b style='color: #2c3e50; font-size: 16px;'>📸 {p['name']}</b><br>
+                <hr style='margin: 8px 0; border: none; border-top: 1px solid #ddd;'>
+                <small style='color: #666;'>
+                    📍 <b>위치:</b> {round(p['lat'], 4)}, {round(p['lon'], 4)}<br>
+                    📅 <b>시간:</b> {p['time'].strftime('%Y-%m-%d %H:%M:%S')}<br>
+                    🎯 <b>유사도:</b> <span style='color: {marker_color}; font-weight: bold;'>{p['similarity']:.1f}%</span>
+                </small>
+                <button id='detail_btn_{p['id']}' 
+                        onclick="window.parent.postMessage({{
+                            type: 'streamlit:setSessionState', 
+                            key: 'selected_photo_id', 
+                            value: '{p['id']}'
+                        }}, '*'); window.parent.postMessage({{type: 'streamlit:setSessionState', key: 'show_detail_view', value: true}}, '*'); window.parent.postMessage({{type: 'streamlit:rerun'}}, '*')"
+                        style='background-color: #4a90e2; color: white; border: none; padding: 10px; border-radius: 5px; width: 100%; cursor: pointer; margin-top: 10px;'>
+                        🔍 상세 보기 및 구매
+                </button>
+            </div>
+        </div>
+        """
+        
+        # 썸네일 아이콘 (DivIcon)
+        icon_html = f"""<div style="width: 30px; height: 30px; border-radius: 50%; overflow: hidden; border: {border_style}; box-shadow: 0 0 5px rgba(0,0,0,0.4); background-image: url('data:image/jpeg;base64,{p['thumb']}'); background-size: cover; background-position: center; cursor: pointer;"></div>"""
+        custom_icon = folium.DivIcon(icon_size=(30, 30), icon_anchor=(15, 15), html=icon_html)
+        
+        folium.Marker(
+            [p["lat"], p["lon"]], 
+            popup=folium.Popup(popup_html, max_width=270),
+            icon=custom_icon,
+            tooltip=f"{p['similarity']:.1f}% 유사"
+        ).add_to(m)
+        
+    return m
+
+
+# ==================================================
+# ZIP 내보내기
+# ==================================================
+def create_zip_of_photos(photos):
+    """사진들의 원본을 zip 파일로 묶어 바이트 데이터를 반환합니다."""
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
+        for photo in photos:
+            file_name = f"Photo_Sim_{photo.get('similarity', 0):.1f}_{photo.get('name', 'image.jpg')}"
+            zipf.writestr(file_name, read_original(photo["path"])) # 업로드된 원본 그대로
+    buffer.seek(0)
+    return buffer.getvalue()
+
+
@@ -0,0 +1,292 @@
+"""
+원본 사진 저장소 (pass-through)
+업로드된 파일 바이트를 디코딩/재인코딩하지 않고 그대로 디스크에 저장합니다.
+판매하는 원본 화질이 그대로 유지되고, 사진마다 전체 해상도 JPEG 인코딩에 쓰던 CPU 와 용량을 아낍니다.
+디코딩은 썸네일/미리보기/모델 입력처럼 작게 줄인 파생물을 만들 때만 하고,
+JPEG 는 DCT 단계에서 1/2~1/8 로 줄여 디코딩(draft)해서 24MP 원본을 전부 풀지 않습니다.
+전체 해상도는 원본을 내보낼 때만 필요하며, 그때도 저장된 바이트를 그대로 보냅니다.
+파일 이름은 내용의 sha256 이라 같은 파일을 두 번 올려도 한 번만 저장됩니다.
+저장소는 모든 세션(과 같은 저장소를 쓰는 다른 서버 프로세스)이 함께 쓰므로, 원본 옆에 프로세스마다 참조 파일
+(<파일>.ref.<프로세스 토큰>, 내용은 그 프로세스의 참조 수)을 두고 마지막 참조가 풀릴 때만 원본을 지웁니다.
+갱신은 저장소 파일 락(store_dir/.lock, fcntl)으로 프로세스끼리 직렬화합니다.
+세션 사진은 프로세스가 끝나면 사라지므로, 각 프로세스는 살아 있는 동안 임대 파일(store_dir/owners/<토큰>)에
+flock 을 잡아 두고, sweep_orphans() 가 락이 풀린(끝난) 프로세스의 참조와 참조가 없는 원본을 지웁니다.
+세션 메모리 예산을 넘기면 미리보기 JPEG 도 store_dir/derived/<토큰>/<사진 id>.jpg 로 내려 두고 필요할 때 읽습니다
+(미리보기는 사진마다 따로 두어 다른 사진의 삭제/내리기와 엮이지 않음).
+"""
+
+import hashlib
+import io
+import math
+import os
+import shutil
+import threading
+import uuid
+from contextlib import contextmanager
+
+from PIL import Image, ImageOps
+
+from lazy_imports import optional_import
+
+fcntl = optional_import("fcntl")   # 없으면(Windows) 프로세스 안에서만 직렬화하고, 다른 프로세스의 참조는 정리하지 않음
+
+PHOTO_STORE_DIR = os.environ.get("PHOTO_STORE_DIR", "photo_store")
+ORIENTATION_TAG = 0x0112   # EXIF Orientation (1 = 정방향, 3/6/8 = 180/90/270 회전)
+
+THUMB_SIZE = (150, 150)    # 지도 마커/팝업
+THUMB_QUALITY = 70
+PREVIEW_SIZE = (1280, 1280)  # 목록/상세 보기
+PREVIEW_QUALITY = 85
+REDUCING_GAP = 1.0         # 먼저 정수배 박스 축소(reduce) 후 LANCZOS - 축소 품질은 충분하고 몇 배 빠름
+
+# 작업 해상도: 인물 검출/크롭, 얼굴, 배번 OCR, 미리보기가 모두 이 크기의 이미지에서 만들어짐
+# (배번 OCR 때문에 CLIP 입력 224px 보다 넉넉하게 둠)
+WORK_SIDE = 2048
+QUERY_SIDE = 1024          # 이용자 검색 사진 (얼굴/CLIP 만)
+DERIVED_DIR = "derived"    # 메모리에서 내린 미리보기
+OWNERS_DIR = "owners"      # 서버 프로세스별 임대 파일
+LOCK_NAME = ".lock"
+REF_MARK = ".ref."         # 원본 옆 참조 파일: <원본>.ref.<프로세스 토큰>
+
+PROCESS_TOKEN = uuid.uuid4().hex   # 이 서버 프로세스 (참조/미리보기 파일의 주인)
+_refs_lock = threading.Lock()      # 이 프로세스의 스레드끼리 (프로세스끼리는 저장소 파일 락)
+_leases = {}                       # 절대 경로 store_dir → 열어 둔 채 flock 을 잡은 임대 파일
+
+
+def _write_file(path, data):
+    """임시 파일에 쓴 뒤 교체 (읽는 쪽이 반쯤 쓴 파일을 보지 않게)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.tmp"
+    with open(tmp, "wb") as f:
+        f.write(data)
+    os.replace(tmp, path)
+
+
+def _hold_lease(store_dir):
+    """이 프로세스의 임대 파일에 flock 을 잡아 둠 (프로세스가 끝나면 OS 가 풀어서 sweep_orphans 가 알아챔)"""
+    key = os.path.abspath(store_dir)   # 같은 파일을 두 번 열어 flock 하면 자기 자신을 기다림
+    if key in _leases or fcntl is None:
+        return
+    path = os.path.join(store_dir, OWNERS_DIR, PROCESS_TOKEN)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    lease = open(path, "a")
+    fcntl.flock(lease, fcntl.LOCK_EX)
+    _leases[key] = lease
+
+
+def _owner_alive(store_dir, token):
+    """token 프로세스가 아직 임대 파일 락을 잡고 있는지 (fcntl 이 없으면 알 수 없으므로 살아 있다고 봄)"""
+    if token == PROCESS_TOKEN or fcntl is None:
+        return True
+    try:
+        lease = open(os.path.join(store_dir, OWNERS_DIR, token))
+    except FileNotFoundError:
+        return False
+    with lease:
+        try:
+            fcntl.flock(lease, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            return True
+    return False
+
+
+@contextmanager
+def _store_lock(store_dir):
+    """저장소 전체 락 (참조 파일/원본 생성·삭제를 다른 스레드·프로세스와 직렬화)"""
+    with _refs_lock:
+        if fcntl is None:
+            yield
+            return
+        os.makedirs(store_dir, exist_ok=True)
+        with open(os.path.join(store_dir, LOCK_NAME), "a") as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            _hold_lease(store_dir)   # 락 안에서 (sweep_orphans 가 아직 flock 전인 임대 파일을 지우지 않게)
+            yield                    # 파일을 닫으면 락도 풀림
+
+
+def _store_dir_of(path):
+    """store_dir/ab/abcdef....jpg → store_dir"""
+    return os.path.dirname(os.path.dirname(path))
+
+
+def _ref_path(path):
+    return f"{path}{REF_MARK}{PROCESS_TOKEN}"
+
+
+def _read_count(ref_path):
+    try:
+        with open(ref_path) as f:
+            return int(f.read() or 0)
+    except FileNotFoundError:
+        return 0
+
+
+def _has_refs(path):
+    """어느 프로세스든 path 원본을 참조하고 있는지"""
+    folder, name = os.path.split(path)
+    prefix = name + REF_MARK
+    return any(entry.startswith(prefix) for entry in os.listdir(folder))
+
+
+def save_original(data, filename, store_dir=PHOTO_STORE_DIR):
+    """
+    업로드 바이트를 그대로 저장하고 경로 반환 (store_dir/ab/abcdef....jpg).
+    호출할 때마다 이 프로세스의 참조 수가 1 늘어나므로, 사진을 지울 때는 release_original 로 놓아야 합니다.
+    """
+    digest = hashlib.sha256(data).hexdigest()
+    ext = os.path.splitext(filename)[1].lower() or ".jpg"
+    path = os.path.join(store_dir, digest[:2], digest + ext)
+    with _store_lock(store_dir):
+        if not os.path.exists(path):
+            _write_file(path, data)
+        ref_path = _ref_path(path)
+        _write_file(ref_path, str(_read_count(ref_path) + 1).encode())
+    return path
+
+
+def release_original(path):
+    """이 프로세스의 원본 참조를 하나 놓고, 어느 프로세스도 더 쓰지 않으면 파일을 지움. 반환: 지웠는지"""
+    with _store_lock(_store_dir_of(path)):
+        ref_path = _ref_path(path)
+        refs = _read_count(ref_path) - 1
+        if refs > 0:
+            _write_file(ref_path, str(refs).encode())
+            return False
+        remove_original(ref_path)
+        if os.path.exists(path) and _has_refs(path):
+            return False
+        remove_original(path)
+        return True
+
+
+def sweep_orphans(store_dir=PHOTO_STORE_DIR):
+    """
+    끝난 프로세스의 참조 파일 / 미리보기를 지우고, 참조가 하나도 남지 않은 원본을 지움 (서버 시작 때 한 번).
+    반환: 지운 원본 수
+    """
+    if not os.path.isdir(store_dir):
+        return 0
+    removed = 0
+    with _store_lock(store_dir):
+        alive = {}
+        is_alive = lambda token: alive.setdefault(token, _owner_alive(store_dir, token))
+        for shard in os.listdir(store_dir):
+            folder = os.path.join(store_dir, shard)
+            if shard in (DERIVED_DIR, OWNERS_DIR) or not os.path.isdir(folder):
+                continue
+            originals, referenced = set(), set()
+            for name in os.listdir(folder):
+                if name.endswith(".tmp"):
+                    continue
+                if name.endswith(".refs"):   # 프로세스별 참조 파일 전에 쓰던 참조 수 파일
+                    remove_original(os.path.join(folder, name))
+                elif REF_MARK in name:
+                    original, token = name.split(REF_MARK, 1)
+                    if is_alive(token):
+                        referenced.add(original)
+                    else:
+                        remove_original(os.path.join(folder, name))
+                else:
+                    originals.add(name)
+            for name in originals - referenced:
+                remove_original(os.path.join(folder, name))
+                removed += 1
+
+        derived = os.path.join(store_dir, DERIVED_DIR)
+        for token in os.listdir(derived) if os.path.isdir(derived) else ():
+            if os.path.isdir(os.path.join(derived, token)) and not is_alive(token):
+                shutil.rmtree(os.path.join(derived, token), ignore_errors=True)
+        owners = os.path.join(store_dir, OWNERS_DIR)
+        for token in os.listdir(owners) if os.path.isdir(owners) else ():
+            if not is_alive(token):
+                remove_original(os.path.join(owners, token))
+    return removed
+
+
+def read_original(path):
+    with open(path, "rb") as f:
+        return f.read()
+
+
+def remove_original(path):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def get_orientation(image):
+    """원본 EXIF 의 방향 값 (없으면 1). 원본은 회전하지 않고 이 값만 기록해 둡니다"""
+    try:
+        return int(image.getexif().get(ORIENTATION_TAG, 1))
+    except Exception:
+        return 1
+
+
+def upright_rgb(image):
+    """EXIF 방향대로 세운 RGB 이미지 (파생물/모델 입력용)"""
+    if get_orientation(image) != 1:
+        image = ImageOps.exif_transpose(image)
+    return image if image.mode == "RGB" else image.convert("RGB")
+
+
+def reduced_rgb(image, min_side=WORK_SIDE):
+    """
+    아직 디코딩하지 않은 이미지(Image.open 직후)를 긴 변이 min_side 이상인 범위에서 가장 작게 디코딩해 세운 RGB.
+    JPEG 는 draft (DCT 축소 디코딩, 1/2·1/4·1/8), 그 외 형식은 디코딩 후 정수배 reduce.
+    """
+    scale = min_side / max(image.size)
+    if image.format == "JPEG" and scale < 1:
+        image.draft("RGB", (math.ceil(image.width * scale), math.ceil(image.height * scale)))
+    image.load()
+    factor = max(image.size) // min_side
+    if factor >= 2:
+        reduced = image.reduce(factor)
+        reduced.info = image.info
+        image = reduced
+    return upright_rgb(image)
+
+
+def shrink(image, max_size, reducing_gap=REDUCING_GAP):
+    """비율을 유지해 max_size 안으로 줄인 새 이미지 (이미 작으면 그대로)"""
+    scale = min(max_size[0] / image.width, max_size[1] / image.height)
+    if scale >= 1:
+        return image
+    size = (max(1, round(image.width * scale)), max(1, round(image.height * scale)))
+    return image.resize(size, Image.LANCZOS, reducing_gap=reducing_gap)
+
+
+def evict_preview(photo, store_dir=PHOTO_STORE_DIR):
+    """
+    미리보기 바이트를 store_dir/derived/<프로세스 토큰>/<사진 id>.jpg 로 내리고 photo["preview"] 를 비움
+    (프로세스가 끝나면 sweep_orphans 가 지움). 반환: 메모리에서 뺀 바이트 수
+    """
+    preview = photo.get("preview")
+    if preview is None:
+        return 0
+    path = os.path.join(store_dir, DERIVED_DIR, PROCESS_TOKEN, f"{photo['id']}.jpg")
+    with _store_lock(store_dir):   # 임대 파일을 잡아 둬야 sweep_orphans 가 살아 있는 프로세스의 미리보기로 봄
+        _write_file(path, preview)
+    photo["preview_path"] = path
+    photo["preview"] = None
+    return len(preview)
+
+
+def load_preview(photo):
+    """미리보기 JPEG 바이트 (메모리에서 내렸으면 디스크에서 읽음)"""
+    if photo.get("preview") is not None:
+        return photo["preview"]
+    return read_original(photo["preview_path"])
+
+
+def _jpeg_bytes(image, quality):
+    buf = io.BytesIO()
+    image.save(buf, format="JPEG", quality=quality)
+    return buf.getvalue()
+
+
+def make_derivatives(image):
+    """(썸네일 JPEG, 미리보기 JPEG) - 썸네일은 이미 줄인 미리보기에서 다시 줄임"""
+    preview = shrink(image, PREVIEW_SIZE)
+    thumb = shrink(preview, THUMB_SIZE)
+    return _jpeg_bytes(thumb, THUMB_QUALITY), _jpeg_bytes(preview, PREVIEW_QUALITY)
@@ -0,0 +1,146 @@
+"""
+느린 Streamlit 재실행 샘플링 프로파일러 (opt-in)
+PROFILE_SLOW_MS 를 설정하면 재실행마다 감시 스레드를 붙여 두고, 실행이 그 시간을 넘기면
+그때부터 스크립트 스레드의 스택을 SAMPLE_INTERVAL_MS 마다 sys._current_frames() 로 샘플링합니다.
+빠른 재실행은 대기만 하다 끝나므로 비용이 거의 없고, 느린 재실행만 profiles/ 에
+flamegraph 호환 collapsed stack(.folded) + 메타데이터(.json) 로 남습니다.
+스택 맨 아래(root)에는 그 재실행을 일으킨 위젯/동작을 넣어 flamegraph 에서 바로 보이게 합니다.
+
+    PROFILE_SLOW_MS=800 streamlit run v3_claude_gemini.py
+    flamegraph.pl profiles/20251102-091500_4210ms_select_list_ab12.folded > slow.svg   # 또는 speedscope
+
+(Streamlit 스크립트는 메인 스레드가 아닌 곳에서 돌아서 signal 기반 샘플러는 쓸 수 없습니다.)
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from collections import Counter
+from datetime import datetime
+
+PROFILE_SLOW_MS = float(os.environ.get("PROFILE_SLOW_MS", "0") or 0)   # 0 이면 끔
+PROFILE_DIR = os.environ.get("PROFILE_DIR", "profiles")
+SAMPLE_INTERVAL_MS = 5.0
+MAX_STACK_DEPTH = 128
+MAX_SAMPLE_SECONDS = 60.0   # st.stop() 등으로 끝난 뒤 다음 실행까지 감시가 이어져도 이 이상은 샘플링하지 않음
+MAX_ACTION_KEYS = 3
+
+_SCALAR = (bool, int, float, str)
+
+
+def frame_label(frame):
+    """스택 프레임 이름. 스크립트 최상위(<module>)는 줄 번호까지 붙임 - 최상위 코드가 한 덩어리라서"""
+    code = frame.f_code
+    name = f"{os.path.basename(code.co_filename)}:{code.co_name}"
+    return f"{name}:{frame.f_lineno}" if code.co_name == "<module>" else name
+
+
+def collapse(frame, root_file=None):
+    """
+    프레임 → "바깥;...;안쪽" 문자열. root_file 을 주면 그 파일의 가장 바깥 프레임부터 자르고,
+    스택에 그 파일이 없으면 (스크립트가 돌고 있지 않음) None
+    """
+    frames = []
+    while frame is not None and len(frames) < MAX_STACK_DEPTH:
+        frames.append(frame)
+        frame = frame.f_back
+    frames.reverse()
+    if root_file:
+        root = next((i for i, f in enumerate(frames) if f.f_code.co_filename == root_file), None)
+        if root is None:
+            return None
+        frames = frames[root:]
+    return ";".join(frame_label(f) for f in frames)
+
+
+def widget_snapshot(state):
+    """세션 상태에서 위젯 값처럼 비교 가능한 스칼라 값만 복사"""
+    return {k: v for k, v in state.items() if isinstance(v, _SCALAR)}
+
+
+def detect_action(before, after):
+    """
+    직전 스냅샷과 비교해 이번 재실행을 일으킨 키 (버튼은 True 가 된 키, 나머지는 값이 바뀐 키).
+    키 없는 위젯은 알 수 없어서 "rerun"
+    """
+    changed = [k for k, v in after.items() if k in before and before[k] != v and (v is not False)]
+    changed += [k for k, v in after.items() if k not in before and v is True]
+    return ",".join(sorted(changed)[:MAX_ACTION_KEYS]) or "rerun"
+
+
+class SlowRunSampler:
+    """스레드 하나의 실행 시간을 지켜보다가 threshold_ms 를 넘기면 그때부터 스택을 샘플링"""
+
+    def __init__(self, thread_id, threshold_ms, interval_ms=SAMPLE_INTERVAL_MS, root_file=None, meta=None):
+        self.thread_id = thread_id
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.root_file = root_file
+        self.meta = dict(meta or {})
+        self.samples = Counter()
+        self.started_at = datetime.now()
+        self.elapsed_ms = None
+        self._start = time.perf_counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="slow-run-sampler", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        if self._stop.wait(self.threshold):
+            return
+        deadline = time.perf_counter() + MAX_SAMPLE_SECONDS
+        while not self._stop.is_set() and time.perf_counter() < deadline:
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                return
+            stack = collapse(frame, self.root_file)
+            del frame
+            if stack is not None:
+                self.samples[stack] += 1
+            self._stop.wait(self.interval)
+
+    def stop(self, elapsed_ms=None):
+        """샘플링을 멈춤. elapsed_ms 를 주면 (중간에 끝난 재실행) 그 값을 실행 시간으로 씀"""
+        if self.elapsed_ms is None:
+            self._stop.set()
+            self._thread.join()
+            self.elapsed_ms = elapsed_ms if elapsed_ms is not None else 1000 * (time.perf_counter() - self._start)
+        return self
+
+    @property
+    def slow(self):
+        return self.elapsed_ms is not None and self.elapsed_ms >= 1000 * self.threshold and bool(self.samples)
+
+    def write(self, out_dir=PROFILE_DIR):
+        """느린 실행이었으면 <시각>_<ms>_<동작>.folded / .json 저장 후 .folded 경로 반환, 아니면 None"""
+        if not self.slow:
+            return None
+        action = self.meta.get("action", "rerun")
+        os.makedirs(out_dir, exist_ok=True)
+        slug = re.sub(r"[^0-9A-Za-z_-]+", "_", action)[:60]
+        base = os.path.join(out_dir, f"{self.started_at:%Y%m%d-%H%M%S}_{self.elapsed_ms:.0f}ms_{slug}")
+        root = f"rerun[{action}]"
+        with open(base + ".folded", "w", encoding="utf-8") as f:
+            for stack, count in self.samples.most_common():
+                f.write(f"{root};{stack} {count}\n")
+        meta = {
+            **self.meta,
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "elapsed_ms": round(self.elapsed_ms, 1),
+            "threshold_ms": round(1000 * self.threshold, 1),
+            "interval_ms": round(1000 * self.interval, 2),
+            "samples": sum(self.samples.values()),
+        }
+        with open(base + ".json", "w", encoding="utf-8") as f:
+            json.dump(meta, f, ensure_ascii=False, indent=2)
+        return base + ".folded"
+
+
+def start_sampler(threshold_ms=PROFILE_SLOW_MS, root_file=None, meta=None):
+    """현재 스레드에 대한 SlowRunSampler (threshold_ms 가 0 이면 None - 프로파일링 꺼짐)"""
+    if not threshold_ms:
+        return None
+    return SlowRunSampler(threading.get_ident(), threshold_ms, root_file=root_file, meta=meta)
@@ -0,0 +1,57 @@
+"""
+이용자 검색 마이크로 배치
+대회 당일 저녁처럼 수천 명이 동시에 검색할 때, 요청마다 배치 크기 1 로 CLIP 을 돌리지 않고
+몇 ms 동안 들어온 검색을 모아 한 번에 인코딩하고, 같은 인덱스에 대한 검색은 한 번의 행렬곱으로 처리한 뒤
+결과를 각 세션에 돌려줍니다. 프로세스 전체에서 하나만 만들어 공유합니다 (st.cache_resource).
+"""
+
+from collections import namedtuple
+
+import numpy as np
+
+from batching import DynamicBatcher
+
+QueryRequest = namedtuple("QueryRequest", "index images threshold top_k fuse")
+QueryResult = namedtuple("QueryResult", "results query_embs")
+
+
+class QueryBatcher:
+    def __init__(self, encoder, max_batch=32, max_wait_ms=5.0):
+        self.encoder = encoder
+        self._batcher = DynamicBatcher(self._process, max_batch, max_wait_ms, name="query-batcher")
+
+    @property
+    def mean_batch_size(self):
+        return self._batcher.mean_batch_size
+
+    def search(self, index, images, threshold=None, top_k=None, fuse="max", timeout=None):
+        """
+        이미지 목록으로 index 를 검색 (다른 세션의 요청과 함께 배치 처리).
+        반환: QueryResult(results=[(photo_id, score)], query_embs=(len(images), d))
+        """
+        request = QueryRequest(index, list(images), threshold, top_k, fuse)
+        return self._batcher.submit(request).result(timeout=timeout)
+
+    def _process(self, requests):
+        # 1) 모든 요청의 이미지를 한 번에 인코딩
+        all_embs = self.encoder.encode_images([img for r in requests for img in r.images])
+        offsets = np.cumsum([0] + [len(r.images) for r in requests])
+        embs = [all_embs[offsets[i]:offsets[i + 1]] for i in range(len(requests))]
+
+        # 2) 같은 인덱스를 보는 요청끼리 쿼리를 모아 한 번의 행렬곱
+        groups = {}
+        for i, request in enumerate(requests):
+            groups.setdefault(id(request.index), []).append(i)
+
+        results = [None] * len(requests)
+        for members in groups.values():
+            index = requests[members[0]].index
+            matrix = index.score_matrix(np.concatenate([embs[i] for i in members]))
+            col = 0
+            for i in members:
+                request = requests[i]
+                block = matrix[:, col:col + len(request.images)]
+                col += len(request.images)
+                best = block.max(axis=1) if request.fuse == "max" else block.mean(axis=1)
+                results[i] = QueryResult(index.rank(best, request.threshold, request.top_k), embs[i])
+        return results
@@ -0,0 +1,290 @@
+"""
+러닝 가이드 챗봇 의미 캐시 (chat_cache 앞단)
+chat_cache 는 정규화한 질문이 글자 그대로 같을 때만 적중합니다. 여기서는 첫 질문을 작은 로컬 문장 인코더로
+임베딩해 두고, 새 첫 질문과 코사인 유사도가 threshold 이상인 과거 질문이 있으면 그 답을 돌려줍니다
+("러닝화 추천해줘" ≈ "러닝화 뭐 사야 돼?").
+
+    - 대화 맥락이 섞이면 같은 질문도 답이 달라지므로, 대화 기록 없이 보낸 첫 질문만 대상
+    - 모델 / 생성 옵션 / 시스템 프롬프트(카테고리 주제)가 같은 질문끼리만 비교 (scope)
+    - 숫자가 다른 질문("5km 준비" / "10km 준비")은 유사도가 높아도 적중시키지 않음
+
+인코더는 sentence-transformers 다국어 모델(SEMANTIC_MODEL)이 있으면 그것을, 없으면 오프라인용
+글자 n-gram 해시 인코더를 씁니다. 해시 인코더는 뜻이 아니라 글자 겹침만 보므로 거의 같은 표현만 잡도록
+임계값을 높게 둡니다 (실제 바꿔 말하기는 문장 인코더가 필요).
+인덱스는 프로세스 메모리에만 두고, 시작할 때 chat_cache 의 sqlite 항목으로 다시 채웁니다.
+
+    python -m benchmarks.bench_chat_cache     # 스텁 LLM 으로 적중률 / 오적중 / 절약한 호출 수 확인
+"""
+
+import json
+import os
+import re
+import threading
+import zlib
+
+import numpy as np
+
+from chat_cache import normalize_prompt, normalize_request
+from lazy_imports import optional_import
+from metrics import CACHE_REQUESTS, SEMANTIC_SIMILARITY
+
+SEMANTIC_MODEL = os.environ.get("SEMANTIC_MODEL", "sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2")
+SEMANTIC_THRESHOLD = float(os.environ.get("SEMANTIC_THRESHOLD", "0") or 0)   # 0 이면 인코더 기본값
+SEMANTIC_MAX_ENTRIES = int(os.environ.get("SEMANTIC_MAX_ENTRIES", 5000))
+
+_NUMBER = re.compile(r"\d+(?:\.\d+)?")
+# 해시 인코더가 떼어 내는 부탁/어미 표현 (뜻은 같고 글자만 늘려서 유사도를 흐림)
+_REQUEST_ENDING = re.compile(r"(알려주세요|알려줘|부탁드려요|부탁해요|부탁해|해주세요|해줘|주세요|어떻게해|뭐야|인가요)$")
+
+
+# ==================================================
+# 문장 인코더 (encode_texts(texts) → (n, d) 정규화된 float32)
+# ==================================================
+class NgramHashEncoder:
+    """
+    공백과 끝의 부탁 표현("알려줘", "해주세요" ...)을 뺀 글자 1~3-gram 을 부호 있는 해시로 dim 차원에 모음
+    (의존성 없음, 오프라인 테스트용). 글자 겹침만 보므로 "하프/풀 마라톤" 처럼 한 단어만 다른 질문도
+    0.8 이상이 나와서, 어미만 다른 질문(≈1.0)만 잡도록 임계값을 높게 둠
+    """
+
+    name = "ngram-hash"
+    default_threshold = 0.9
+
+    def __init__(self, dim=4096, ngrams=(1, 2, 3)):
+        self.dim = dim
+        self.ngrams = tuple(ngrams)
+
+    def _vector(self, text):
+        vec = np.zeros(self.dim, dtype=np.float32)
+        chars = normalize_prompt(text).replace(" ", "")
+        chars = _REQUEST_ENDING.sub("", chars) or chars
+        for n in self.ngrams:
+            for i in range(len(chars) - n + 1):
+                h = zlib.crc32(chars[i:i + n].encode("utf-8"))
+                vec[h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        norm = np.linalg.norm(vec)
+        return vec / norm if norm else vec
+
+    def encode_texts(self, texts):
+        return np.stack([self._vector(t) for t in texts]) if texts else np.zeros((0, self.dim), np.float32)
+
+
+class SentenceEncoder:
+    """sentence-transformers 문장 임베딩 (다국어 MiniLM 은 CPU 에서도 질문 1개 수 ms)"""
+
+    default_threshold = 0.85
+
+    def __init__(self, model_name=SEMANTIC_MODEL):
+        sentence_transformers = optional_import("sentence_transformers")
+        self.name = model_name
+        self.model = sentence_transformers.SentenceTransformer(model_name)
+
+    def encode_texts(self, texts):
+        embeddings = self.model.encode(list(texts), normalize_embeddings=True, convert_to_numpy=True)
+        return np.asarray(embeddings, dtype=np.float32)
+
+
+def load_text_encoder(model_name=SEMANTIC_MODEL):
+    """SEMANTIC_MODEL 문장 인코더 (sentence-transformers 가 없거나 로드에 실패하면, 또는 "hash" 면 해시 인코더)"""
+    if model_name and model_name != "hash" and optional_import("sentence_transformers") is not None:
+        try:
+            return SentenceEncoder(model_name)
+        except Exception:
+            pass
+    return NgramHashEncoder()
+
+
+# ==================================================
+# 요청 → (질문, scope)
+# ==================================================
+def first_turn_question(request):
+    """
+    normalize_request() 결과가 첫 질문이면 (질문, scope), 아니면 None.
+    첫 질문은 대화 기록에 먼저 추가된 뒤 보내므로 시스템 프롬프트 뒤에 같은 이용자 메시지만 있음
+    """
+    system = [m["content"] for m in request["messages"] if m["role"] == "system"]
+    rest = [m for m in request["messages"] if m["role"] != "system"]
+    if not rest or any(m["role"] != "user" or m["content"] != rest[-1]["content"] for m in rest):
+        return None
+    scope = json.dumps([request["model"], request["params"], system], ensure_ascii=False, sort_keys=True)
+    return rest[-1]["content"], scope
+
+
+def _numbers(question):
+    return sorted(_NUMBER.findall(question))
+
+
+class SemanticCache:
+    """
+    과거 첫 질문 임베딩 행렬 + 답. 세션/스레드가 공유하므로 행렬 갱신은 락으로 보호.
+    encoder 를 주지 않으면 rebuild_from(백그라운드 예열) 때 load_text_encoder() 로 올림.
+    그 전에는 ready 가 False 이고, cached_completion 은 요청을 붙잡지 않도록 조회/추가를 건너뜀
+    (그동안 받은 답은 chat_cache 에 있으므로 rebuild_from 이 채움).
+    """
+
+    def __init__(self, encoder=None, threshold=SEMANTIC_THRESHOLD, max_entries=SEMANTIC_MAX_ENTRIES):
+        self.encoder = encoder
+        self._threshold = threshold
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._load_lock = threading.Lock()
+        self._matrix = None        # (capacity, d) - 앞의 len(self._entries) 행만 유효
+        self._scopes = np.zeros(0, dtype=np.int32)
+        self._scope_ids = {}       # scope 문자열 → 정수
+        self._entries = []         # [{"question", "scope", "answer", "numbers"}] - 추가 순
+        self._positions = {}       # (질문, scope) → 행 번호
+
+    def __len__(self):
+        return len(self._entries)
+
+    @property
+    def ready(self):
+        """인코더가 올라왔는지 (요청 경로에서 모델 로드/다운로드를 기다리지 않기 위함)"""
+        return self.encoder is not None
+
+    @property
+    def threshold(self):
+        if self._threshold:
+            return self._threshold
+        return getattr(self.encoder, "default_threshold", NgramHashEncoder.default_threshold)
+
+    def _ensure_encoder(self):
+        if self.encoder is None:
+            with self._load_lock:
+                if self.encoder is None:
+                    self.encoder = load_text_encoder()
+        return self.encoder
+
+    def add_many(self, questions, answers, scopes):
+        """(정규화한) 질문들과 답을 추가. 같은 scope 의 같은 질문은 답만 바꿈"""
+        if not questions:
+            return
+        vectors = self._ensure_encoder().encode_texts(questions)
+        with self._lock:
+            for question, answer, scope, vec in zip(questions, answers, scopes, vectors):
+                row = self._positions.get((question, scope))
+                if row is not None:
+                    self._entries[row]["answer"] = answer
+                    continue
+                self._append(question, answer, scope, vec)
+            excess = len(self._entries) - self.max_entries
+            if excess > 0:
+                self._drop_oldest(excess)
+
+    def add(self, question, answer, scope=""):
+        self.add_many([normalize_prompt(question)], [answer], [scope])
+
+    def _append(self, question, answer, scope, vec):
+        n = len(self._entries)
+        if self._matrix is None:
+            self._matrix = np.zeros((64, vec.shape[0]), dtype=np.float32)
+        elif n == len(self._matrix):
+            self._matrix = np.concatenate([self._matrix, np.zeros_like(self._matrix)])
+        if n == len(self._scopes):
+            self._scopes = np.concatenate([self._scopes, np.zeros(max(n, 64), dtype=np.int32)])
+        self._matrix[n] = vec
+        self._scopes[n] = self._scope_ids.setdefault(scope, len(self._scope_ids))
+        self._entries.append({"question": question, "scope": scope, "answer": answer, "numbers": _numbers(question)})
+        self._positions[(question, scope)] = n
+
+    def _drop_oldest(self, count):
+        """먼저 들어온 count 개를 지우고 행을 앞으로 당김 (락 안에서 호출)"""
+        n = len(self._entries)
+        self._matrix[:n - count] = self._matrix[count:n]
+        self._scopes[:n - count] = self._scopes[count:n]
+        del self._entries[:count]
+        self._positions = {(e["question"], e["scope"]): i for i, e in enumerate(self._entries)}
+
+    def lookup(self, question, scope=""):
+        """같은 scope 에서 가장 비슷한 과거 질문이 threshold 이상이면 {"answer", "question", "score"}, 아니면 None"""
+        if self.encoder is None:
+            return None
+        question = normalize_prompt(question)
+        vec = self.encoder.encode_texts([question])[0]
+        numbers = _numbers(question)
+        match = None
+        with self._lock:
+            n = len(self._entries)
+            scope_id = self._scope_ids.get(scope)
+            if n and scope_id is not None:
+                scores = self._matrix[:n] @ vec
+                scores[self._scopes[:n] != scope_id] = -1.0
+                order = np.argsort(-scores)
+                SEMANTIC_SIMILARITY.observe(float(scores[order[0]]))
+                for i in order:
+                    if scores[i] < self.threshold:
+                        break
+                    entry = self._entries[i]
+                    if entry["numbers"] == numbers:
+                        match = {"answer": entry["answer"], "question": entry["question"], "score": float(scores[i])}
+                        break
+        if match is None:
+            self.misses += 1
+            CACHE_REQUESTS.inc(cache="chat_semantic", result="miss")
+        else:
+            self.hits += 1
+            CACHE_REQUESTS.inc(cache="chat_semantic", result="hit")
+        return match
+
+    def rebuild_from(self, response_cache):
+        """
+        chat_cache 의 첫 질문 항목으로 인덱스를 채움 (의미 캐시가 준 답은 제외 - 바꿔 말하기가 이어지며 뜻이 번지지 않게).
+        자주 쓰인 항목이 max_entries 에서 밀려나지 않도록 적게 쓰인 것부터 넣음. 반환: 인덱스 항목 수.
+        인코더를 먼저 올린 뒤 항목을 읽으므로, 그 사이(ready 전)에 요청 경로가 저장한 답도 빠지지 않음
+        """
+        self._ensure_encoder()
+        questions, answers, scopes = [], [], []
+        for entry in reversed(response_cache.entries()):
+            turn = first_turn_question(entry["request"]) if entry["source"] != "semantic" else None
+            if turn is not None:
+                questions.append(turn[0])
+                answers.append(entry["response"])
+                scopes.append(turn[1])
+        self.add_many(questions, answers, scopes)
+        return len(self)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            "encoder": getattr(self.encoder, "name", None),
+            "threshold": self.threshold,
+            "entries": len(self),
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 3) if total else None,
+        }
+
+
+# ==================================================
+# 캐시 → 의미 캐시 → API
+# ==================================================
+def cached_completion(client, model, messages, cache, semantic=None, **params):
+    """
+    정확히 같은 요청(chat_cache) → 비슷한 첫 질문(semantic) → client 호출 순으로 답을 구함.
+    semantic 은 인코더가 올라온 뒤(ready)에만 씀 (요청 중에 문장 인코더를 로드/다운로드하지 않음).
+    반환: (답, 출처 "exact" | "semantic" | "api"), client 가 없어 답을 못 구하면 (None, "unavailable").
+    API 오류는 그대로 올림 (오류 메시지는 어느 캐시에도 저장하지 않음)
+    """
+    cached = cache.get(model, messages, **params)
+    if cached is not None:
+        return cached, "exact"
+
+    use_semantic = semantic is not None and semantic.ready
+    turn = first_turn_question(normalize_request(model, messages, **params)) if use_semantic else None
+    if turn is not None:
+        match = semantic.lookup(*turn)
+        if match is not None:
+            # 같은 표현이 다시 오면 exact 로 적중 (rebuild_from 은 이 항목을 다시 넣지 않음)
+            cache.put(model, messages, match["answer"], source="semantic", **params)
+            return match["answer"], "semantic"
+
+    if client is None:
+        return None, "unavailable"
+    response = client.chat.completions.create(model=model, messages=messages, **params)
+    answer = response.choices[0].message.content
+    cache.put(model, messages, answer, **params)
+    if turn is not None:
+        semantic.add_many([turn[0]], [answer], [turn[1]])
+    return answer, "api"
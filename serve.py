@@ -0,0 +1,27 @@
+"""
+사진 검색 앱 실행기 (서버 시작 시 예열)
+`streamlit run` 은 첫 브라우저 세션이 스크립트를 실행해야 모델을 올리므로, 준비 완료 파일을 기다리는
+readiness probe 와는 서로를 기다리게 됩니다. 이 실행기는 같은 프로세스에서 예열(app_resources.start_app_warmup)을
+먼저 시작한 뒤 Streamlit 서버를 띄웁니다. 예열이 끝나면 CLIP_READY_FILE 이 써집니다.
+
+    CLIP_READY_FILE=/tmp/app.ready python serve.py --server.port 8501
+    (readinessProbe: test -f /tmp/app.ready)
+"""
+
+import sys
+
+from app_resources import start_app_warmup
+
+APP_SCRIPT = "v3_claude_gemini.py"
+
+
+def main():
+    start_app_warmup()
+    from streamlit.web import cli as stcli
+
+    sys.argv = ["streamlit", "run", APP_SCRIPT, *sys.argv[1:]]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
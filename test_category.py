@@ -12,6 +12,8 @@ load_dotenv(overrside=True)
 OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
 
 from openai import OpenAI
+from chat_cache import ResponseCache, start_background_prewarm
+from semantic_cache import SemanticCache, cached_completion
 # openai api 인증 (환경 변수 사용)
 
 if OPENAI_API_KEY:
@@ -90,32 +92,60 @@ categories = {
     ]
 }
 
+# 추천 질문 (메인 페이지 버튼 - 응답 캐시 미리 채우기에도 사용)
+recommended_questions = [
+    "초보자 러닝 시작 방법",
+    "러닝화 추천",
+    "부상 예방 스트레칭",
+    "마라톤 식단"
+]
+
+CHAT_MODEL = "gpt-3.5-turbo"
+CHAT_PARAMS = {"temperature": 0.7, "max_tokens": 1000}
+
+def build_messages(user_message, history, context=""):
+    """API 에 보낼 메시지 목록 (시스템 프롬프트 + 최근 대화 5개 + 질문)"""
+    system_message = f"""당신은 러닝 전문가입니다. 사용자의 러닝 관련 질문에 친절하고 상세하게 답변해주세요.
+        답변은 한국어로 제공하며, 초보자도 이해할 수 있도록 쉽게 설명해주세요.
+        {f'현재 주제: {context}' if context else ''}"""
+    
+    messages = [{"role": "system", "content": system_message}]
+    
+    # 대화 히스토리 추가 (최근 5개만)
+    for msg in history[-5:]:
+        messages.append({"role": msg["role"], "content": msg["content"]})
+    
+    messages.append({"role": "user", "content": user_message})
+    return messages
+
+def common_first_questions():
+    """많은 이용자가 똑같이 보내는 첫 질문 (추천 질문 버튼, 하위 카테고리 'AI에게 질문하기')"""
+    questions = list(recommended_questions)
+    questions += [f"{sub}에 대해 알려주세요" for subs in categories.values() for sub in subs]
+    # 첫 질문은 대화 기록에 먼저 추가된 뒤 응답을 만들므로 같은 모양으로 키를 만듦
+    return [(CHAT_MODEL, build_messages(q, [{"role": "user", "content": q}]), CHAT_PARAMS) for q in questions]
+
+@st.cache_resource
+def load_chat_cache():
+    """
+    영속 응답 캐시 (chat_cache.py) + 첫 질문 의미 캐시 (semantic_cache.py) - 프로세스 공유.
+    시작할 때 fixture/로컬 모델로 자주 나오는 질문을 채우고, 문장 인코더 로드와 의미 캐시 인덱스도 백그라운드에서
+    """
+    cache = ResponseCache()
+    semantic = SemanticCache()
+    start_background_prewarm(cache, common_first_questions(), semantic=semantic)
+    return cache, semantic
+
 # 챗봇 응답 생성 함수
 def get_chatbot_response(user_message, context=""):
-    if not client:
-        return "⚠️ OpenAI API 클라이언트가 초기화되지 않았습니다. .env 파일의 OPENAI_API_KEY를 확인해주세요."
-    
+    messages = build_messages(user_message, st.session_state.chat_history, context)
+    cache, semantic = load_chat_cache()
     try:
-        system_message = f"""당신은 러닝 전문가입니다. 사용자의 러닝 관련 질문에 친절하고 상세하게 답변해주세요.
-        답변은 한국어로 제공하며, 초보자도 이해할 수 있도록 쉽게 설명해주세요.
-        {f'현재 주제: {context}' if context else ''}"""
-        
-        messages = [{"role": "system", "content": system_message}]
-        
-        # 대화 히스토리 추가 (최근 5개만)
-        for msg in st.session_state.chat_history[-5:]:
-            messages.append({"role": msg["role"], "content": msg["content"]})
-        
-        messages.append({"role": "user", "content": user_message})
-        
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=messages,
-            temperature=0.7,
-            max_tokens=1000
-        )
-        
-        return response.choices[0].message.content
+        # 같은 맥락의 같은 질문 → 비슷한 첫 질문 → API 순 (오류 메시지는 저장하지 않음)
+        answer, _ = cached_completion(client, CHAT_MODEL, messages, cache, semantic, **CHAT_PARAMS)
+        if answer is None:
+            return "⚠️ OpenAI API 클라이언트가 초기화되지 않았습니다. .env 파일의 OPENAI_API_KEY를 확인해주세요."
+        return answer
     
     except Exception as e:
         return f"⚠️ 오류가 발생했습니다: {str(e)}"
@@ -252,14 +282,6 @@ elif st.session_state.selected_category is None:
     st.subheader("💡 추천 질문")
     col1, col2, col3, col4 = st.columns(4)
     
-    # 추천 질문 내용 수정 (원래 코드의 오타/비논리적 질문 수정)
-    recommended_questions = [
-        "초보자 러닝 시작 방법",
-        "러닝화 추천",
-        "부상 예방 스트레칭",
-        "마라톤 식단"
-    ]
-    
     cols = [col1, col2, col3, col4]
     for idx, question in enumerate(recommended_questions):
         with cols[idx]:
@@ -0,0 +1,104 @@
+"""
+로컬 모델 저장소(models/clip/)가 있으면 transformers 를 import 하기 전에 오프라인 모드가 켜지고,
+예열 → 모델 로드까지 네트워크 호출이 없는지
+
+transformers 대신 import 시점의 HF_HUB_OFFLINE 을 기록하는 가짜 모듈을 쓰고(실제 라이브러리도 import 할 때 읽음),
+새 프로세스에서 소켓 연결을 막은 채 app_resources import → 예열 스레드의 import → load_from_store 순서로 실행합니다.
+
+    python -m pytest -q tests
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+
+from model_store import MANIFEST_NAME, offline_if_packaged
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 오프라인 설정은 import 시점 값만 보고, 오프라인이 아니고 local_files_only 도 없으면 허브에 접속하는 가짜 transformers
+FAKE_TRANSFORMERS = r"""
+import os
+import socket
+
+OFFLINE_AT_IMPORT = os.environ.get("HF_HUB_OFFLINE") == "1"
+CALLS = []
+
+
+class _Pretrained:
+    @classmethod
+    def from_pretrained(cls, path, **kwargs):
+        CALLS.append({"cls": cls.__name__, "path": path, **kwargs})
+        if not OFFLINE_AT_IMPORT and not kwargs.get("local_files_only"):
+            socket.create_connection(("huggingface.co", 443), timeout=1)
+        return cls()
+
+
+class CLIPModel(_Pretrained):
+    pass
+
+
+class CLIPProcessor(_Pretrained):
+    pass
+"""
+
+CHILD = r"""
+import json, socket, time
+
+def no_network(*args, **kwargs):
+    raise AssertionError("network call")
+
+socket.socket.connect = no_network
+socket.create_connection = no_network
+
+import app_resources
+from lazy_imports import start_background_warmup
+from model_store import load_from_store
+
+status = start_background_warmup(modules=("transformers",))
+while not status["done"]:
+    time.sleep(0.01)
+
+import transformers
+load_from_store()
+print(json.dumps({"offline_store": app_resources.OFFLINE_STORE,
+                  "offline_at_import": transformers.OFFLINE_AT_IMPORT, "calls": transformers.CALLS}))
+"""
+
+
+def make_store(store_dir):
+    os.makedirs(store_dir)
+    weights = os.path.join(store_dir, "model.safetensors")
+    with open(weights, "wb") as f:
+        f.write(b"weights")
+    manifest = {"model_name": "test", "revision": "test",
+                "files": {"model.safetensors": hashlib.sha256(b"weights").hexdigest()}}
+    with open(os.path.join(store_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f)
+
+
+def test_store_loads_offline_without_network(tmp_path):
+    store_dir = str(tmp_path / "clip")
+    make_store(store_dir)
+    fake_dir = tmp_path / "fake"
+    fake_dir.mkdir()
+    (fake_dir / "transformers.py").write_text(FAKE_TRANSFORMERS, encoding="utf-8")
+
+    env = {k: v for k, v in os.environ.items() if k not in ("HF_HUB_OFFLINE", "TRANSFORMERS_OFFLINE", "CLIP_SERVER")}
+    env.update(CLIP_MODEL_DIR=store_dir, PYTHONPATH=os.pathsep.join([str(fake_dir), REPO]))
+    out = subprocess.run([sys.executable, "-c", CHILD], capture_output=True, text=True, env=env, cwd=REPO)
+    assert out.returncode == 0, out.stderr
+    result = json.loads(out.stdout.strip().splitlines()[-1])
+
+    assert result["offline_store"]
+    assert result["offline_at_import"]   # 예열 스레드가 import 하기 전에 켜졌음
+    assert [call["cls"] for call in result["calls"]] == ["CLIPModel", "CLIPProcessor"]
+    assert all(call["local_files_only"] and call["path"] == store_dir for call in result["calls"])
+
+
+def test_no_store_keeps_hub_access(tmp_path, monkeypatch):
+    monkeypatch.delenv("HF_HUB_OFFLINE", raising=False)
+    assert not offline_if_packaged(str(tmp_path))
+    assert "HF_HUB_OFFLINE" not in os.environ
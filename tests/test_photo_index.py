@@ -0,0 +1,106 @@
+"""
+TournamentIndex: 추가한 사진은 바로 검색되고, 삭제한 사진은 바로 검색에서 빠지는지
+(delta 버퍼 / base 병합 / 압축 저장 + 원본 재계산 / compaction 각각에서)
+
+    python -m pytest -q tests
+"""
+
+import numpy as np
+import pytest
+
+from photo_index import COMPACT_MIN, TournamentIndex, normalize_rows
+
+DIM = 32
+
+
+def random_vectors(n, seed=0):
+    return normalize_rows(np.random.default_rng(seed).standard_normal((n, DIM)))
+
+
+def make_index(tmp_path, storage="float32", photos=300, **kwargs):
+    """photos 장을 넣고 base 로 병합한 인덱스 (병합/compaction 은 호출한 스레드에서 바로 실행)"""
+    exact_path = str(tmp_path / "exact.f32") if storage != "float32" else None
+    index = TournamentIndex(dim=DIM, storage=storage, exact_path=exact_path, background_merge=False, **kwargs)
+    index.add_many(list(range(photos)), random_vectors(photos))
+    index.merge()
+    return index
+
+
+def top_id(index, vector):
+    results = index.search(vector, top_k=1)
+    return results[0][0] if results else None
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+def test_added_photo_is_searchable_before_merge(tmp_path, storage):
+    index = make_index(tmp_path, storage)
+    vec = random_vectors(1, seed=1)[0]
+    index.add("new", vec)
+    assert index.delta_rows == 1   # 아직 base 로 병합되지 않음
+    assert top_id(index, vec) == "new"
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+def test_added_photo_is_searchable_after_merge(tmp_path, storage):
+    index = make_index(tmp_path, storage)
+    vec = random_vectors(1, seed=1)[0]
+    index.add("new", vec)
+    index.merge()
+    assert index.delta_rows == 0
+    assert top_id(index, vec) == "new"
+
+
+@pytest.mark.parametrize("storage", ["float32", "float16", "int8"])
+def test_removed_photo_is_not_returned(tmp_path, storage):
+    index = make_index(tmp_path, storage)
+    vectors = random_vectors(300)
+    index.add("delta", random_vectors(1, seed=1)[0])
+
+    assert index.remove(7)
+    assert index.remove("delta")
+    assert not index.remove(7)
+    found = {pid for pid, _ in index.search(np.vstack([vectors[7], random_vectors(1, seed=1)[0]]), top_k=300)}
+    assert 7 not in found and "delta" not in found
+    assert len(index) == 299
+
+
+def test_update_replaces_the_vector(tmp_path):
+    index = make_index(tmp_path)
+    new_vec = random_vectors(1, seed=2)[0]
+    index.update(3, new_vec)
+    assert top_id(index, new_vec) == 3
+    assert 3 not in [pid for pid, _ in index.search(random_vectors(300)[3], top_k=1)]
+
+
+def test_compaction_keeps_live_photos_and_drops_removed(tmp_path):
+    index = make_index(tmp_path, "int8")
+    vectors = random_vectors(300)
+    removed = list(range(0, 300, 2))
+    for photo_id in removed:
+        index.remove(photo_id)   # COMPACT_MIN 개마다 compaction 이 (같은 스레드에서) 돌아감
+    index.compact()              # 마지막 compaction 뒤에 남은 삭제분까지 회수
+
+    assert index.exact.rows == 150
+    for photo_id in (1, 151, 299):
+        assert top_id(index, vectors[photo_id]) == photo_id
+    found = {pid for pid, _ in index.search(vectors[removed], top_k=300)}
+    assert found.isdisjoint(removed)
+
+
+def test_compaction_threshold_follows_live_photos(tmp_path):
+    """compaction 으로 회수한 slot 은 기준에서 빠짐 (남은 100장 중 COMPACT_MIN 장 삭제로 다시 compaction)"""
+    index = make_index(tmp_path, "int8", photos=1000)
+    for photo_id in range(900):
+        index.remove(photo_id)
+    index.compact()
+    for photo_id in range(900, 900 + COMPACT_MIN):
+        index.remove(photo_id)
+    assert index.exact.rows == 100 - COMPACT_MIN
+
+
+def test_rename_keeps_the_vector(tmp_path):
+    index = make_index(tmp_path)
+    vec = random_vectors(300)[5]
+    assert index.rename(5, "burst-rep")
+    assert top_id(index, vec) == "burst-rep"
+    assert 5 not in index
@@ -0,0 +1,73 @@
+"""
+원본 저장소 참조: 여러 서버 프로세스가 같은 원본을 쓰면 마지막 참조가 풀릴 때만 지우고,
+끝난 프로세스가 잡고 있던 참조는 sweep_orphans 가 정리하는지
+
+    python -m pytest -q tests
+"""
+
+import os
+import subprocess
+import sys
+import textwrap
+
+from photo_store import PROCESS_TOKEN, release_original, save_original, sweep_orphans
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA = b"\xff\xd8 same jpeg bytes"
+
+
+def start_process(store_dir, script):
+    """다른 서버 프로세스: 원본을 저장한 뒤 script 를 실행하고, stdin 이 닫힐 때까지 살아 있음"""
+    code = textwrap.dedent(f"""
+        import sys
+        from photo_store import save_original, release_original
+        path = save_original({DATA!r}, "a.jpg", {store_dir!r})
+        {script}
+        print("ready", flush=True)
+        sys.stdin.read()
+    """)
+    proc = subprocess.Popen([sys.executable, "-c", code], cwd=REPO, text=True,
+                            stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+    assert proc.stdout.readline().strip() == "ready"
+    return proc
+
+
+def stop_process(proc):
+    proc.stdin.close()
+    proc.wait(timeout=10)
+
+
+def test_original_kept_while_another_process_references_it(tmp_path):
+    store_dir = str(tmp_path)
+    other = start_process(store_dir, "")
+    try:
+        path = save_original(DATA, "a.jpg", store_dir)
+        assert not release_original(path)   # 다른 프로세스가 아직 참조
+        assert os.path.exists(path)
+    finally:
+        stop_process(other)
+
+
+def test_last_release_across_processes_deletes(tmp_path):
+    store_dir = str(tmp_path)
+    path = save_original(DATA, "a.jpg", store_dir)
+    other = start_process(store_dir, "release_original(path)")
+    stop_process(other)
+    assert os.path.exists(path)
+    assert release_original(path)
+    assert not os.path.exists(path)
+
+
+def test_sweep_frees_references_of_finished_processes(tmp_path):
+    store_dir = str(tmp_path)
+    alive = start_process(store_dir, "")
+    try:
+        assert sweep_orphans(store_dir) == 0   # 살아 있는 프로세스의 참조는 그대로
+        path = save_original(b"only in this process", "b.jpg", store_dir)
+    finally:
+        stop_process(alive)
+
+    assert sweep_orphans(store_dir) == 1       # 끝난 프로세스만 참조하던 원본
+    assert os.path.exists(path)
+    assert release_original(path)
+    assert os.listdir(os.path.join(store_dir, "owners")) == [PROCESS_TOKEN]   # 끝난 프로세스의 임대 파일도 지움
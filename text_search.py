@@ -0,0 +1,89 @@
+"""
+텍스트 → 사진 검색 (CLIP 텍스트 인코더)
+"red singlet", "finish line arch" 같은 문장을 get_text_features 로 임베딩해서
+이미지 인덱스에 그대로 질의합니다. 프롬프트 임베딩은 LRU 캐시에 보관하고,
+자주 쓰는 프롬프트는 서버 시작 시 미리 계산해 둡니다.
+"""
+
+import threading
+from collections import OrderedDict
+
+from metrics import CACHE_REQUESTS
+from photo_index import normalize_rows
+
+# 화면 표시용 한국어 → CLIP 프롬프트 (CLIP 은 영어 문장에서 정확도가 높음)
+COMMON_PROMPTS = {
+    "빨간 싱글렛": "a photo of a runner wearing a red singlet",
+    "파란 상의": "a photo of a runner wearing a blue shirt",
+    "검은 상의": "a photo of a runner wearing a black shirt",
+    "흰 상의": "a photo of a runner wearing a white shirt",
+    "모자 쓴 주자": "a photo of a runner wearing a cap",
+    "선글라스": "a photo of a runner wearing sunglasses",
+    "결승선 아치": "a photo of a marathon finish line arch",
+    "출발선 인파": "a photo of a crowded marathon start line",
+    "급수대": "a photo of runners at a water station",
+    "비 오는 날": "a photo of runners in the rain",
+    "다리 위": "a photo of runners crossing a bridge",
+    "두 팔 들고 환호": "a photo of a runner raising both arms in celebration",
+}
+
+TEXT_TOP_K = 30
+TEXT_SIMILARITY_THRESHOLD = 0.20   # 텍스트-이미지 코사인은 이미지-이미지보다 훨씬 낮게 나옴
+
+
+def to_clip_prompt(query):
+    """한국어 추천 프롬프트면 영어 프롬프트로 바꾸고, 아니면 입력 그대로 사용"""
+    query = " ".join((query or "").split())
+    return COMMON_PROMPTS.get(query, query)
+
+
+class PromptEmbeddingCache:
+    """정규화된 프롬프트 임베딩 LRU 캐시 (여러 세션이 공유하므로 락으로 보호)"""
+
+    def __init__(self, encoder, maxsize=1024):
+        self.encoder = encoder   # clip_model.LocalClipEncoder 또는 model_server.ModelClient
+        self.maxsize = maxsize
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def _key(prompt):
+        return " ".join(prompt.lower().split())
+
+    def _encode(self, prompts):
+        return normalize_rows(self.encoder.encode_texts(prompts))
+
+    def _put(self, key, emb):
+        self._cache[key] = emb
+        self._cache.move_to_end(key)
+        while len(self._cache) > self.maxsize:
+            self._cache.popitem(last=False)
+
+    def get(self, prompt):
+        """프롬프트 임베딩 (d,) 반환 - 캐시에 없으면 인코딩 후 저장"""
+        key = self._key(prompt)
+        with self._lock:
+            if key in self._cache:
+                self.hits += 1
+                self._cache.move_to_end(key)
+                CACHE_REQUESTS.inc(cache="prompt", result="hit")
+                return self._cache[key]
+            self.misses += 1
+        CACHE_REQUESTS.inc(cache="prompt", result="miss")
+
+        emb = self._encode([prompt])[0]
+        with self._lock:
+            self._put(key, emb)
+        return emb
+
+    def warm(self, prompts):
+        """프롬프트 목록을 한 번의 배치로 인코딩해서 캐시에 채워 넣기"""
+        prompts = [p for p in prompts if self._key(p) not in self._cache]
+        if not prompts:
+            return
+        embs = self._encode(prompts)
+        with self._lock:
+            for prompt, emb in zip(prompts, embs):
+                self._put(self._key(prompt), emb)
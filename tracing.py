@@ -0,0 +1,180 @@
+"""
+구간별 소요 시간 추적 (가벼운 tracing)
+`with span("embedding"):` 처럼 감싸면 현재 trace 에 중첩된 구간 시간이 기록됩니다.
+Streamlit 재실행 1회 = trace 1개이며, 끝난 trace 는 TraceStats 가 구간(path)별 히스토그램으로 모읍니다.
+디버그 사이드바에 표로 보여 주고 JSON 으로 내보내서 "이번 재실행이 왜 4초 걸렸나" 를 볼 수 있습니다.
+
+trace 는 스레드별이라 Streamlit 스크립트 스레드에서 부른 함수(photo_pipeline 등)는 자동으로 잡히고,
+trace 가 없는 곳(벤치마크, 백그라운드 스레드)에서는 span 이 아무것도 하지 않습니다.
+"""
+
+import bisect
+import json
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+
+# 히스토그램 버킷 상한 (ms) - 마지막 버킷은 그 이상 전부
+BUCKETS_MS = (1, 2, 5, 10, 25, 50, 100, 250, 500, 1000, 2500, 5000, 10000)
+RECENT_TRACES = 20   # 세션별로 보관할 최근 trace 수
+TOTAL = "(전체)"     # trace 전체 시간의 히스토그램 이름
+
+_local = threading.local()
+
+
+class Trace:
+    """재실행 1회의 구간 기록. spans 는 시작 순서, path 는 바깥 구간부터 "/" 로 이은 이름"""
+
+    def __init__(self, name, meta=None):
+        self.name = name
+        self.meta = dict(meta or {})
+        self.started_at = datetime.now()
+        self.spans = []
+        self.total_ms = None
+        self._t0 = time.perf_counter()
+        self._stack = []
+        self._last_ms = 0.0
+
+    def _now_ms(self):
+        return 1000 * (time.perf_counter() - self._t0)
+
+    def open(self, name):
+        path = f"{self._stack[-1]['path']}/{name}" if self._stack else name
+        record = {"path": path, "depth": len(self._stack), "start_ms": self._now_ms(), "ms": None}
+        self.spans.append(record)
+        self._stack.append(record)
+        return record
+
+    def close(self, record):
+        self._last_ms = self._now_ms()
+        record["ms"] = self._last_ms - record["start_ms"]
+        if record in self._stack:
+            del self._stack[self._stack.index(record):]
+
+    def finish(self, interrupted=False):
+        """
+        trace 종료. interrupted 면 (st.rerun()/st.stop() 으로 스크립트가 중간에 끝난 경우)
+        다음 실행에서 뒤늦게 닫는 것이므로 마지막 구간이 끝난 시각을 전체 시간으로 씁니다.
+        """
+        if self.total_ms is None:
+            for record in reversed(self._stack):
+                self.close(record)
+            self.total_ms = self._last_ms if interrupted else self._now_ms()
+            self.meta["interrupted"] = interrupted
+        return self
+
+    def to_dict(self):
+        return {
+            "name": self.name,
+            "started_at": self.started_at.isoformat(timespec="milliseconds"),
+            "total_ms": None if self.total_ms is None else round(self.total_ms, 2),
+            "meta": self.meta,
+            "spans": [
+                {"path": s["path"], "depth": s["depth"], "start_ms": round(s["start_ms"], 2),
+                 "ms": None if s["ms"] is None else round(s["ms"], 2)}
+                for s in self.spans
+            ],
+        }
+
+
+def start_trace(name="rerun", meta=None):
+    """현재 스레드에 새 trace 를 시작 (이전 trace 는 버림 - 닫는 건 호출한 쪽 책임)"""
+    _local.trace = Trace(name, meta)
+    return _local.trace
+
+
+def current_trace():
+    return getattr(_local, "trace", None)
+
+
+def end_trace(interrupted=False):
+    """현재 스레드의 trace 를 끝내고 반환 (없으면 None)"""
+    trace = current_trace()
+    _local.trace = None
+    return trace.finish(interrupted) if trace is not None else None
+
+
+@contextmanager
+def span(name):
+    """구간 시간 측정. 현재 스레드에 trace 가 없으면 아무것도 하지 않음"""
+    trace = getattr(_local, "trace", None)
+    if trace is None:
+        yield
+        return
+    record = trace.open(name)
+    try:
+        yield
+    finally:
+        trace.close(record)
+
+
+class TraceStats:
+    """끝난 trace 들을 구간(path)별 히스토그램으로 누적 + 최근 trace 보관"""
+
+    def __init__(self, buckets=BUCKETS_MS, keep=RECENT_TRACES):
+        self.buckets = tuple(buckets)
+        self.histograms = {}   # path → {"count", "total_ms", "max_ms", "counts": [버킷별 개수]}
+        self.recent = deque(maxlen=keep)
+
+    def record(self, trace):
+        self.recent.append(trace.to_dict())
+        self._observe(TOTAL, trace.total_ms)
+        for s in trace.spans:
+            if s["ms"] is not None:
+                self._observe(s["path"], s["ms"])
+
+    def _observe(self, path, ms):
+        hist = self.histograms.get(path)
+        if hist is None:
+            hist = self.histograms[path] = {"count": 0, "total_ms": 0.0, "max_ms": 0.0,
+                                            "counts": [0] * (len(self.buckets) + 1)}
+        hist["count"] += 1
+        hist["total_ms"] += ms
+        hist["max_ms"] = max(hist["max_ms"], ms)
+        hist["counts"][bisect.bisect_left(self.buckets, ms)] += 1
+
+    def percentile(self, path, q):
+        """히스토그램으로 근사한 백분위수 (해당 버킷의 상한 - 단, 관측 최댓값을 넘지 않음)"""
+        hist = self.histograms[path]
+        target = q / 100 * hist["count"]
+        seen = 0
+        for i, n in enumerate(hist["counts"]):
+            seen += n
+            if n and seen >= target:
+                upper = self.buckets[i] if i < len(self.buckets) else hist["max_ms"]
+                return round(min(upper, hist["max_ms"]), 1)
+        return round(hist["max_ms"], 1)
+
+    def summary(self):
+        """구간별 [{path, count, mean_ms, p50_ms, p95_ms, max_ms}] - 누적 시간이 큰 순"""
+        rows = []
+        for path, hist in self.histograms.items():
+            rows.append({
+                "path": path,
+                "count": hist["count"],
+                "mean_ms": round(hist["total_ms"] / hist["count"], 1),
+                "p50_ms": self.percentile(path, 50),
+                "p95_ms": self.percentile(path, 95),
+                "max_ms": round(hist["max_ms"], 1),
+            })
+        return sorted(rows, key=lambda r: r["mean_ms"] * r["count"], reverse=True)
+
+    def to_json(self):
+        return json.dumps({
+            "buckets_ms": list(self.buckets),
+            "histograms": self.histograms,
+            "recent": list(self.recent),
+        }, ensure_ascii=False, indent=2)
+
+
+def span_table(trace_dict):
+    """trace 1개를 사이드바 표시용 행으로 (같은 path 는 횟수/합계로 묶음, 들여쓰기로 중첩 표시)"""
+    rows = {}
+    for s in trace_dict["spans"]:
+        row = rows.setdefault(s["path"], {"구간": "  " * s["depth"] + s["path"].rsplit("/", 1)[-1],
+                                         "횟수": 0, "ms": 0.0})
+        row["횟수"] += 1
+        row["ms"] = round(row["ms"] + (s["ms"] or 0.0), 1)
+    return list(rows.values())
@@ -10,14 +10,13 @@ import folium
 from streamlit_folium import folium_static
 import os
 import glob
-import torch
-from transformers import CLIPProcessor, CLIPModel
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import pickle
 import io
 from datetime import datetime
 
+from model_server import default_client
+
 # ==========================================
 # ImageSimilarityFinder 클래스
 # ==========================================
@@ -25,27 +24,37 @@ class ImageSimilarityFinder:
     def __init__(self):
         self.model = None
         self.processor = None
-        self.device = "cuda" if torch.cuda.is_available() else "cpu"
         
     @st.cache_resource
     def load_model(_self):
-        """모델 로드 (캐싱)"""
+        """모델 로드 (캐싱) - torch / transformers 는 몇 초씩 걸리므로 첫 화면이 아니라 여기서 import"""
+        import torch
+        from transformers import CLIPProcessor, CLIPModel
+
+        device = "cuda" if torch.cuda.is_available() else "cpu"
         model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
         processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-        model.to(_self.device)
+        model.to(device)
         return model, processor
     
     def get_image_embedding(self, image):
         """이미지의 임베딩 벡터 생성"""
-        if self.model is None or self.processor is None:
-            self.model, self.processor = self.load_model()
-        
         if isinstance(image, str):
             image = Image.open(image).convert('RGB')
         else:
             image = image.convert('RGB')
-            
-        inputs = self.processor(images=image, return_tensors="pt").to(self.device)
+
+        # CLIP_SERVER 가 설정돼 있으면 공유 모델 서버에 요청 (세션/프로세스마다 모델을 올리지 않음)
+        client = default_client()
+        if client is not None:
+            return client.encode_images([image])
+
+        if self.model is None or self.processor is None:
+            self.model, self.processor = self.load_model()
+
+        import torch
+
+        inputs = self.processor(images=image, return_tensors="pt").to(self.model.device)
         
         with torch.no_grad():
             embedding = self.model.get_image_features(**inputs)
@@ -220,10 +229,8 @@ if mode == "📸 작가 모드":
                         photo['embedding'] = embedding
                         photo['timestamp'] = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
                         
-                        # 이미지를 바이트로 변환하여 저장
-                        img_byte_arr = io.BytesIO()
-                        photo['image'].save(img_byte_arr, format='PNG')
-                        photo['image_bytes'] = img_byte_arr.getvalue()
+                        # 업로드된 원본 바이트를 그대로 저장 (PNG 로 다시 저장하면 용량이 몇 배로 커짐)
+                        photo['image_bytes'] = photo['uploaded_file'].getvalue()
                         
                     except Exception as e:
                         st.error(f"❌ {photo['name']} 처리 중 오류: {str(e)}")
@@ -545,7 +552,9 @@ else:
                                 query_image = st.session_state.uploaded_image
                                 query_embedding = st.session_state.image_finder.get_image_embedding(query_image)
                                 
-                                # 저장된 모든 이미지와 유사도 계산
+                                # 저장된 모든 이미지와 유사도 계산 (sklearn 은 검색할 때 처음 import)
+                                from sklearn.metrics.pairwise import cosine_similarity
+
                                 results = []
                                 for saved_photo in st.session_state.saved_photos:
                                     if 'embedding' not in saved_photo:
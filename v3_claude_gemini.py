@@ -4,19 +4,33 @@
 """
 
 import streamlit as st
-from PIL import Image, ExifTags
-import gpxpy
-import folium
-from streamlit_folium import st_folium
-import torch
-from transformers import CLIPProcessor, CLIPModel
+from PIL import Image
 import numpy as np
-from sklearn.metrics.pairwise import cosine_similarity
 import io
-from datetime import datetime, timedelta # timedelta는 시간 계산 호환을 위해 추가
+import os
 import base64
+import hashlib
+import time
+import tracemalloc
 import uuid
-import zipfile
+import weakref
+
+# torch/transformers/folium/cv2 는 필요한 함수 안에서만 import (lazy_imports.py) - 첫 화면을 빨리 띄우기 위함
+import app_resources
+from burst_dedup import assign_burst, move_burst
+from photo_index import TournamentIndex
+from photo_store import release_original, remove_original, reduced_rgb, load_preview, QUERY_SIDE
+from photo_pipeline import load_gpx_coords, prepare_upload, create_course_map_with_photos, create_zip_of_photos
+from text_search import COMMON_PROMPTS, TEXT_TOP_K, TEXT_SIMILARITY_THRESHOLD, to_clip_prompt
+from relevance_feedback import FeedbackSession
+from bib_index import BibIndex, recognize_bibs, normalize_bib
+from face_index import face_models_available, new_face_index, get_face_embeddings, fuse_scores, face_only_scores
+from tracing import TOTAL, TraceStats, start_trace, end_trace, span, span_table
+from profiler import start_sampler, widget_snapshot, detect_action
+from memory_inspector import (SESSION_BUDGET_MB, enforce_budget, record_session, global_report,
+                              allocation_snapshot, stop_tracing)
+from metrics import (start_http_server, SEARCHES, SEARCH_SECONDS, SEARCH_RESULTS, INGEST_PHOTOS, INGEST_BYTES,
+                     INGEST_SECONDS, INDEX_PHOTOS, STORED_PHOTOS, CACHE_REQUESTS)
 
 # ==================================================
 # ⚙️ Streamlit 초기 설정 및 CSS
@@ -48,65 +62,136 @@ st.markdown("""
 st.set_page_config(layout="wide")
 
 # ==================================================
-# EXIF 안전 파싱 (작가 모드 사용)
+# 🔧 구간별 시간 추적 (tracing.py) - 재실행 1회 = trace 1개
 # ==================================================
-def extract_exif_data(image):
-    try:
-        exif_data = {}
-        raw_exif = image._getexif()
-        if raw_exif:
-            for tag, value in raw_exif.items():
-                decoded = ExifTags.TAGS.get(tag, tag)
-                exif_data[decoded] = value
-        return exif_data
-    except Exception:
-        return {}
-
-def safe_parse_time(exif_data):
-    try:
-        time_str = exif_data.get("DateTime", None)
-        if time_str:
-            return datetime.strptime(time_str, "%Y:%m:%d %H:%M:%S")
-    except Exception:
-        pass
-    return datetime.now()
+DEBUG_SIDEBAR = os.environ.get("DEBUG_SIDEBAR") == "1" # 1 이면 사이드바에 구간별 시간 표시
+
+def begin_rerun_trace():
+    """
+    재실행 시작. 이전 실행이 st.rerun()/st.stop() 으로 중간에 끝났으면 그 trace 를 여기서 마무리해 누적.
+    PROFILE_SLOW_MS 가 설정돼 있으면 느린 재실행 샘플러(profiler.py)도 함께 붙임
+    """
+    stats = st.session_state.setdefault("trace_stats", TraceStats())
+    previous = st.session_state.get("trace")
+    if previous is not None:
+        stats.record(previous.finish(interrupted=True))
+        finish_sampler(previous.total_ms)
+
+    # 이번 재실행을 일으킨 위젯 (직전 실행이 끝날 때의 값과 비교)
+    snapshot = widget_snapshot(st.session_state)
+    action = detect_action(st.session_state.get("widget_snapshot", {}), snapshot)
+    st.session_state["widget_snapshot"] = snapshot
+    st.session_state["trace"] = start_trace("rerun", {"mode": st.session_state.get("mode"), "action": action})
+    st.session_state["sampler"] = start_sampler(root_file=__file__, meta={
+        "session": st.session_state.setdefault("session_tag", uuid.uuid4().hex[:8]),
+        "mode": st.session_state.get("mode"),
+        "action": action,
+    })
+
+def finish_sampler(elapsed_ms=None):
+    """샘플러를 멈추고 느린 실행이었으면 collapsed stack 저장"""
+    sampler = st.session_state.get("sampler")
+    st.session_state["sampler"] = None
+    if sampler is not None:
+        sampler.stop(elapsed_ms).write()
+
+def end_rerun_trace():
+    finish_sampler()
+    trace = end_trace()
+    st.session_state["trace"] = None
+    st.session_state["widget_snapshot"] = widget_snapshot(st.session_state)
+    if trace is not None:
+        st.session_state["trace_stats"].record(trace)
+
+def render_trace_sidebar():
+    """직전 재실행의 구간별 시간 + 누적 히스토그램 요약 + JSON 내보내기"""
+    stats = st.session_state["trace_stats"]
+    if not stats.recent:
+        return
+    last = stats.recent[-1]
+    with st.sidebar.expander(f"🔧 디버그: 구간별 시간 ({last['total_ms']:.0f} ms)"):
+        st.dataframe(span_table(last), hide_index=True, use_container_width=True)
+        st.caption(f"누적 {stats.histograms[TOTAL]['count']}회 재실행 (p50/p95 는 히스토그램 버킷 상한)")
+        st.dataframe(stats.summary(), hide_index=True, use_container_width=True)
+        st.download_button("⬇️ JSON 내보내기", stats.to_json(), file_name="trace.json", mime="application/json")
+
+begin_rerun_trace()
 
 # ==================================================
-# GPX 로드
+# 🧠 메모리 점검 / 세션 예산 (memory_inspector.py)
 # ==================================================
-def load_gpx_coords(file_path):
-    try:
-        with open(file_path, "r", encoding="utf-8") as f:
-            gpx = gpxpy.parse(f)
-        coords = []
-        for track in gpx.tracks:
-            for seg in track.segments:
-                for point in seg.points:
-                    coords.append((point.latitude, point.longitude))
-        return coords
-    except Exception:
-        return None
+def enforce_session_budget():
+    """
+    재실행 끝에 세션 메모리를 재고, SESSION_MEMORY_BUDGET_MB 를 넘으면 오래된 미리보기를 디스크로 내림.
+    검색 캐시/피드백 상태는 건드리지 않음 (비우면 다음 재실행에서 검색을 다시 돌리고 이용자 피드백이 사라짐)
+    """
+    report, _, _ = enforce_budget(st.session_state)
+    record_session(st.session_state.setdefault("session_tag", uuid.uuid4().hex[:8]), report)
+    return report
+
+def render_memory_sidebar(report):
+    """세션 항목별 / 프로세스 공용 메모리 + 요청 시 tracemalloc 할당 상위 줄"""
+    to_mb = lambda n: None if n is None else round(n / 2 ** 20, 2)
+    with st.sidebar.expander(f"🧠 메모리: 세션 {to_mb(report['total'])} MB"):
+        st.dataframe([{"항목": name, "MB": to_mb(size)} for name, size in report["categories"].items()],
+                     hide_index=True, use_container_width=True)
+        st.caption(f"사진 {report['photos']}장, 디스크로 내린 미리보기 {report['evicted_previews']}장 "
+                   f"(예산: {f'{SESSION_BUDGET_MB:g} MB' if SESSION_BUDGET_MB else '없음'})")
+        loaded = warmup_status["done"] # 모델이 아직 로드 중이면 여기서 기다리지 않음
+        shared = global_report(load_clip_model() if loaded else None,
+                               {"프롬프트 캐시": load_prompt_cache()} if loaded else None)
+        st.json({name: value if name == "세션 수" else to_mb(value) for name, value in shared.items()})
+        if st.button("📸 할당 스냅샷 (tracemalloc)", help="처음 누르면 추적을 켜고, 이후에는 직전 스냅샷 대비 증감을 보여 줌"):
+            st.dataframe(allocation_snapshot(), hide_index=True, use_container_width=True)
+        if tracemalloc.is_tracing() and st.button("tracemalloc 끄기"):
+            stop_tracing()
 
 # ==================================================
 # CLIP 모델 로드
 # ==================================================
+# 모델/자원은 app_resources.py 가 프로세스에 한 번만 올림 (serve.py 로 띄우면 서버 시작 때 이미 예열됨)
 @st.cache_resource
 def load_clip_model():
-    device = "cuda" if torch.cuda.is_available() else "cpu"
-    model = CLIPModel.from_pretrained("openai/clip-vit-base-patch32")
-    processor = CLIPProcessor.from_pretrained("openai/clip-vit-base-patch32")
-    model.to(device)
-    return model, processor, device
+    """CLIP 인코더: CLIP_SERVER 가 설정돼 있으면 공유 모델 서버(model_server.py), 아니면 프로세스 내 모델"""
+    return app_resources.clip_encoder()
+
+@st.cache_resource
+def load_query_batcher():
+    """동시 검색 마이크로 배처 (프로세스 전체 공유 - 여러 세션의 검색을 모아 한 번에 인코딩/행렬곱)"""
+    return app_resources.query_batcher()
+
+@st.cache_resource
+def load_prompt_cache():
+    """텍스트 프롬프트 임베딩 캐시 (자주 쓰는 프롬프트는 시작할 때 미리 계산)"""
+    return app_resources.prompt_cache()
+
+@st.cache_resource
+def load_face_channel():
+    """얼굴 검출/임베딩 모델 (models/face/ 에 없으면 None → 얼굴 채널 꺼짐)"""
+    return app_resources.face_channel()
+
+@st.cache_resource
+def start_metrics_server():
+    """METRICS_PORT 가 설정돼 있으면 프로세스당 한 번 Prometheus /metrics 서버를 띄움 (metrics.py)"""
+    return start_http_server()
+
+def start_warmup():
+    """
+    예열 진행 상황. serve.py 로 띄웠으면 서버 시작 때 이미 시작됐고(브라우저 접속 없이도 준비 완료 파일이 써짐),
+    streamlit run 으로 바로 띄웠으면 첫 실행에서 시작
+    """
+    return app_resources.start_app_warmup()
 
 # ==================================================
 # 이미지 임베딩
 # ==================================================
-def get_image_embedding(image, model, processor, device):
+def get_image_embedding(image, encoder):
     # image가 PIL Image 객체라고 가정 (작가 모드에서 변환 완료)
-    inputs = processor(images=image.convert("RGB"), return_tensors="pt").to(device) 
-    with torch.no_grad():
-        emb = model.get_image_features(**inputs)
-    return emb.cpu().numpy()
+    return get_image_embeddings([image], encoder)
+
+def get_image_embeddings(images, encoder):
+    """여러 이미지를 한 번의 배치로 임베딩 (n, d)"""
+    return encoder.encode_images(images)
 
 # ==================================================
 # 🖼️ 이미지 표시 및 ZIP 생성 도우미 함수
@@ -117,87 +202,17 @@ def image_bytes_to_st_image(image_bytes, **kwargs):
     """
     st.image(io.BytesIO(image_bytes), **kwargs)
 
-def create_zip_of_selected_photos(photo_markers):
-    """선택된 이미지들을 zip 파일로 만들어 바이트 데이터를 반환합니다."""
-    
-    buffer = io.BytesIO()
-    
-    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zipf:
-        for selected_id in st.session_state["selected_for_download"]:
-            photo = next((p for p in photo_markers if p['id'] == selected_id), None)
-            
-            if photo:
-                file_name = f"Photo_Sim_{photo.get('similarity', 0):.1f}_{photo.get('name', 'image.jpg')}"
-                zipf.writestr(file_name, photo['bytes'])
-            
-    buffer.seek(0)
-    return buffer.getvalue()
-
+def render_folium(m, **kwargs):
+    """folium 지도를 Streamlit 에 표시 (streamlit_folium 은 지도를 그릴 때만 import)"""
+    from streamlit_folium import st_folium
+    with span("map_render"):
+        return st_folium(m, **kwargs)
 
-# ==================================================
-# 지도 생성 (사진 마커 포함) - 이용자 모드 디테일 복구
-# ==================================================
-def create_course_map_with_photos(coords, photos):
-    if not coords:
-        return None
-        
-    center = [sum(c[0] for c in coords) / len(coords), sum(c[1] for c in coords) / len(coords)]
+def create_zip_of_selected_photos(photo_markers):
+    """선택된 이미지들의 원본을 zip 파일로 만들어 바이트 데이터를 반환합니다."""
+    selected = st.session_state["selected_for_download"]
+    return create_zip_of_photos([p for p in photo_markers if p["id"] in selected])
 
-    m = folium.Map(location=center, zoom_start=12, tiles="CartoDB positron")
-    folium.PolyLine(coords, color="#FF4444", weight=4).add_to(m)
-    
-    for p in photos:
-        similarity_percent = p["similarity"]
-        
-        # 유사도에 따른 테두리 색상 설정
-        if similarity_percent >= 90:
-            border_style = '4px solid #FF0000'
-            marker_color = 'red'
-        elif similarity_percent >= 80:
-            border_style = '2px solid #FFA500'
-            marker_color = 'orange'
-        else:
-            border_style = '1px solid #4a90e2'
-            marker_color = 'blue'
-
-        # 팝업 HTML (상세 보기 JS 트리거 포함)
-        popup_html = f"""
-        <div style='width: 250px; font-family: Arial;'>
-            <img src='data:image/jpeg;base64,{p['thumb']}'  
-                  style='width: 100%; border-radius: 8px; margin-bottom: 10px; border: {border_style};'>
-            <div style='background: #f0f7ff; padding: 10px; border-radius: 8px;'>
-                <b style='color: #2c3e50; font-size: 16px;'>📸 {p['name']}</b><br>
-                <hr style='margin: 8px 0; border: none; border-top: 1px solid #ddd;'>
-                <small style='color: #666;'>
-                    📍 <b>위치:</b> {round(p['lat'], 4)}, {round(p['lon'], 4)}<br>
-                    📅 <b>시간:</b> {p['time'].strftime('%Y-%m-%d %H:%M:%S')}<br>
-                    🎯 <b>유사도:</b> <span style='color: {marker_color}; font-weight: bold;'>{p['similarity']:.1f}%</span>
-                </small>
-                <button id='detail_btn_{p['id']}' 
-                        onclick="window.parent.postMessage({{
-                            type: 'streamlit:setSessionState', 
-                            key: 'selected_photo_id', 
-                            value: '{p['id']}'
-                        }}, '*'); window.parent.postMessage({{type: 'streamlit:setSessionState', key: 'show_detail_view', value: true}}, '*'); window.parent.postMessage({{type: 'streamlit:rerun'}}, '*')"
-                        style='background-color: #4a90e2; color: white; border: none; padding: 10px; border-radius: 5px; width: 100%; cursor: pointer; margin-top: 10px;'>
-                        🔍 상세 보기 및 구매
-                </button>
-            </div>
-        </div>
-        """
-        
-        # 썸네일 아이콘 (DivIcon)
-        icon_html = f"""<div style="width: 30px; height: 30px; border-radius: 50%; overflow: hidden; border: {border_style}; box-shadow: 0 0 5px rgba(0,0,0,0.4); background-image: url('data:image/jpeg;base64,{p['thumb']}'); background-size: cover; background-position: center; cursor: pointer;"></div>"""
-        custom_icon = folium.DivIcon(icon_size=(30, 30), icon_anchor=(15, 15), html=icon_html)
-        
-        folium.Marker(
-            [p["lat"], p["lon"]], 
-            popup=folium.Popup(popup_html, max_width=270),
-            icon=custom_icon,
-            tooltip=f"{p['similarity']:.1f}% 유사"
-        ).add_to(m)
-        
-    return m
 
 # ==================================================
 # 세션 초기화
@@ -209,9 +224,23 @@ def init_session():
         "show_detail_view": False,
         "selected_photo_id": None,
         "selected_for_download": set(),
-        "uploaded_image": None,
+        "uploaded_images": [],           # 검색용 본인 사진 (여러 장 가능)
+        "query_hashes": frozenset(),     # 검색용 사진 바이트 해시 (결과 캐시 키)
+        "search_cache": {},
+        "search_key": None,              # 현재 이미지 검색의 캐시 키
+        "feedback": None,                # (search_key, FeedbackSession)
+        "dismissed": set(),              # "내 사진 아님" 으로 뺀 사진
         "photo_markers": [],
         "selected_tournament": None,
+        "bursts": {},        # 연사 묶음 {burst_id: burst}
+        "recent_bursts": {}, # (대회, 위치) 별 최근 연사 ID (연사 묶기 후보)
+        "indexes": {},       # 대회별 검색 인덱스 {tournament: TournamentIndex}
+        "face_indexes": {},  # 대회별 얼굴 인덱스 {tournament: TournamentIndex}
+        "bib_indexes": {},   # 대회별 배번 역색인 {tournament: BibIndex}
+        "bib_query": "",
+        "text_query": "",
+        "face_only_search": True,
+        "new_search": False,             # 검색 버튼을 누른 직후 (메트릭 집계용)
     }
     for k, v in defaults.items():
         if k not in st.session_state:
@@ -219,6 +248,222 @@ def init_session():
 
 init_session()
 
+# 인덱스 벡터 저장 방식: float32 | float16 | int8 | pq (압축 시 상위 후보는 디스크의 float32 원본으로 재계산)
+INDEX_STORAGE = os.environ.get("INDEX_STORAGE", "float16")
+INDEX_STORE_DIR = "index_store"
+
+@st.cache_resource
+def live_tournament_indexes():
+    """
+    프로세스의 모든 세션의 검색 인덱스 {TournamentIndex: {"tournament", "stored"}}.
+    세션이 끝나 인덱스가 사라지면 함께 빠지므로, 대회별 사진 수 gauge 는 스크레이프 때 여기서 합산
+    """
+    registry = weakref.WeakKeyDictionary()
+    INDEX_PHOTOS.set_function(lambda: [({"tournament": e["tournament"]}, len(index)) for index, e in list(registry.items())])
+    STORED_PHOTOS.set_function(lambda: [({"tournament": e["tournament"]}, e["stored"]) for e in list(registry.values())])
+    return registry
+
+def get_tournament_index(tournament):
+    """
+    대회별 검색 인덱스 (연사 대표 사진만 포함).
+    float32 원본 파일은 사진이 추가될 때만 만들어지고, 세션이 끝나 인덱스가 사라지면 함께 지워짐
+    """
+    indexes = st.session_state["indexes"]
+    if tournament not in indexes:
+        exact_path = None
+        if INDEX_STORAGE != "float32":
+            exact_path = os.path.join(INDEX_STORE_DIR, f"{uuid.uuid4().hex}.f32")
+        indexes[tournament] = TournamentIndex(storage=INDEX_STORAGE, exact_path=exact_path)
+        live_tournament_indexes()[indexes[tournament]] = {"tournament": tournament, "stored": 0}
+    return indexes[tournament]
+
+def count_stored_photo(tournament, delta):
+    """이 세션의 대회별 등록 사진 수 (STORED_PHOTOS gauge 용)"""
+    live_tournament_indexes()[get_tournament_index(tournament)]["stored"] += delta
+
+def get_face_index(tournament):
+    """대회별 얼굴 인덱스 (연사 대표 사진만 포함)"""
+    face_indexes = st.session_state["face_indexes"]
+    if tournament not in face_indexes:
+        face_indexes[tournament] = new_face_index()
+    return face_indexes[tournament]
+
+def get_bib_index(tournament):
+    """대회별 배번 역색인"""
+    bib_indexes = st.session_state["bib_indexes"]
+    if tournament not in bib_indexes:
+        bib_indexes[tournament] = BibIndex()
+    return bib_indexes[tournament]
+
+def get_burst_members(photo):
+    """photo 와 같은 연사에 속한 나머지 사진들"""
+    burst = st.session_state["bursts"].get(photo.get("burst_id"))
+    if not burst:
+        return []
+    member_ids = set(burst["members"]) - {photo["id"]}
+    return [p for p in st.session_state["photos"] if p["id"] in member_ids]
+
+# ==================================================
+# 사진 삭제 / 수정
+# ==================================================
+def find_photo(photo_id):
+    return next((p for p in st.session_state["photos"] if p["id"] == photo_id), None)
+
+def delete_photo(photo_id):
+    """
+    사진 삭제 (작가 철회 / 이용자 게시 중단 요청).
+    세션 목록·연사·배번 역색인에서 빼고, 검색/얼굴 인덱스는 tombstone 으로 즉시 검색에서 제외합니다.
+    """
+    photo = find_photo(photo_id)
+    if photo is None:
+        return False
+    st.session_state["photos"].remove(photo)
+    release_original(photo["path"]) # 같은 파일을 (다른 세션의) 다른 사진도 쓰면 참조 수만 줄임
+    if photo.get("preview_path"): # 사진마다 따로 둔 미리보기 파일
+        remove_original(photo["preview_path"])
+    tournament = photo["tournament"]
+    if photo.get("bibs"):
+        get_bib_index(tournament).remove(photo_id, photo["bibs"])
+
+    indexes = (get_tournament_index(tournament), get_face_index(tournament))
+    burst = st.session_state["bursts"].get(photo.get("burst_id"))
+    if burst:
+        burst["members"].remove(photo_id)
+        if not burst["members"]:
+            del st.session_state["bursts"][photo["burst_id"]]
+        elif burst["rep"] == photo_id:
+            # 남은 연사 사진이 대표를 이어받음 (연사는 거의 같은 사진이라 대표의 벡터를 그대로 씀)
+            burst["rep"] = burst["members"][0]
+            for index in indexes:
+                index.rename(photo_id, burst["rep"])
+    for index in indexes:
+        index.remove(photo_id)
+    count_stored_photo(tournament, -1)
+
+    st.session_state["selected_for_download"].discard(photo_id)
+    return True
+
+def takedown_photo(photo_id):
+    """이용자 게시 중단 요청: 같은 연사의 사진까지 모두 삭제"""
+    photo = find_photo(photo_id)
+    if photo is None:
+        return 0
+    burst = st.session_state["bursts"].get(photo.get("burst_id"))
+    member_ids = list(burst["members"]) if burst else [photo_id]
+    return sum(delete_photo(member_id) for member_id in member_ids)
+
+def update_photo_location(photo_id, lat, lon):
+    """
+    촬영 위치 수정 (검색 인덱스는 그대로). 사진이 속한 연사도 새 위치로 옮겨서,
+    이후 새 위치에서 올린 사진이 이 연사와 묶이고 예전 위치에서 올린 사진은 묶이지 않게 함
+    """
+    photo = find_photo(photo_id)
+    if photo is not None:
+        photo["lat"], photo["lon"] = lat, lon
+        move_burst(st.session_state["bursts"], photo.get("burst_id"), lat, lon, st.session_state["recent_bursts"])
+
+# ==================================================
+# 검색 (배번 정확 일치 → 이미지 유사도 순)
+# ==================================================
+SIMILARITY_THRESHOLD = 0.70
+
+def search_by_bib(tournament, bib):
+    """배번 역색인 조회 [(photo_id, confidence)] - 같은 연사는 가장 잘 읽힌 1장만 (역색인에 연사 ID 를 함께 저장)"""
+    return get_bib_index(tournament).lookup(bib, one_per_group=True)
+
+def search_by_text(tournament, text):
+    """CLIP 텍스트 임베딩으로 이미지 인덱스 검색 (이미지 업로드/인코딩 없음)"""
+    query_emb = load_prompt_cache().get(to_clip_prompt(text))
+    return get_tournament_index(tournament).search(query_emb, threshold=TEXT_SIMILARITY_THRESHOLD, top_k=TEXT_TOP_K)
+
+MULTI_QUERY_FUSE = "max" # 여러 장 검색 시: 어느 한 장과 닮으면 찾음
+
+def rank_results(clip_results, face_results, face_only):
+    """
+    CLIP 결과와 얼굴 결과 [(photo_id, score)] 를 검색 설정대로 합쳐 임계값 이상만 유사도 내림차순으로.
+    얼굴만으로 검색하면 동일인 기준을 넘은 사진만 남기고, CLIP 결과까지 있으면(피드백 재검색) 합친 점수로 순서만 바꿈
+    """
+    if face_results is None:
+        scores = dict(clip_results)
+    elif face_only:
+        scores = face_only_scores(face_results)
+        if clip_results is not None:
+            fused = fuse_scores(clip_results, face_results)
+            scores = {photo_id: fused[photo_id] for photo_id in scores}
+    else:
+        scores = fuse_scores(clip_results, face_results)
+    ranked = sorted(scores.items(), key=lambda kv: kv[1], reverse=True)
+    return [(photo_id, score) for photo_id, score in ranked if score >= SIMILARITY_THRESHOLD]
+
+def search_by_images(tournament, images):
+    """
+    CLIP(+얼굴) 유사도 검색. 반환: ([(photo_id, score)] 임계값 이상·유사도 내림차순, CLIP 쿼리 임베딩 또는 None,
+    얼굴 결과 또는 None - 피드백 재검색 때 다시 합침)
+    얼굴을 먼저 찾고, 얼굴만으로 검색하는 설정에서 얼굴이 잡히면 CLIP 인코딩/인덱스 검색을 하지 않습니다.
+    """
+
+    # 얼굴 채널: 셀카에서 얼굴이 잡히면 얼굴 점수와 합치거나 얼굴만으로 검색 (사진마다 가장 뚜렷한 얼굴 1개)
+    face_index = get_face_index(tournament)
+    face_results = None
+    with span("face_query"):
+        if len(face_index):
+            query_faces = [faces[0] for faces in (get_face_embeddings(img, load_face_channel()) for img in images) if len(faces)]
+            if query_faces:
+                face_results = face_index.search(np.stack(query_faces), fuse=MULTI_QUERY_FUSE)
+
+    face_only = st.session_state["face_only_search"]
+    if face_results is not None and face_only:
+        clip_results, query_embs = None, None
+    else:
+        # 다른 세션의 검색과 함께 한 번의 배치 인코딩 + 행렬곱
+        with span("clip_query"):
+            query = load_query_batcher().search(get_tournament_index(tournament), images, fuse=MULTI_QUERY_FUSE)
+        clip_results, query_embs = query.results, query.query_embs
+
+    return rank_results(clip_results, face_results, face_only), query_embs, face_results
+
+def cached_search_by_images(tournament):
+    """
+    검색 결과 캐시: 같은 사진 묶음(바이트 해시 집합)으로는 재실행마다 CLIP 을 다시 돌리지 않습니다.
+    인덱스에 사진이 추가/삭제되면 키가 바뀌어 다시 검색합니다.
+    """
+    key = (tournament, st.session_state["query_hashes"], st.session_state["face_only_search"],
+           get_tournament_index(tournament).version, get_face_index(tournament).version)
+    cache = st.session_state["search_cache"]
+    CACHE_REQUESTS.inc(cache="search", result="hit" if key in cache else "miss")
+    if key not in cache:
+        cache.clear() # 세션당 최근 검색 1건만 보관
+        results, query_embs, face_results = search_by_images(tournament, st.session_state["uploaded_images"])
+        cache[key] = {"results": results, "query_embs": query_embs, "face_results": face_results}
+        st.session_state["feedback"] = None
+        st.session_state["dismissed"] = set()
+    st.session_state["search_key"] = key
+    return cache[key]["results"]
+
+def get_feedback_session(tournament):
+    """현재 이미지 검색에 대한 피드백 상태 (검색이 바뀌면 새로 만듦)"""
+    key = st.session_state["search_key"]
+    feedback = st.session_state["feedback"]
+    if feedback is None or feedback[0] != key:
+        entry = st.session_state["search_cache"][key]
+        if entry["query_embs"] is None: # 얼굴만으로 찾은 검색은 피드백을 처음 반영할 때 CLIP 쿼리를 만듦
+            entry["query_embs"] = load_clip_model().encode_images(st.session_state["uploaded_images"])
+        feedback = (key, FeedbackSession(get_tournament_index(tournament), entry["query_embs"], fuse=MULTI_QUERY_FUSE))
+        st.session_state["feedback"] = feedback
+    return feedback[1]
+
+def refined_results():
+    """
+    피드백이 한 번 이상 반영됐으면 캐시된 후보 점수로 다시 매긴 결과 (임계값을 넘는 사진이 없으면 []), 아니면 None.
+    첫 검색과 같이 얼굴 점수를 다시 합침
+    """
+    feedback = st.session_state["feedback"]
+    key = st.session_state["search_key"]
+    if feedback is None or feedback[0] != key or not feedback[1].rounds:
+        return None
+    entry = st.session_state["search_cache"][key]
+    return rank_results(feedback[1].results(), entry["face_results"], st.session_state["face_only_search"])
+
 # ==================================================
 # 대회 정보
 # ==================================================
@@ -230,8 +475,11 @@ tournaments = {
 # ==================================================
 # 메인 로직
 # ==================================================
-mode = st.sidebar.radio("모드 선택", ["📸 작가 모드", "🔍 이용자 모드"], label_visibility="collapsed")
-model, processor, device = load_clip_model()
+mode = st.sidebar.radio("모드 선택", ["📸 작가 모드", "🔍 이용자 모드"], label_visibility="collapsed", key="mode")
+start_metrics_server()
+warmup_status = start_warmup() # 모델은 백그라운드에서 로드되고, 첫 화면은 바로 그려짐
+if not warmup_status["done"]:
+    st.sidebar.caption("⏳ 검색 모델 준비 중...")
 
 # ==================================================
 # 📸 작가 모드 - (통합된 새 로직)
@@ -265,14 +513,16 @@ if mode == "📸 작가 모드":
             st.stop()
             
         # 지도 생성 및 클릭 이벤트 처리
-        m = folium.Map(location=coords[0], zoom_start=13)
-        folium.PolyLine(coords, color="blue", weight=3).add_to(m)
-        
-        # 이전 클릭 마커 표시
-        if latlon:
-             folium.Marker(latlon, icon=folium.Icon(color='red', icon='camera', prefix='fa')).add_to(m)
+        import folium
+        with span("map_build"):
+            m = folium.Map(location=coords[0], zoom_start=13)
+            folium.PolyLine(coords, color="blue", weight=3).add_to(m)
+
+            # 이전 클릭 마커 표시
+            if latlon:
+                folium.Marker(latlon, icon=folium.Icon(color='red', icon='camera', prefix='fa')).add_to(m)
 
-        map_data = st_folium(m, width=700, height=500, key="photographer_map")
+        map_data = render_folium(m, width=700, height=500, key="photographer_map")
         
         # 맵 클릭 시 세션 상태에 위치 저장 (Streamlit 맵 클릭 처리)
         if map_data.get("last_clicked"):
@@ -289,38 +539,34 @@ if mode == "📸 작가 모드":
             progress_bar = st.progress(0, text="AI 처리 및 저장 중...")
             
             for idx, f in enumerate(uploaded):
-                img = Image.open(f).convert("RGB")
-                exif = extract_exif_data(img)
-                photo_time = safe_parse_time(exif)
-                
-                # 1. 임베딩 생성 (AI)
-                emb = get_image_embedding(img, model, processor, device)
-                
-                # 2. 썸네일 생성 및 Base64 인코딩 (지도/목록 표시용)
-                thumb = img.copy()
-                thumb.thumbnail((150, 150))
-                buf_thumb = io.BytesIO()
-                thumb.save(buf_thumb, format="JPEG", quality=70) # 용량 최적화
-                thumb_b64 = base64.b64encode(buf_thumb.getvalue()).decode()
-
-                # 3. 원본 이미지 바이트 저장 (상세 보기/다운로드용)
-                buf_full = io.BytesIO()
-                img.save(buf_full, format="JPEG", quality=90)
-                full_bytes = buf_full.getvalue()
-                
-                # 4. 세션에 저장
-                st.session_state["photos"].append({
-                    "id": uuid.uuid4().hex,
-                    "name": f.name,
-                    "lat": latlon[0],
-                    "lon": latlon[1],
-                    "tournament": tournament,
-                    "time": photo_time,
-                    "embedding": emb,
-                    "thumb": thumb_b64, # 썸네일 Base64
-                    "bytes": full_bytes, # 원본 바이트 데이터
-                })
-                progress_bar.progress((idx + 1) / len(uploaded), text=f"{f.name} 처리 완료")
+                with span("ingest_photo"), INGEST_SECONDS.time(tournament=tournament):
+                    # 1~3. 원본 저장, 축소 디코딩, 임베딩(전체 프레임 + 인물 크롭), 해시, 썸네일/미리보기
+                    photo, crop_embs, img = prepare_upload(f.getvalue(), f.name, tournament, latlon, load_clip_model())
+
+                    # 4. 연사 묶기: 새 연사의 대표 사진만 검색 인덱스에 추가
+                    burst_id, is_rep = assign_burst(st.session_state["bursts"], photo, st.session_state["recent_bursts"])
+                    photo["burst_id"] = burst_id
+                    del photo["embedding"] # 임베딩은 검색 인덱스에만 보관 (사진마다 float32 사본을 두지 않음)
+                    # 5. 배번 인식 (연사의 모든 사진 - 배번이 가장 잘 보이는 컷이 다를 수 있음)
+                    with span("bib_ocr"):
+                        bibs = recognize_bibs(img, photo["person_boxes"])
+                    if bibs:
+                        photo["bibs"] = bibs
+                        get_bib_index(tournament).add(photo["id"], bibs, group=burst_id)
+
+                    if is_rep:
+                        get_tournament_index(tournament).add(photo["id"], crop_embs) # 사진당 여러 벡터
+                        with span("face"):
+                            face_embs = get_face_embeddings(img, load_face_channel())
+                        if len(face_embs):
+                            get_face_index(tournament).add(photo["id"], face_embs)
+
+                    # 6. 세션에 저장
+                    st.session_state["photos"].append(photo)
+                    INGEST_PHOTOS.inc(tournament=tournament)
+                    INGEST_BYTES.inc(photo["size"], tournament=tournament)
+                    count_stored_photo(tournament, 1)
+                    progress_bar.progress((idx + 1) / len(uploaded), text=f"{f.name} 처리 완료")
                 
             st.success(f"🎉 {len(uploaded)}장 업로드 및 AI 분석 완료!")
             progress_bar.empty()
@@ -329,6 +575,28 @@ if mode == "📸 작가 모드":
             st.session_state["last_clicked_lng"] = None
             st.rerun()
 
+    # 4️⃣ 등록한 사진 관리: 삭제(철회) / 위치 수정
+    my_photos = [p for p in st.session_state["photos"] if p["tournament"] == tournament]
+    if my_photos:
+        with st.expander(f"🗂️ 등록한 사진 관리 ({len(my_photos)}장)"):
+            names = {p["id"]: f"{p['name']} ({p['time'].strftime('%H:%M:%S')})" for p in my_photos}
+            chosen = st.multiselect("사진 선택", list(names), format_func=names.get, key="manage_photos")
+            if chosen:
+                st.image([base64.b64decode(find_photo(pid)["thumb"]) for pid in chosen], width=100)
+                col_del, col_move = st.columns(2)
+                def delete_chosen_photos():
+                    deleted = sum(delete_photo(pid) for pid in st.session_state["manage_photos"])
+                    st.session_state["manage_photos"] = [] # 콜백 안에서만 위젯 값을 바꿀 수 있음
+                    st.toast(f"{deleted}장을 삭제했습니다.")
+
+                with col_del:
+                    st.button(f"🗑️ {len(chosen)}장 삭제", on_click=delete_chosen_photos, use_container_width=True)
+                with col_move:
+                    if latlon and st.button("📍 지도에서 선택한 위치로 옮기기", use_container_width=True):
+                        for pid in chosen:
+                            update_photo_location(pid, *latlon)
+                        st.rerun()
+
 # ==================================================
 # 🔍 이용자 모드
 # ==================================================
@@ -347,22 +615,54 @@ else:
 
         if selected != "대회를 선택해주세요":
             st.session_state["selected_tournament"] = selected
-            uploaded_file = st.file_uploader(
-                "2️⃣ 본인 사진 업로드",
+            search_method = st.radio("검색 방법", ["📷 배번/사진으로 찾기", "💬 텍스트로 찾기"], horizontal=True)
+
+        if selected != "대회를 선택해주세요" and search_method == "💬 텍스트로 찾기":
+            preset = st.selectbox("2️⃣ 자주 찾는 장면/옷차림", ["직접 입력"] + list(COMMON_PROMPTS.keys()))
+            text_query = preset
+            if preset == "직접 입력":
+                text_query = st.text_input("찾을 장면을 입력하세요", placeholder="예: red singlet, finish line arch (영어 권장)")
+
+            if text_query.strip() and st.button("🔍 텍스트로 사진 찾기", type="primary"):
+                st.session_state["new_search"] = True
+                st.session_state["text_query"] = text_query.strip()
+                st.session_state["uploaded_images"] = []
+                st.session_state["query_hashes"] = frozenset()
+                st.session_state["bib_query"] = ""
+                st.session_state["show_results"] = True
+                st.session_state["show_detail_view"] = False
+                st.session_state["selected_for_download"] = set()
+                st.rerun()
+
+        elif selected != "대회를 선택해주세요":
+            bib_query = st.text_input("2️⃣ 배번(번호표)으로 찾기", placeholder="예: 12345 (모르면 비워두세요)")
+            uploaded_files = st.file_uploader(
+                "3️⃣ 본인 사진 업로드 (여러 장 가능 - 앞/옆모습, 다른 복장 / 배번으로 찾지 못하면 사진으로 검색합니다)",
                 type=["png", "jpg", "jpeg"],
+                accept_multiple_files=True,
                 key="photo_uploader"
             )
 
-            if uploaded_file and st.button("🔍 유사 사진 찾기", type="primary"):
-                st.session_state["uploaded_image"] = Image.open(uploaded_file).convert("RGB")
+            face_only = True
+            if face_models_available():
+                face_only = st.checkbox("🙂 사진에서 얼굴이 인식되면 얼굴로만 찾기", value=st.session_state["face_only_search"])
+
+            if (uploaded_files or normalize_bib(bib_query)) and st.button("🔍 유사 사진 찾기", type="primary"):
+                st.session_state["new_search"] = True
+                st.session_state["uploaded_images"] = [reduced_rgb(Image.open(f), QUERY_SIDE) for f in uploaded_files]
+                st.session_state["query_hashes"] = frozenset(hashlib.sha1(f.getvalue()).hexdigest() for f in uploaded_files)
+                st.session_state["bib_query"] = normalize_bib(bib_query)
+                st.session_state["text_query"] = ""
+                st.session_state["face_only_search"] = face_only
                 st.session_state["show_results"] = True
                 st.session_state["show_detail_view"] = False
                 st.session_state["selected_for_download"] = set()
                 st.rerun()
-            elif uploaded_file:
-                 st.image(uploaded_file, caption="업로드된 사진", width=200) # 업로드 미리보기
-            else:
-                st.info("먼저 참가한 대회를 선택해주세요.")
+            elif uploaded_files:
+                 st.image(uploaded_files, caption=[f.name for f in uploaded_files], width=200) # 업로드 미리보기
+
+        else:
+            st.info("먼저 참가한 대회를 선택해주세요.")
     
     # ----------------------------------------------------
     # 검색 결과 페이지
@@ -384,7 +684,10 @@ else:
                 if st.button("◀️ 처음으로", type="secondary"):
                     st.session_state["show_results"] = False
                     st.session_state["selected_tournament"] = None
-                    st.session_state["uploaded_image"] = None
+                    st.session_state["uploaded_images"] = []
+                    st.session_state["query_hashes"] = frozenset()
+                    st.session_state["bib_query"] = ""
+                    st.session_state["text_query"] = ""
                     st.rerun()
 
         with col2:
@@ -394,17 +697,37 @@ else:
 
         map_col, content_col = st.columns([5, 5])
         
-        # 1. 유사도 계산 및 마커 데이터 준비
-        query_emb = get_image_embedding(st.session_state["uploaded_image"], model, processor, device)
+        # 1. 검색: 텍스트 질의 / 배번 정확 일치가 있으면 바로 사용, 없으면 이미지 유사도 검색
+        search_start = time.perf_counter()
+        with span("search"):
+            if st.session_state["text_query"]:
+                results = search_by_text(tournament_name, st.session_state["text_query"])
+            elif st.session_state["bib_query"]:
+                results = search_by_bib(tournament_name, st.session_state["bib_query"])
+            else:
+                results = []
+            image_search = not results and bool(st.session_state["uploaded_images"])
+            if image_search:
+                results = cached_search_by_images(tournament_name)
+                refined = refined_results()
+                if refined is not None: # 피드백 뒤에 남은 사진이 없으면 빈 결과를 그대로 보여 줌
+                    results = refined
+                results = [(photo_id, score) for photo_id, score in results if photo_id not in st.session_state["dismissed"]]
+        if st.session_state["new_search"]: # 버튼으로 새로 검색한 첫 실행만 집계 (이후 재실행은 캐시된 결과를 다시 그림)
+            st.session_state["new_search"] = False
+            search_kind = "image" if image_search else ("text" if st.session_state["text_query"] else "bib")
+            SEARCHES.inc(kind=search_kind)
+            SEARCH_SECONDS.observe(time.perf_counter() - search_start, kind=search_kind)
+            SEARCH_RESULTS.observe(len(results), kind=search_kind)
+
+        photos_by_id = {p["id"]: p for p in st.session_state["photos"]}
         photo_markers = []
-        for p in st.session_state["photos"]:
-            if p["tournament"] != tournament_name:
+        for photo_id, score in results:
+            p = photos_by_id.get(photo_id)
+            if p is None: # 검색 후 삭제된 사진
                 continue
-            sim = cosine_similarity(query_emb, p["embedding"])[0][0] * 100
-            p["similarity"] = sim
-            if sim >= 70:
-                photo_markers.append(p)
-        photo_markers.sort(key=lambda x: x["similarity"], reverse=True)
+            p["similarity"] = score * 100
+            photo_markers.append(p)
         st.session_state["photo_markers"] = photo_markers # 세션 상태에 저장
 
         # ----------------------------------------------------
@@ -417,7 +740,7 @@ else:
                 st.warning("유사 사진을 찾지 못했습니다.")
             else:
                 m = create_course_map_with_photos(coords, photo_markers)
-                st_folium(m, width=900, height=500)
+                render_folium(m, width=900, height=500)
 
         # ----------------------------------------------------
         # 2. 오른쪽: 목록 or 상세보기
@@ -433,7 +756,16 @@ else:
                     st.markdown("#### ✨ 선택된 이미지 상세")
                     
                     # 이미지 표시
-                    image_bytes_to_st_image(photo["bytes"], use_container_width=True)
+                    image_bytes_to_st_image(load_preview(photo), use_container_width=True)
+
+                    # 같은 연사의 다른 사진 (펼칠 때만 표시)
+                    burst_members = get_burst_members(photo)
+                    if burst_members and st.checkbox(f"📚 같은 연사 사진 {len(burst_members)}장 더 보기", key=f"burst_{photo['id']}"):
+                        burst_cols = st.columns(3)
+                        for j, member in enumerate(burst_members):
+                            with burst_cols[j % 3]:
+                                image_bytes_to_st_image(load_preview(member), use_container_width=True)
+                                st.caption(member["time"].strftime('%H:%M:%S'))
                     st.markdown("---")
                     
                     # 위치 및 시간 정보
@@ -460,14 +792,26 @@ else:
                                 f'<button class="purchase-btn-style">'
                                 f'🛒 구매하기 (새 창 열림)'
                                 f'</button></a>', unsafe_allow_html=True)
+
+                    st.markdown("---")
+                    if st.button("🚫 본인 사진 게시 중단 요청", help="이 사진과 같은 연사 사진을 검색/목록에서 바로 내립니다"):
+                        removed = takedown_photo(photo["id"])
+                        st.session_state["show_detail_view"] = False
+                        st.session_state["selected_photo_id"] = None
+                        st.toast(f"사진 {removed}장을 내렸습니다.")
+                        st.rerun()
                 else:
                     st.warning("사진 정보를 불러올 수 없습니다.")
 
             # --- 유사 사진 목록 화면 ---
             else:
                 st.markdown("#### 🖼️ 검색한 사진")
-                if st.session_state["uploaded_image"]:
-                    st.image(st.session_state["uploaded_image"], width=200) 
+                if st.session_state["text_query"]:
+                    st.markdown(f"**💬 텍스트:** {st.session_state['text_query']}")
+                if st.session_state["bib_query"]:
+                    st.markdown(f"**🔢 배번:** {st.session_state['bib_query']}")
+                if st.session_state["uploaded_images"]:
+                    st.image(st.session_state["uploaded_images"], width=200) 
                 
                 st.markdown("---")
                 st.markdown("#### 🎯 유사한 사진 목록")
@@ -486,44 +830,75 @@ else:
                 else:
                     st.info("다운로드/구매를 위해 사진을 선택해주세요. (각 사진 아래 체크박스 사용)")
                 
+                # 연관성 피드백: 선택(정답)/제외(오답)한 사진으로 쿼리를 보정해 다시 정렬
+                if image_search and (st.session_state["selected_for_download"] or st.session_state["dismissed"]):
+                    if st.button("🔄 선택/제외한 사진을 반영해 다시 찾기", use_container_width=True):
+                        get_feedback_session(tournament_name).refine(
+                            st.session_state["selected_for_download"], st.session_state["dismissed"]
+                        )
+                        st.rerun()
+
                 st.markdown("---")
                 
                 # 바둑판식 목록 표시 (3열)
                 cols = st.columns(3)
                 
-                for i, p in enumerate(photo_markers):
-                    with cols[i % 3]: 
+                with span("render_grid"):
+                    for i, p in enumerate(photo_markers):
+                        with cols[i % 3]: 
                         
-                        def set_selected_photo_and_show_detail(photo_id):
-                            st.session_state["selected_photo_id"] = photo_id
-                            st.session_state["show_detail_view"] = True 
+                            def set_selected_photo_and_show_detail(photo_id):
+                                st.session_state["selected_photo_id"] = photo_id
+                                st.session_state["show_detail_view"] = True 
                         
-                        # 체크박스 상태 업데이트 함수 (깜빡임 제거)
-                        def update_download_selection(photo_id):
-                            if st.session_state[f"select_list_{photo_id}"]:
-                                st.session_state["selected_for_download"].add(photo_id)
-                            else:
+                            # 체크박스 상태 업데이트 함수 (깜빡임 제거)
+                            def update_download_selection(photo_id):
+                                if st.session_state[f"select_list_{photo_id}"]:
+                                    st.session_state["selected_for_download"].add(photo_id)
+                                else:
+                                    st.session_state["selected_for_download"].discard(photo_id)
+
+                            def dismiss_photo(photo_id):
+                                st.session_state["dismissed"].add(photo_id)
                                 st.session_state["selected_for_download"].discard(photo_id)
 
-                        # 이미지 표시 (바둑판식)
-                        image_bytes_to_st_image(p["bytes"], use_container_width=True) 
-
-                        st.caption(f"📍 {p['time'].strftime('%H:%M')} | 유사도: **<span style='color:red;'>{p['similarity']:.1f}%</span>**", unsafe_allow_html=True)
-
-                        col_view, col_select = st.columns([1, 4])
+                            # 이미지 표시 (바둑판식)
+                            image_bytes_to_st_image(load_preview(p), use_container_width=True) 
+
+                            burst_size = len(st.session_state["bursts"].get(p.get("burst_id"), {}).get("members", []))
+                            burst_note = f" | 연사 {burst_size}장" if burst_size > 1 else ""
+                            st.caption(f"📍 {p['time'].strftime('%H:%M')} | 유사도: **<span style='color:red;'>{p['similarity']:.1f}%</span>**{burst_note}", unsafe_allow_html=True)
+
+                            col_view, col_dismiss, col_select = st.columns([1, 1, 3])
+
+                            with col_view:
+                                # '보기' 버튼 (상세 보기 전환)
+                                if st.button("보기", key=f"list_btn_{p['id']}", help="클릭 시 상세 화면으로 이동", type="secondary", use_container_width=True):
+                                    set_selected_photo_and_show_detail(p["id"])
+                                    st.rerun()
+
+                            with col_dismiss:
+                                # 이미지 검색 결과에서 빼기 (피드백의 오답으로 사용)
+                                if image_search:
+                                    st.button("✕", key=f"dismiss_btn_{p['id']}", help="내 사진 아님 (목록에서 제외)",
+                                              on_click=dismiss_photo, args=(p["id"],), use_container_width=True)
+
+                            with col_select:
+                                # 체크박스 (선택 기능)
+                                st.checkbox(
+                                    "저장 목록에 추가",
+                                    value=p["id"] in st.session_state["selected_for_download"],
+                                    key=f"select_list_{p['id']}",
+                                    on_change=update_download_selection,
+                                    args=(p["id"],)
+                                )
 
-                        with col_view:
-                            # '보기' 버튼 (상세 보기 전환)
-                            if st.button("보기", key=f"list_btn_{p['id']}", help="클릭 시 상세 화면으로 이동", type="secondary", use_container_width=True):
-                                set_selected_photo_and_show_detail(p["id"])
-                                st.rerun()
-
-                        with col_select:
-                            # 체크박스 (선택 기능)
-                            st.checkbox(
-                                "저장 목록에 추가",
-                                value=p["id"] in st.session_state["selected_for_download"],
-                                key=f"select_list_{p['id']}",
-                                on_change=update_download_selection,
-                                args=(p["id"],)
-                            )
\ No newline at end of file
+# ==================================================
+# 🔧 재실행 마무리 (구간별 시간 누적 / 디버그 사이드바)
+# ==================================================
+end_rerun_trace()
+if SESSION_BUDGET_MB or DEBUG_SIDEBAR:
+    memory_report = enforce_session_budget()
+if DEBUG_SIDEBAR:
+    render_trace_sidebar()
+    render_memory_sidebar(memory_report)
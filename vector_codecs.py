@@ -0,0 +1,172 @@
+"""
+임베딩 압축 저장 방식 (검색 인덱스용)
+- float32 : 원본 (512차원 기준 2 KB/벡터)
+- float16 : 절반 (1 KB), 학습 불필요
+- int8    : 차원별 스케일 스칼라 양자화 (512 B)
+- pq      : 곱 양자화(Product Quantization) + 비대칭 거리 계산(ADC) (64 B, 32배)
+int8 / pq 는 처음 쌓인 벡터로 학습(train)한 뒤부터 압축합니다.
+"""
+
+import numpy as np
+
+CHUNK_ROWS = 65536
+
+
+class Float32Codec:
+    name = "float32"
+    min_train = 0
+    trained = True
+
+    def train(self, vectors):
+        pass
+
+    def encode(self, vectors):
+        return np.asarray(vectors, dtype=np.float32)
+
+    def decode(self, codes):
+        return codes
+
+    def empty(self, dim):
+        return np.empty((0, dim), dtype=np.float32)
+
+    def scores(self, codes, queries):
+        """(n 행, m 쿼리) 내적"""
+        return codes @ queries.T
+
+
+class Float16Codec(Float32Codec):
+    name = "float16"
+
+    def encode(self, vectors):
+        return np.asarray(vectors, dtype=np.float16)
+
+    def decode(self, codes):
+        return codes.astype(np.float32)
+
+    def empty(self, dim):
+        return np.empty((0, dim), dtype=np.float16)
+
+    def scores(self, codes, queries):
+        # float16 행렬곱은 BLAS 를 타지 않으므로 청크 단위로 float32 변환 후 계산
+        return np.concatenate([
+            codes[i:i + CHUNK_ROWS].astype(np.float32) @ queries.T
+            for i in range(0, len(codes), CHUNK_ROWS)
+        ]) if len(codes) else np.empty((0, len(queries)), dtype=np.float32)
+
+
+class Int8Codec(Float32Codec):
+    """x ≈ code * scale (차원별 scale = 학습 데이터의 최대 절댓값 / 127)"""
+    name = "int8"
+    min_train = 256
+    trained = False
+    MARGIN = 1.1   # 학습 이후 들어올 값을 위한 여유
+
+    def __init__(self):
+        self.scale = None
+
+    def train(self, vectors):
+        max_abs = np.abs(vectors).max(axis=0) * self.MARGIN
+        self.scale = (np.maximum(max_abs, 1e-6) / 127).astype(np.float32)
+        self.trained = True
+
+    def encode(self, vectors):
+        return np.clip(np.rint(vectors / self.scale), -127, 127).astype(np.int8)
+
+    def decode(self, codes):
+        return codes.astype(np.float32) * self.scale
+
+    def empty(self, dim):
+        return np.empty((0, dim), dtype=np.int8)
+
+    def scores(self, codes, queries):
+        # 스케일을 쿼리 쪽에 곱해 두면 code 는 형 변환만 하면 됨
+        scaled = queries * self.scale
+        return np.concatenate([
+            codes[i:i + CHUNK_ROWS].astype(np.float32) @ scaled.T
+            for i in range(0, len(codes), CHUNK_ROWS)
+        ]) if len(codes) else np.empty((0, len(queries)), dtype=np.float32)
+
+
+def _kmeans(data, k, iterations=15, seed=0):
+    rng = np.random.default_rng(seed)
+    centroids = data[rng.choice(len(data), size=k, replace=len(data) < k)].copy()
+    for _ in range(iterations):
+        dist = (data ** 2).sum(1)[:, None] - 2 * data @ centroids.T + (centroids ** 2).sum(1)[None, :]
+        assign = dist.argmin(axis=1)
+        sums = np.zeros_like(centroids)
+        np.add.at(sums, assign, data)
+        counts = np.bincount(assign, minlength=k)
+        filled = counts > 0
+        centroids[filled] = sums[filled] / counts[filled, None]
+        # 빈 클러스터는 임의의 점으로 다시 시작
+        centroids[~filled] = data[rng.integers(len(data), size=(~filled).sum())]
+    return centroids
+
+
+class PQCodec(Float32Codec):
+    """
+    d 차원을 m 개 부분공간으로 나누고 각 부분공간을 256 개 중심점 번호(uint8)로 저장.
+    검색은 쿼리-중심점 내적표(m x 256)를 만든 뒤 코드로 표를 찾아 더하는 ADC 방식.
+    """
+    name = "pq"
+    trained = False
+    MAX_TRAIN = 20000
+
+    def __init__(self, m=64, k=256):
+        self.m = m
+        self.k = k
+        self.min_train = k * 4
+        self.centroids = None   # (m, k, d/m)
+
+    def train(self, vectors):
+        dim = vectors.shape[1]
+        if dim % self.m:
+            raise ValueError(f"차원 {dim} 이 부분공간 수 {self.m} 로 나누어떨어지지 않습니다")
+        if len(vectors) > self.MAX_TRAIN:
+            vectors = vectors[np.random.default_rng(0).choice(len(vectors), self.MAX_TRAIN, replace=False)]
+        sub = dim // self.m
+        self.centroids = np.stack([
+            _kmeans(vectors[:, i * sub:(i + 1) * sub], self.k) for i in range(self.m)
+        ]).astype(np.float32)
+        self.trained = True
+
+    def _split(self, vectors):
+        return vectors.reshape(len(vectors), self.m, -1)
+
+    def encode(self, vectors):
+        parts = self._split(np.asarray(vectors, dtype=np.float32))
+        codes = np.empty((len(vectors), self.m), dtype=np.uint8)
+        for i in range(self.m):
+            c = self.centroids[i]
+            dist = -2 * parts[:, i] @ c.T + (c ** 2).sum(1)[None, :]
+            codes[:, i] = dist.argmin(axis=1)
+        return codes
+
+    def decode(self, codes):
+        return self.centroids[np.arange(self.m)[None, :], codes].reshape(len(codes), -1)
+
+    def empty(self, dim):
+        return np.empty((0, self.m), dtype=np.uint8)
+
+    def scores(self, codes, queries):
+        result = np.empty((len(codes), len(queries)), dtype=np.float32)
+        subspaces = np.arange(self.m)[None, :]
+        for j, q in enumerate(queries):
+            table = np.einsum("md,mkd->mk", self._split(q[None, :])[0], self.centroids)  # (m, k)
+            for i in range(0, len(codes), CHUNK_ROWS):
+                result[i:i + CHUNK_ROWS, j] = table[subspaces, codes[i:i + CHUNK_ROWS]].sum(axis=1)
+        return result
+
+
+CODECS = {
+    "float32": Float32Codec,
+    "float16": Float16Codec,
+    "int8": Int8Codec,
+    "pq": PQCodec,
+}
+
+
+def make_codec(storage):
+    if storage not in CODECS:
+        raise ValueError(f"지원하지 않는 저장 방식: {storage} (가능: {', '.join(CODECS)})")
+    return CODECS[storage]()
@@ -0,0 +1,73 @@
+"""
+모델 예열 + 준비 완료(readiness) 표시
+가중치만 올린 직후의 첫 추론은 그래프/메모리 할당기 초기화 때문에 평소보다 훨씬 느립니다.
+서버가 뜰 때 평소 크기의 더미 배치를 미리 돌려 두고, 끝나면 준비 완료 파일을 써서
+배포 환경(로드밸런서, k8s readinessProbe 의 `test -f` 등)이 예열된 인스턴스로만 트래픽을 보내게 합니다.
+"""
+
+import json
+import os
+import time
+
+import numpy as np
+from PIL import Image
+
+WARMUP_BATCH_SIZES = (1, 8, 32)   # 검색(1장), 작가 업로드 사진 1장의 사람 크롭(~8), 서버 배치 상한(32)
+WARMUP_RUNS = 2                   # 크기마다 반복 횟수 (첫 번째가 콜드, 마지막이 예열 후)
+WARMUP_IMAGE_SIZE = 224
+WARMUP_TEXT = "a marathon runner"
+
+# 준비 완료 파일 경로 (비어 있으면 파일을 쓰지 않음)
+READY_FILE = os.environ.get("CLIP_READY_FILE", "")
+
+
+def warm_up_encoder(encoder, batch_sizes=WARMUP_BATCH_SIZES, runs=WARMUP_RUNS):
+    """
+    더미 이미지/텍스트 배치로 인코더를 예열하고 크기별 소요 시간(ms)을 반환.
+    반환: {"images": {batch: [run1_ms, run2_ms, ...]}, "texts": {...}, "total_s"}
+    """
+    rng = np.random.default_rng(0)
+    start = time.perf_counter()
+    report = {"images": {}, "texts": {}}
+    for batch in batch_sizes:
+        images = [
+            Image.fromarray(rng.integers(0, 255, (WARMUP_IMAGE_SIZE, WARMUP_IMAGE_SIZE, 3), dtype=np.uint8))
+            for _ in range(batch)
+        ]
+        report["images"][batch] = _time_runs(lambda: encoder.encode_images(images), runs)
+        report["texts"][batch] = _time_runs(lambda: encoder.encode_texts([WARMUP_TEXT] * batch), runs)
+    report["total_s"] = round(time.perf_counter() - start, 3)
+    return report
+
+
+def _time_runs(fn, runs):
+    timings = []
+    for _ in range(runs):
+        t = time.perf_counter()
+        fn()
+        timings.append(round(1000 * (time.perf_counter() - t), 1))
+    return timings
+
+
+# ==================================================
+# 준비 완료 파일
+# ==================================================
+def mark_ready(report=None, path=READY_FILE):
+    """예열 결과와 함께 준비 완료 파일을 씀 (임시 파일 → rename 으로 원자적으로)"""
+    if not path:
+        return
+    payload = {"ready": True, "pid": os.getpid(), "time": time.time(), "warmup": report or {}}
+    tmp = f"{path}.tmp"
+    with open(tmp, "w", encoding="utf-8") as f:
+        json.dump(payload, f)
+    os.replace(tmp, path)
+
+
+def clear_ready(path=READY_FILE):
+    """프로세스 시작/종료 시 이전 프로세스가 남긴 준비 완료 파일 제거"""
+    if path and os.path.exists(path):
+        os.remove(path)
+
+
+def is_ready(path=READY_FILE):
+    return bool(path) and os.path.exists(path)